@@ -0,0 +1,191 @@
+'''
+Business: Move resolved reports and long-finished tournaments into monthly archive partitions, drop partitions past retention
+          and prune change_events past the realtime replay window
+Args: event - dict with httpMethod, headers (X-Cron-Secret), queryStringParameters (batch_size)
+      context - object with attributes: request_id, function_name
+Returns: HTTP response dict with archived row counts, dropped partitions and pruned change events
+'''
+
+import json
+import os
+import time
+from typing import Dict, Any
+
+from cron import HEADER, rejected
+from db import connection, execute, statement
+from timing import instrumented
+
+BATCH_SIZE = int(os.environ.get('ARCHIVE_BATCH_SIZE', '1000'))
+TIME_BUDGET = float(os.environ.get('ARCHIVE_TIME_BUDGET', '20'))
+REPORT_ARCHIVE_DAYS = int(os.environ.get('REPORT_ARCHIVE_DAYS', '30'))
+TOURNAMENT_ARCHIVE_DAYS = int(os.environ.get('TOURNAMENT_ARCHIVE_DAYS', '90'))
+REPORT_RETENTION_MONTHS = int(os.environ.get('REPORT_RETENTION_MONTHS', '24'))
+TOURNAMENT_RETENTION_MONTHS = int(os.environ.get('TOURNAMENT_RETENTION_MONTHS', '36'))
+CHANGE_EVENT_RETENTION_HOURS = int(os.environ.get('REALTIME_RETENTION_HOURS', '24'))
+RESOLVED_STATUSES = ['resolved', 'rejected']
+
+REPORT_PARTITIONS = statement('archive_report_partitions', '''
+    SELECT create_monthly_partitions('player_reports_archive', (
+        SELECT MIN(created_at) FROM player_reports
+        WHERE status = ANY(%s) AND created_at < LOCALTIMESTAMP - make_interval(days => %s)
+    ), LOCALTIMESTAMP)
+''')
+
+TOURNAMENT_PARTITIONS = statement('archive_tournament_partitions', '''
+    SELECT create_monthly_partitions('tournaments_archive', (
+        SELECT MIN(COALESCE(created_at, updated_at)) FROM tournaments
+        WHERE status = 'finished' AND updated_at < LOCALTIMESTAMP - make_interval(days => %s)
+    ), LOCALTIMESTAMP)
+''')
+
+ARCHIVE_REPORTS = statement('archive_reports', '''
+    WITH moved AS (
+        DELETE FROM player_reports
+        WHERE id IN (
+            SELECT id FROM player_reports
+            WHERE status = ANY(%s) AND created_at < LOCALTIMESTAMP - make_interval(days => %s)
+            ORDER BY created_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, reporter_user_id, reported_player_name, normalized_player, report_type, description,
+                  status, report_count, claimed_by, claimed_at, last_reported_at, created_at
+    )
+    INSERT INTO player_reports_archive
+    (id, reporter_user_id, reported_player_name, normalized_player, report_type, description,
+     status, report_count, claimed_by, claimed_at, last_reported_at, created_at)
+    SELECT * FROM moved
+''')
+
+ARCHIVE_TOURNAMENTS = statement('archive_tournaments', '''
+    WITH picked AS (
+        SELECT id FROM tournaments
+        WHERE status = 'finished' AND updated_at < LOCALTIMESTAMP - make_interval(days => %s)
+        ORDER BY updated_at
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    ), results AS (
+        INSERT INTO match_results_archive (result_seq, tournament_id, player_a, player_b, winner, completed_at)
+        SELECT result_seq, tournament_id, player_a, player_b, winner, completed_at
+        FROM tournament_matches
+        WHERE tournament_id IN (SELECT id FROM picked) AND result_seq IS NOT NULL
+    ), moved AS (
+        DELETE FROM tournaments
+        WHERE id IN (SELECT id FROM picked)
+        RETURNING id, name, game_name, roblox_server_url, max_players, prize_robux, creator_user_id,
+                  current_players, status, bracket_format, start_date, created_at, updated_at
+    )
+    INSERT INTO tournaments_archive
+    (id, name, game_name, roblox_server_url, max_players, prize_robux, creator_user_id,
+     current_players, status, bracket_format, start_date, created_at, updated_at, participants, matches)
+    SELECT m.id, m.name, m.game_name, m.roblox_server_url, m.max_players, m.prize_robux, m.creator_user_id,
+           m.current_players, m.status, m.bracket_format, m.start_date, COALESCE(m.created_at, m.updated_at),
+           m.updated_at,
+           ARRAY(
+               SELECT p.user_id FROM tournament_participants p
+               WHERE p.tournament_id = m.id
+               ORDER BY p.joined_at, p.user_id
+           ),
+           COALESCE((
+               SELECT jsonb_agg(to_jsonb(tm) - 'tournament_id' ORDER BY tm.match_no)
+               FROM tournament_matches tm
+               WHERE tm.tournament_id = m.id
+           ), '[]'::jsonb)
+    FROM moved m
+''')
+
+DROP_EXPIRED = statement('drop_expired_partitions', 'SELECT drop_expired_partitions(%s, %s)')
+
+PRUNE_CHANGE_EVENTS = statement('prune_change_events', '''
+    DELETE FROM change_events
+    WHERE id IN (
+        SELECT id FROM change_events
+        WHERE created_at < CURRENT_TIMESTAMP - make_interval(hours => %s)
+          AND (seq IS NULL OR seq < (SELECT MAX(seq) FROM change_events))
+        ORDER BY id
+        LIMIT %s
+    )
+''')
+
+@instrumented
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'GET')
+
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': f'Content-Type, X-User-Id, {HEADER}',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': ''
+        }
+
+    denied = rejected(event)
+    if denied is not None:
+        return denied
+
+    params = event.get('queryStringParameters', {}) or {}
+    try:
+        batch_size = max(1, int(params.get('batch_size', BATCH_SIZE)))
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': 'batch_size must be a positive integer'})
+        }
+
+    summary = archive(batch_size)
+
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(summary)
+    }
+
+def archive(batch_size: int = BATCH_SIZE, time_budget: float = TIME_BUDGET) -> Dict[str, Any]:
+    deadline = time.monotonic() + time_budget
+
+    with connection() as conn:
+        cur = conn.cursor()
+        execute(cur, REPORT_PARTITIONS, (RESOLVED_STATUSES, REPORT_ARCHIVE_DAYS))
+        execute(cur, TOURNAMENT_PARTITIONS, (TOURNAMENT_ARCHIVE_DAYS,))
+        conn.commit()
+
+        reports = _drain(conn, cur, ARCHIVE_REPORTS, (RESOLVED_STATUSES, REPORT_ARCHIVE_DAYS), batch_size, deadline)
+        tournaments = _drain(conn, cur, ARCHIVE_TOURNAMENTS, (TOURNAMENT_ARCHIVE_DAYS,), batch_size, deadline)
+        events = _drain(conn, cur, PRUNE_CHANGE_EVENTS, (CHANGE_EVENT_RETENTION_HOURS,), batch_size, deadline)
+
+        dropped = []
+        for parent, keep_months in (('player_reports_archive', REPORT_RETENTION_MONTHS),
+                                    ('tournaments_archive', TOURNAMENT_RETENTION_MONTHS)):
+            if keep_months > 0:
+                execute(cur, DROP_EXPIRED, (parent, keep_months))
+                dropped += [row[0] for row in cur.fetchall()]
+        conn.commit()
+        cur.close()
+
+    return {
+        'reports_archived': reports,
+        'tournaments_archived': tournaments,
+        'partitions_dropped': dropped,
+        'change_events_pruned': events
+    }
+
+def _drain(conn: Any, cur: Any, stmt: Any, args: tuple, batch_size: int, deadline: float) -> int:
+    total = 0
+    while True:
+        execute(cur, stmt, args + (batch_size,))
+        moved = cur.rowcount
+        conn.commit()
+        total += moved
+        if moved < batch_size or time.monotonic() >= deadline:
+            return total
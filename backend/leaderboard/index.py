@@ -0,0 +1,122 @@
+'''
+Business: Player leaderboard served from the precomputed leaderboard_ranks snapshot
+Args: event - dict with httpMethod, queryStringParameters (limit, or user_id with k; action=refresh from cron
+      with the X-Cron-Secret header)
+      context - object with attributes: request_id, function_name
+Returns: HTTP response dict with ranked players
+'''
+
+import json
+from typing import Dict, Any
+
+from cache import ResponseCache, conditional_response
+from cron import HEADER, rejected
+from db import connection
+from timing import instrumented, phase
+
+DEFAULT_TOP = 100
+MAX_TOP = 500
+DEFAULT_AROUND = 5
+MAX_AROUND = 50
+
+ranks_cache = ResponseCache()
+
+@instrumented
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'GET')
+
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': f'Content-Type, X-User-Id, If-None-Match, {HEADER}',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': ''
+        }
+
+    params = event.get('queryStringParameters', {}) or {}
+
+    if params.get('action') == 'refresh':
+        denied = rejected(event)
+        if denied is not None:
+            return denied
+        with connection() as conn:
+            cur = conn.cursor()
+            cur.execute('REFRESH MATERIALIZED VIEW CONCURRENTLY leaderboard_ranks')
+            conn.commit()
+            cur.close()
+        ranks_cache.invalidate()
+        return _json_response(200, {'success': True})
+
+    if method != 'GET':
+        return _json_response(405, {'error': 'Method not allowed'})
+
+    try:
+        limit = min(max(int(params.get('limit', DEFAULT_TOP)), 1), MAX_TOP)
+        k = min(max(int(params.get('k', DEFAULT_AROUND)), 0), MAX_AROUND)
+        user_id = int(params['user_id']) if params.get('user_id') else None
+    except ValueError:
+        return _json_response(400, {'error': 'limit, k and user_id must be integers'})
+
+    cache_key = ResponseCache.key(params)
+    entry = ranks_cache.get(cache_key)
+    if entry is None:
+        with connection() as conn:
+            cur = conn.cursor()
+            if user_id is None:
+                cur.execute('''
+                    SELECT user_id, display_name, photo_url, rating, wins, losses, rank, position, refreshed_at
+                    FROM leaderboard_ranks
+                    WHERE position <= %s
+                    ORDER BY position
+                ''', (limit,))
+            else:
+                cur.execute('''
+                    SELECT l.user_id, l.display_name, l.photo_url, l.rating, l.wins, l.losses,
+                           l.rank, l.position, l.refreshed_at
+                    FROM leaderboard_ranks me
+                    JOIN leaderboard_ranks l ON l.position BETWEEN me.position - %s AND me.position + %s
+                    WHERE me.user_id = %s
+                    ORDER BY l.position
+                ''', (k, k, user_id))
+            rows = cur.fetchall()
+            conn.commit()
+            cur.close()
+
+        if user_id is not None and not rows:
+            return _json_response(404, {'error': 'User is not ranked yet'})
+
+        players = [
+            {
+                'user_id': row[0],
+                'name': row[1],
+                'photo_url': row[2],
+                'rating': row[3],
+                'wins': row[4],
+                'losses': row[5],
+                'rank': row[6],
+                'position': row[7]
+            }
+            for row in rows
+        ]
+        with phase('serialize'):
+            body = json.dumps({
+                'players': players,
+                'refreshed_at': rows[0][8].isoformat() if rows else None
+            })
+        entry = ranks_cache.put(cache_key, body)
+
+    return conditional_response(entry, event.get('headers'))
+
+def _json_response(status_code: int, payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(payload)
+    }
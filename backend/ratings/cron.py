@@ -0,0 +1,28 @@
+'''
+Business: Shared-secret guard for functions that only a cron trigger may call
+Args: CRON_SECRET - secret the trigger sends in the X-Cron-Secret header (unset rejects every call)
+Returns: rejected(event) -> 403 response dict for callers without the secret, None for the trigger
+'''
+
+import hmac
+import json
+import os
+from typing import Any, Dict, Optional
+
+HEADER = 'X-Cron-Secret'
+
+
+def rejected(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    secret = os.environ.get('CRON_SECRET', '')
+    headers = event.get('headers') or {}
+    supplied = next((value for key, value in headers.items() if key.lower() == HEADER.lower()), None) or ''
+    if secret and hmac.compare_digest(supplied.encode(), secret.encode()):
+        return None
+    return {
+        'statusCode': 403,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps({'error': f'Valid {HEADER} header required'})
+    }
@@ -0,0 +1,54 @@
+'''
+Business: Vectorized Elo rating updates for batches of match results
+Args: player_a, player_b - user ID arrays, a_won - boolean array, ratings - current rating per user ID
+Returns: RatingDelta with new ratings and win/loss increments per touched user
+'''
+
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+DEFAULT_RATING = 1500.0
+DEFAULT_K = 32.0
+
+
+class RatingDelta(NamedTuple):
+    user_ids: np.ndarray
+    ratings: np.ndarray
+    wins: np.ndarray
+    losses: np.ndarray
+
+
+def schedule_waves(a_idx: np.ndarray, b_idx: np.ndarray, players: int) -> np.ndarray:
+    last = [0] * players
+    waves = []
+    for a, b in zip(a_idx.tolist(), b_idx.tolist()):
+        wave = last[a] if last[a] > last[b] else last[b]
+        waves.append(wave)
+        last[a] = last[b] = wave + 1
+    return np.array(waves, dtype=np.int64)
+
+
+def rate(player_a: np.ndarray, player_b: np.ndarray, a_won: np.ndarray,
+         ratings: Dict[int, float], k: float = DEFAULT_K) -> RatingDelta:
+    user_ids, inverse = np.unique(np.concatenate([player_a, player_b]), return_inverse=True)
+    a_idx = inverse[:len(player_a)]
+    b_idx = inverse[len(player_a):]
+
+    current = np.array([ratings.get(int(user_id), DEFAULT_RATING) for user_id in user_ids], dtype=np.float64)
+    score_a = a_won.astype(np.float64)
+
+    waves = schedule_waves(a_idx, b_idx, len(user_ids))
+    order = np.argsort(waves, kind='stable')
+    boundaries = np.flatnonzero(np.diff(waves[order])) + 1
+
+    for wave in np.split(order, boundaries):
+        a, b = a_idx[wave], b_idx[wave]
+        expected_a = 1.0 / (1.0 + np.power(10.0, (current[b] - current[a]) / 400.0))
+        change = k * (score_a[wave] - expected_a)
+        current[a] += change
+        current[b] -= change
+
+    wins = np.bincount(np.where(a_won, a_idx, b_idx), minlength=len(user_ids))
+    losses = np.bincount(np.where(a_won, b_idx, a_idx), minlength=len(user_ids))
+    return RatingDelta(user_ids, current, wins, losses)
@@ -0,0 +1,149 @@
+'''
+Business: Batched Elo recalculation of users.rating, wins and losses from reported match results
+Args: event - dict with httpMethod, headers (X-Cron-Secret), queryStringParameters (mode: incremental or replay, batch_size)
+      context - object with attributes: request_id, function_name
+Returns: HTTP response dict with recalculation summary
+'''
+
+import json
+import os
+from typing import Dict, Any
+
+import numpy as np
+
+from cron import HEADER, rejected
+from db import connection, execute_values
+from timing import instrumented
+import elo
+
+BATCH_SIZE = int(os.environ.get('RATING_BATCH_SIZE', '50000'))
+K_FACTOR = float(os.environ.get('RATING_K', str(elo.DEFAULT_K)))
+SETTLE_SECONDS = float(os.environ.get('RATING_SETTLE_SECONDS', '10'))
+
+@instrumented
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'GET')
+
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': f'Content-Type, X-User-Id, {HEADER}',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': ''
+        }
+
+    denied = rejected(event)
+    if denied is not None:
+        return denied
+
+    params = event.get('queryStringParameters', {}) or {}
+    mode = params.get('mode', 'incremental')
+    try:
+        batch_size = max(1, int(params.get('batch_size', BATCH_SIZE)))
+    except ValueError:
+        batch_size = 0
+    if mode not in ('incremental', 'replay') or not batch_size:
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': 'mode must be incremental or replay, batch_size a positive integer'})
+        }
+
+    summary = recalculate(mode == 'replay', batch_size)
+
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(summary)
+    }
+
+def recalculate(replay: bool, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    matches = 0
+    batches = 0
+    ratings: Dict[int, float] = {}
+
+    with connection() as conn:
+        cur = conn.cursor()
+        watermark = _lock_watermark(cur)
+        if replay:
+            watermark = 0
+            cur.execute('''
+                UPDATE users SET rating = %s, rating_exact = NULL, wins = 0, losses = 0
+                WHERE rating <> %s OR rating_exact IS NOT NULL OR wins <> 0 OR losses <> 0
+            ''', (int(elo.DEFAULT_RATING), int(elo.DEFAULT_RATING)))
+
+        while True:
+            cur.execute('''
+                SELECT result_seq, player_a, player_b, winner
+                FROM (
+                    SELECT result_seq, player_a, player_b, winner, completed_at FROM tournament_matches
+                    UNION ALL
+                    SELECT result_seq, player_a, player_b, winner, completed_at FROM match_results_archive
+                ) results
+                WHERE result_seq > %s
+                  AND player_a > 0 AND player_b > 0 AND winner > 0
+                  AND completed_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+                ORDER BY result_seq
+                LIMIT %s
+            ''', (watermark, SETTLE_SECONDS, batch_size))
+            rows = cur.fetchall()
+            if not rows:
+                break
+
+            results = np.array(rows, dtype=np.int64)
+            player_a, player_b, winner = results[:, 1], results[:, 2], results[:, 3]
+            if not replay:
+                ratings = _load_ratings(cur, np.union1d(player_a, player_b))
+
+            delta = elo.rate(player_a, player_b, winner == player_a, ratings, K_FACTOR)
+            ratings.update(zip(delta.user_ids.tolist(), delta.ratings.tolist()))
+            _write_batch(cur, delta)
+
+            watermark = int(results[-1, 0])
+            cur.execute('UPDATE rating_state SET watermark = %s, updated_at = CURRENT_TIMESTAMP WHERE id = 1',
+                        (watermark,))
+            matches += len(rows)
+            batches += 1
+
+            if not replay:
+                conn.commit()
+                watermark = _lock_watermark(cur)
+
+        conn.commit()
+        cur.close()
+
+    return {'mode': 'replay' if replay else 'incremental', 'matches': matches, 'batches': batches, 'watermark': watermark}
+
+def _lock_watermark(cur: Any) -> int:
+    cur.execute('SELECT watermark FROM rating_state WHERE id = 1 FOR UPDATE')
+    return cur.fetchone()[0]
+
+def _load_ratings(cur: Any, user_ids: np.ndarray) -> Dict[int, float]:
+    cur.execute('SELECT id, COALESCE(rating_exact, rating) FROM users WHERE id = ANY(%s)', (user_ids.tolist(),))
+    return {user_id: float(rating) for user_id, rating in cur.fetchall() if rating is not None}
+
+def _write_batch(cur: Any, delta: elo.RatingDelta) -> None:
+    rows = list(zip(
+        delta.user_ids.tolist(),
+        np.rint(delta.ratings).astype(np.int64).tolist(),
+        delta.ratings.tolist(),
+        delta.wins.tolist(),
+        delta.losses.tolist()
+    ))
+    execute_values(cur, '''
+        UPDATE users u
+        SET rating = v.rating, rating_exact = v.rating_exact,
+            wins = COALESCE(u.wins, 0) + v.wins, losses = COALESCE(u.losses, 0) + v.losses
+        FROM (VALUES %s) AS v(id, rating, rating_exact, wins, losses)
+        WHERE u.id = v.id
+    ''', rows, page_size=len(rows))
@@ -5,128 +5,353 @@ Args: event - dict with httpMethod, body, queryStringParameters
 Returns: HTTP response dict with reports data
 '''
 
+from typing import Dict, Any, List, Tuple
+from datetime import datetime
+import base64
 import json
 import os
-import psycopg2
-from typing import Dict, Any
 
+from core import HttpError, Request, Router, RowSerializer, iso, json_response
+from db import execute_values
+from ratelimit import Limiter
+from timing import instrumented
+import session
+
+MAX_BATCH_SIZE = 500
+MAX_CLAIM_SIZE = 100
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+MAX_ID = 2 ** 31 - 1
+CLAIM_TIMEOUT_MINUTES = 15
+RESOLVED_STATUSES = ('resolved', 'rejected')
+COALESCE_WINDOW_MINUTES = int(os.environ.get('REPORT_COALESCE_WINDOW_MINUTES', '60'))
+
+REPORT_ROW = RowSerializer(
+    ('id', 0, None),
+    ('reported_player', 1, None),
+    ('type', 2, None),
+    ('description', 3, None),
+    ('status', 4, None),
+    ('created_at', 5, iso),
+    ('count', 6, None)
+)
+CLAIMED_ROW = RowSerializer(*REPORT_ROW.fields[:6])
+
+router = Router('GET, POST, OPTIONS', limiter=Limiter('reports'))
+
+@instrumented
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    method: str = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
-    
-    database_url = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(database_url)
+    return router.dispatch(event, context)
+
+@router.route('POST')
+def submit_reports(request: Request) -> Dict[str, Any]:
+    body_data = request.body
+    if isinstance(body_data.get('reports'), list):
+        return _insert_batch(body_data, request)
+    
+    user_id = request.user_id()
+    reported_player = body_data.get('reported_player', '').strip()
+    report_type = body_data.get('report_type', '').strip()
+    description = body_data.get('description', '').strip()
+    
+    if not all([user_id, reported_player, report_type, description]):
+        raise HttpError(400, 'All fields are required')
+    
+    conn = request.conn
     cur = conn.cursor()
+    report_id, coalesced = _ingest(cur, [(user_id, reported_player, report_type, description)])[0]
+    conn.commit()
+    cur.close()
     
-    if method == 'POST':
-        body_data = json.loads(event.get('body', '{}'))
-        
-        user_id = body_data.get('user_id')
-        reported_player = body_data.get('reported_player', '').strip()
-        report_type = body_data.get('report_type', '').strip()
-        description = body_data.get('description', '').strip()
-        
-        if not all([user_id, reported_player, report_type, description]):
-            cur.close()
-            conn.close()
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'All fields are required'})
-            }
-        
-        cur.execute('''
-            INSERT INTO player_reports 
-            (reporter_user_id, reported_player_name, report_type, description)
-            VALUES (%s, %s, %s, %s)
-            RETURNING id, created_at
-        ''', (user_id, reported_player, report_type, description))
-        
+    return json_response(201, {
+        'success': True,
+        'report_id': report_id,
+        'coalesced': coalesced,
+        'message': 'Report submitted successfully'
+    })
+
+@router.route('GET')
+def list_reports(request: Request) -> Dict[str, Any]:
+    params = request.query
+    user_id = params.get('user_id')
+    
+    cur = request.conn.cursor()
+    if params.get('player'):
+        response = _player_stats(params['player'], cur)
+        cur.close()
+        return response
+    
+    if user_id:
+        response = _history(user_id, params, cur)
+        cur.close()
+        return response
+    
+    cur.execute('''
+        SELECT id, reported_player_name, report_type, description, status, created_at, report_count
+        FROM player_reports
+        ORDER BY created_at DESC
+        LIMIT 50
+    ''')
+    
+    reports = REPORT_ROW.many(cur.fetchall())
+    cur.close()
+    
+    return json_response(200, {'reports': reports})
+
+@router.route('POST', 'claim')
+@router.route('POST', 'resolve')
+def moderate(request: Request) -> Dict[str, Any]:
+    moderator_id = request.user_id('moderator_id')
+    if not moderator_id:
+        raise HttpError(400, 'moderator_id is required')
+    try:
+        moderator_id = int(moderator_id)
+    except (TypeError, ValueError):
+        raise HttpError(400, 'moderator_id must be an integer')
+    if not 0 < moderator_id <= MAX_ID:
+        raise HttpError(400, 'moderator_id must be an integer')
+    
+    cur = request.conn.cursor()
+    try:
+        cur.execute('SELECT is_moderator FROM users WHERE id = %s', (moderator_id,))
         row = cur.fetchone()
-        conn.commit()
-        
+        if row is None or not row[0]:
+            raise HttpError(403, 'Moderator role required')
+        return _moderate(request.action, moderator_id, request.body, request.conn, cur)
+    finally:
         cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 201,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': True,
-                'report_id': row[0],
-                'message': 'Report submitted successfully'
-            })
-        }
-    
-    if method == 'GET':
-        params = event.get('queryStringParameters', {}) or {}
-        user_id = params.get('user_id')
-        
-        if user_id:
-            cur.execute('''
-                SELECT id, reported_player_name, report_type, description, status, created_at
-                FROM player_reports
-                WHERE reporter_user_id = %s
-                ORDER BY created_at DESC
-            ''', (user_id,))
+
+def _insert_batch(body_data: Dict[str, Any], request: Request) -> Dict[str, Any]:
+    reports = body_data['reports']
+    if not reports or len(reports) > MAX_BATCH_SIZE:
+        raise HttpError(400, f'reports must contain 1 to {MAX_BATCH_SIZE} items')
+    
+    user_id = request.user_id()
+    rows = []
+    for index, report in enumerate(reports):
+        if not isinstance(report, dict):
+            raise HttpError(400, f'Report {index} must be an object')
+        row = (
+            user_id if session.enabled() else report.get('user_id') or user_id,
+            str(report.get('reported_player', '')).strip(),
+            str(report.get('report_type', '')).strip(),
+            str(report.get('description', '')).strip()
+        )
+        if not all(row):
+            raise HttpError(400, f'All fields are required (report {index})')
+        rows.append(row)
+    
+    conn = request.conn
+    cur = conn.cursor()
+    ingested = _ingest(cur, rows)
+    conn.commit()
+    cur.close()
+    
+    return json_response(201, {
+        'success': True,
+        'report_ids': [report_id for report_id, _ in ingested],
+        'accepted': len(rows),
+        'message': f'{len(rows)} reports submitted successfully'
+    })
+
+def _ingest(cur: Any, rows: List[Tuple[Any, str, str, str]]) -> List[Tuple[int, bool]]:
+    groups: Dict[Tuple[str, str, str], List] = {}
+    row_keys = []
+    for user_id, reported_player, report_type, description in rows:
+        key = (normalize_player(reported_player), report_type.lower(), str(user_id))
+        row_keys.append(key)
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [user_id, reported_player, report_type, description, 1]
         else:
-            cur.execute('''
-                SELECT id, reported_player_name, report_type, description, status, created_at
-                FROM player_reports
-                ORDER BY created_at DESC
-                LIMIT 50
-            ''')
-        
-        rows = cur.fetchall()
-        reports = []
-        
-        for row in rows:
-            reports.append({
-                'id': row[0],
-                'reported_player': row[1],
-                'type': row[2],
-                'description': row[3],
-                'status': row[4],
-                'created_at': row[5].isoformat()
-            })
+            group[4] += 1
+    
+    keys = sorted(groups)
+    ingested = execute_values(cur, '''
+        INSERT INTO player_reports AS r
+        (reporter_user_id, reported_player_name, normalized_player, report_type, description,
+         report_count, window_start, last_reported_at)
+        VALUES %s
+        ON CONFLICT (normalized_player, report_type, reporter_user_id, window_start)
+            WHERE status = 'pending' AND window_start IS NOT NULL
+        DO UPDATE SET
+            report_count = r.report_count + EXCLUDED.report_count,
+            last_reported_at = EXCLUDED.last_reported_at
+        RETURNING id, (xmax <> 0) AS coalesced
+    ''', [
+        (groups[key][0], groups[key][1], key[0], key[1], groups[key][3], groups[key][4], COALESCE_WINDOW_MINUTES)
+        for key in keys
+    ], template='''(%s, %s, %s, %s, %s, %s,
+        date_bin(make_interval(mins => %s), CURRENT_TIMESTAMP::timestamp, TIMESTAMP '2000-01-01'),
+        CURRENT_TIMESTAMP)''', page_size=len(keys), fetch=True)
+    
+    players: Dict[str, List] = {}
+    for key in keys:
+        normalized, report_type, _ = key
+        player = players.setdefault(normalized, [groups[key][1], 0, {}])
+        player[1] += groups[key][4]
+        player[2][report_type] = player[2].get(report_type, 0) + groups[key][4]
+    
+    execute_values(cur, '''
+        INSERT INTO player_report_stats AS s
+        (normalized_player, display_name, total_reports, counts, first_reported_at, last_reported_at)
+        VALUES %s
+        ON CONFLICT (normalized_player) DO UPDATE SET
+            display_name = EXCLUDED.display_name,
+            total_reports = s.total_reports + EXCLUDED.total_reports,
+            counts = (
+                SELECT jsonb_object_agg(key, total)
+                FROM (
+                    SELECT key, SUM(value::integer) AS total
+                    FROM (
+                        SELECT * FROM jsonb_each_text(s.counts)
+                        UNION ALL
+                        SELECT * FROM jsonb_each_text(EXCLUDED.counts)
+                    ) merged
+                    GROUP BY key
+                ) totals
+            ),
+            last_reported_at = EXCLUDED.last_reported_at
+    ''', [
+        (normalized, display_name, total, json.dumps(counts))
+        for normalized, (display_name, total, counts) in sorted(players.items())
+    ], template='(%s, %s, %s, %s::jsonb, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)', page_size=len(players))
+    
+    inserted = dict(zip(keys, ingested))
+    seen = set()
+    result = []
+    for key in row_keys:
+        report_id, coalesced = inserted[key]
+        result.append((report_id, coalesced or key in seen))
+        seen.add(key)
+    return result
+
+def _history(user_id: str, params: Dict[str, str], cur: Any) -> Dict[str, Any]:
+    try:
+        user_id = int(user_id)
+        limit = min(max(int(params.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        cursor = _decode_cursor(params['cursor']) if params.get('cursor') else None
+    except ValueError:
+        raise HttpError(400, 'Invalid user_id, limit or cursor')
+    if not 0 < user_id <= MAX_ID:
+        raise HttpError(400, 'Invalid user_id, limit or cursor')
+    
+    keyset = 'AND (created_at, id) < (%s, %s)' if cursor else ''
+    args = (user_id, *(cursor or ()), limit + 1)
+    cur.execute(f'''
+        (SELECT id, reported_player_name, report_type, description, status, created_at, report_count
+         FROM player_reports
+         WHERE reporter_user_id = %s {keyset}
+         ORDER BY created_at DESC, id DESC
+         LIMIT %s)
+        UNION ALL
+        (SELECT id, reported_player_name, report_type, description, status, created_at, report_count
+         FROM player_reports_archive
+         WHERE reporter_user_id = %s {keyset}
+         ORDER BY created_at DESC, id DESC
+         LIMIT %s)
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+    ''', (*args, *args, limit + 1))
+    rows = cur.fetchall()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][5], rows[-1][0])
+    
+    return json_response(200, {'reports': REPORT_ROW.many(rows), 'next_cursor': next_cursor})
+
+def _encode_cursor(created_at: datetime, report_id: int) -> str:
+    raw = f'{created_at.isoformat()}|{report_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, report_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(report_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError('Invalid cursor') from exc
+
+def _player_stats(player: str, cur: Any) -> Dict[str, Any]:
+    cur.execute('''
+        SELECT display_name, total_reports, counts, first_reported_at, last_reported_at
+        FROM player_report_stats
+        WHERE normalized_player = %s
+    ''', (normalize_player(player),))
+    row = cur.fetchone()
+    
+    if row is None:
+        return json_response(200, {'player': player, 'total': 0, 'by_type': {}})
+    
+    return json_response(200, {
+        'player': row[0],
+        'total': row[1],
+        'by_type': row[2],
+        'first_reported_at': row[3].isoformat(),
+        'last_reported_at': row[4].isoformat()
+    })
+
+def normalize_player(name: str) -> str:
+    return ' '.join(name.split()).lower()
+
+def _moderate(action: str, moderator_id: Any, body_data: Dict[str, Any], conn: Any, cur: Any) -> Dict[str, Any]:
+    if action == 'claim':
+        try:
+            limit = min(max(int(body_data.get('limit', 20)), 1), MAX_CLAIM_SIZE)
+        except (TypeError, ValueError):
+            raise HttpError(400, 'limit must be an integer')
         
-        cur.close()
-        conn.close()
+        cur.execute('''
+            WITH pending AS (
+                SELECT id, created_at FROM player_reports
+                WHERE status = 'pending'
+                ORDER BY created_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ), stale AS (
+                SELECT id, created_at FROM player_reports
+                WHERE status = 'in_review' AND claimed_at < CURRENT_TIMESTAMP - make_interval(mins => %s)
+                ORDER BY created_at
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE player_reports r
+            SET status = 'in_review', claimed_by = %s, claimed_at = CURRENT_TIMESTAMP
+            WHERE r.id IN (
+                SELECT id FROM (
+                    SELECT id, created_at FROM pending
+                    UNION ALL
+                    SELECT id, created_at FROM stale
+                ) candidates
+                ORDER BY created_at
+                LIMIT %s
+            )
+            RETURNING r.id, r.reported_player_name, r.report_type, r.description, r.status, r.created_at
+        ''', (limit, CLAIM_TIMEOUT_MINUTES, limit, moderator_id, limit))
+        rows = sorted(cur.fetchall(), key=lambda row: row[5])
+        conn.commit()
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'reports': reports})
-        }
+        return json_response(200, {
+            'reports': CLAIMED_ROW.many(rows)
+        })
     
-    cur.close()
-    conn.close()
-    
-    return {
-        'statusCode': 405,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({'error': 'Method not allowed'})
-    }
+    report_ids = body_data.get('report_ids')
+    status = body_data.get('status', 'resolved')
+    if not report_ids or status not in RESOLVED_STATUSES:
+        raise HttpError(400, f"report_ids and status ({', '.join(RESOLVED_STATUSES)}) are required")
+    if (not isinstance(report_ids, list) or len(report_ids) > MAX_CLAIM_SIZE
+            or not all(type(report_id) is int and 0 < report_id <= MAX_ID for report_id in report_ids)):
+        raise HttpError(400, f'report_ids must be a list of up to {MAX_CLAIM_SIZE} integers')
+    
+    cur.execute('''
+        UPDATE player_reports
+        SET status = %s
+        WHERE id = ANY(%s) AND status = 'in_review' AND claimed_by = %s
+        RETURNING id
+    ''', (status, report_ids, moderator_id))
+    resolved = [row[0] for row in cur.fetchall()]
+    conn.commit()
+    
+    return json_response(200, {'success': True, 'resolved': resolved})
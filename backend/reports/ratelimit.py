@@ -0,0 +1,126 @@
+'''
+Business: Per-client token-bucket limiting of write requests, checked before the request opens a DB connection
+Args: RATE_LIMIT_RATE - tokens refilled per second (0 disables limiting), RATE_LIMIT_BURST - bucket size,
+      RATE_LIMIT_LEASE - tokens an instance takes from the shared bucket at once,
+      RATE_LIMIT_STORE - postgres (shared across instances, the default; one DB round trip per lease, falling back
+      to memory when the DB is unavailable) or memory (per instance only), clients are keyed by session user or the
+      platform's requestContext.identity.sourceIp; requests with neither are not limited
+Returns: Limiter(scope) passed to Router(limiter=...); raises HttpError 429 with Retry-After when a client is over its budget
+'''
+
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from core import HttpError
+from db import connection, execute, statement
+import session
+
+TAKE_TOKENS = statement('take_rate_tokens', 'SELECT granted, retry_after FROM take_rate_tokens(%s, %s, %s, %s)')
+PRUNE_BUCKETS = statement('prune_rate_buckets', '''
+    DELETE FROM rate_limit_buckets WHERE refilled_at < LOCALTIMESTAMP - make_interval(secs => %s)
+''')
+PRUNE_PROBABILITY = 0.01
+
+
+class MemoryStore:
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, bucket: str, want: int, rate: float, burst: float) -> Tuple[int, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, refilled_at = self._buckets.get(bucket, (burst, now))
+            tokens = min(burst, tokens + (now - refilled_at) * rate)
+            granted = min(want, int(tokens))
+            self._buckets[bucket] = (tokens - granted, now)
+        return granted, 0.0 if granted else (1 - (tokens - granted)) / rate
+
+
+class PostgresStore:
+    def take(self, bucket: str, want: int, rate: float, burst: float) -> Tuple[int, float]:
+        with connection() as conn:
+            cur = conn.cursor()
+            execute(cur, TAKE_TOKENS, (bucket, want, rate, burst))
+            granted, retry_after = cur.fetchone()
+            if random.random() < PRUNE_PROBABILITY:
+                execute(cur, PRUNE_BUCKETS, (burst / rate,))
+            conn.commit()
+            cur.close()
+        return granted, retry_after
+
+
+class Limiter:
+    def __init__(self, scope: str, rate: Optional[float] = None, burst: Optional[float] = None,
+                 lease: Optional[int] = None, store: Any = None, max_clients: int = 10000):
+        self.scope = scope
+        self.rate = rate if rate is not None else float(os.environ.get('RATE_LIMIT_RATE', '2'))
+        self.burst = burst if burst is not None else float(os.environ.get('RATE_LIMIT_BURST', '30'))
+        self.lease = lease or int(os.environ.get('RATE_LIMIT_LEASE', '5'))
+        if store is None:
+            store = MemoryStore() if os.environ.get('RATE_LIMIT_STORE', 'postgres') == 'memory' else PostgresStore()
+        self.store = store
+        self.max_clients = max_clients
+        self._local: 'OrderedDict[str, list]' = OrderedDict()
+        self._fallback = MemoryStore()
+        self._lock = threading.Lock()
+
+    def check(self, request: Any) -> None:
+        key = client_key(request) if self.rate > 0 else None
+        if key is None:
+            return
+        retry_after = self.acquire(f'{self.scope}:{key}')
+        if retry_after > 0:
+            raise HttpError(429, 'Too many requests', {'Retry-After': str(max(1, math.ceil(retry_after)))})
+
+    def acquire(self, bucket: str) -> float:
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                local = self._local.get(bucket)
+                if local is None:
+                    local = self._local[bucket] = [0, 0.0, None]
+                    while len(self._local) > self.max_clients:
+                        self._local.popitem(last=False)
+                self._local.move_to_end(bucket)
+                tokens, blocked_until, leasing = local
+                if blocked_until > now:
+                    return blocked_until - now
+                if tokens > 0:
+                    local[0] = tokens - 1
+                    return 0.0
+                if leasing is None:
+                    leasing = local[2] = threading.Event()
+                    break
+            leasing.wait()
+
+        granted, retry_after = 0, 1 / self.rate
+        try:
+            granted, retry_after = self.store.take(bucket, self.lease, self.rate, self.burst)
+        except Exception:
+            granted, retry_after = self._fallback.take(bucket, self.lease, self.rate, self.burst)
+        finally:
+            with self._lock:
+                local[2] = None
+                if granted:
+                    local[0] += granted - 1
+                else:
+                    local[1] = now + retry_after
+            leasing.set()
+        return 0.0 if granted else retry_after
+
+
+def client_key(request: Any) -> Optional[str]:
+    if session.enabled():
+        scheme, _, token = (request.header('Authorization') or '').partition(' ')
+        user_id = session.verify(token.strip()) if scheme.lower() == 'bearer' else None
+        if user_id is not None:
+            return f'user:{user_id}'
+    identity = (request.event.get('requestContext') or {}).get('identity') or {}
+    source_ip = identity.get('sourceIp')
+    return f'ip:{source_ip}' if source_ip else None
@@ -0,0 +1,251 @@
+'''
+Business: Per-request phase timing (connect, SQL by statement name, external HTTP, serialize) with structured log lines,
+          in-process latency histograms and a Server-Timing response header; cold-start requests are tagged
+Args: PERF_TIMING - 1 enables instrumentation (off by default; the hooks then cost one attribute check),
+      PERF_LOG - 0 keeps timing and headers but silences the per-request log line,
+      PERF_SNAPSHOT_EVERY - requests between histogram snapshot log lines (0 disables)
+Returns: instrumented(handler) decorator, phase(name) timer, bind(fn) for worker threads, cold_start() to tag the
+         current request, snapshot() of the histograms plus counters added with snapshot_source(name, fn)
+'''
+
+import bisect
+import contextvars
+import functools
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+ENABLED = os.environ.get('PERF_TIMING', '0') == '1'
+LOG_REQUESTS = os.environ.get('PERF_LOG', '1') != '0'
+SNAPSHOT_EVERY = int(os.environ.get('PERF_SNAPSHOT_EVERY', '100'))
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+MAX_NAMED_SQL = 1024
+SQL_TARGET = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+(\w+)', re.IGNORECASE)
+
+_current: 'contextvars.ContextVar[Optional[Trace]]' = contextvars.ContextVar('perf_trace', default=None)
+_named_sql: Dict[str, str] = {}
+_snapshot_sources: Dict[str, Callable[[], Any]] = {}
+
+
+class Trace:
+    __slots__ = ('request_id', 'function_name', 'started', 'phases', 'cold', '_lock')
+
+    def __init__(self, context: Any):
+        self.request_id = getattr(context, 'request_id', None)
+        self.function_name = getattr(context, 'function_name', None)
+        self.started = time.perf_counter()
+        self.phases: Dict[str, List[float]] = {}
+        self.cold = False
+        self._lock = threading.Lock()
+
+    def add(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            entry = self.phases.get(name)
+            if entry is None:
+                self.phases[name] = [elapsed_ms, 1]
+            else:
+                entry[0] += elapsed_ms
+                entry[1] += 1
+
+    def server_timing(self, total_ms: float) -> str:
+        metrics = [f'{name};dur={total:.2f}' if count == 1 else f'{name};dur={total:.2f};desc="{count}x"'
+                   for name, (total, count) in self.phases.items()]
+        metrics.append(f'total;dur={total_ms:.2f}')
+        if self.cold:
+            metrics.append('cold')
+        return ', '.join(metrics)
+
+
+class Phase:
+    __slots__ = ('trace', 'name', 'started')
+
+    def __init__(self, trace: Trace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self) -> 'Phase':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.trace.add(self.name, (time.perf_counter() - self.started) * 1000)
+
+
+class NullPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> 'NullPhase':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+class Histograms:
+    def __init__(self, bounds: tuple = BUCKETS_MS):
+        self.bounds = bounds
+        self.requests = 0
+        self._series: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, phases: Dict[str, List[float]], total_ms: float, cold: bool = False) -> int:
+        with self._lock:
+            self.requests += 1
+            for name, (elapsed_ms, _) in phases.items():
+                self._observe(name, elapsed_ms)
+            self._observe('total.cold' if cold else 'total', total_ms)
+            return self.requests
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            series = {name: (counts[:], total) for name, (counts, total) in self._series.items()}
+            requests = self.requests
+        return {
+            'requests': requests,
+            'bounds_ms': list(self.bounds),
+            'phases': {
+                name: {
+                    'count': sum(counts),
+                    'sum_ms': round(total, 3),
+                    'p50_ms': self._quantile(counts, 0.5),
+                    'p95_ms': self._quantile(counts, 0.95),
+                    'p99_ms': self._quantile(counts, 0.99),
+                    'buckets': counts
+                }
+                for name, (counts, total) in sorted(series.items())
+            }
+        }
+
+    def _observe(self, name: str, elapsed_ms: float) -> None:
+        series = self._series.get(name)
+        if series is None:
+            series = self._series[name] = [[0] * (len(self.bounds) + 1), 0.0]
+        series[0][bisect.bisect_left(self.bounds, elapsed_ms)] += 1
+        series[1] += elapsed_ms
+
+    def _quantile(self, counts: List[int], q: float) -> Optional[float]:
+        total = sum(counts)
+        if not total:
+            return None
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= q * total:
+                return self.bounds[index] if index < len(self.bounds) else None
+        return None
+
+
+histograms = Histograms()
+_NULL_PHASE = NullPhase()
+
+
+def phase(name: str) -> Any:
+    trace = _current.get() if ENABLED else None
+    return _NULL_PHASE if trace is None else Phase(trace, name)
+
+
+def sql_phase(query: Any) -> Any:
+    trace = _current.get()
+    if trace is None:
+        return _NULL_PHASE
+    return Phase(trace, statement_name(query))
+
+
+def name_sql(sql: str, name: str) -> None:
+    _named_sql[sql] = 'sql.' + name
+
+
+def statement_name(query: Any) -> str:
+    named = _named_sql.get(query) if isinstance(query, str) else None
+    if named is not None:
+        return named
+    text = query.decode(errors='replace') if isinstance(query, bytes) else str(query)
+    head = text.lstrip()[:400]
+    verb, _, rest = head.partition(' ')
+    verb = verb.upper()
+    if verb in ('EXECUTE', 'PREPARE'):
+        return ('sql.' if verb == 'EXECUTE' else 'sql.prepare.') + re.split(r'[\s(]', rest.strip(), 1)[0]
+    match = SQL_TARGET.search(head)
+    named = f'sql.{verb.lower()}_{match.group(1).lower()}' if match else f'sql.{verb.lower() or "query"}'
+    if isinstance(query, str) and len(_named_sql) < MAX_NAMED_SQL:
+        _named_sql[query] = named
+    return named
+
+
+def bind(fn: Callable[..., Any]) -> Callable[..., Any]:
+    if not ENABLED:
+        return fn
+    trace = _current.get()
+
+    def run(*args: Any, **kwargs: Any) -> Any:
+        token = _current.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+def cold_start() -> None:
+    trace = _current.get() if ENABLED else None
+    if trace is not None:
+        trace.cold = True
+
+
+def snapshot_source(name: str, fn: Callable[[], Any]) -> None:
+    _snapshot_sources[name] = fn
+
+
+def snapshot() -> Dict[str, Any]:
+    return {**histograms.snapshot(), **{name: fn() for name, fn in _snapshot_sources.items()}}
+
+
+def instrumented(handler: Callable[[Dict[str, Any], Any], Dict[str, Any]]) -> Callable:
+    if not ENABLED:
+        return handler
+
+    @functools.wraps(handler)
+    def wrapper(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        trace = Trace(context)
+        token = _current.set(trace)
+        status = 500
+        try:
+            response = handler(event, context)
+            status = response.get('statusCode', 200)
+        finally:
+            _current.reset(token)
+            total_ms = (time.perf_counter() - trace.started) * 1000
+            _finish(trace, event, status, total_ms)
+        response = dict(response)
+        response['headers'] = {
+            **(response.get('headers') or {}),
+            'Server-Timing': trace.server_timing(total_ms),
+            'Timing-Allow-Origin': '*'
+        }
+        return response
+
+    return wrapper
+
+
+def _finish(trace: Trace, event: Dict[str, Any], status: int, total_ms: float) -> None:
+    requests = histograms.record(trace.phases, total_ms, trace.cold)
+    if LOG_REQUESTS:
+        _log({
+            'type': 'perf_request',
+            'function': trace.function_name,
+            'request_id': trace.request_id,
+            'method': event.get('httpMethod'),
+            'status': status,
+            'cold': trace.cold,
+            'total_ms': round(total_ms, 3),
+            'phases': {name: {'ms': round(total, 3), 'count': count} for name, (total, count) in trace.phases.items()}
+        })
+    if SNAPSHOT_EVERY and requests % SNAPSHOT_EVERY == 0:
+        _log({'type': 'perf_histogram', 'function': trace.function_name, **snapshot()})
+
+
+def _log(record: Dict[str, Any]) -> None:
+    print(json.dumps(record, separators=(',', ':')), flush=True)
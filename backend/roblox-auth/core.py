@@ -0,0 +1,230 @@
+'''
+Business: Shared request/response core for backend functions: routing, CORS, JSON and row serialization
+Args: Router(methods, limiter) - allowed CORS methods and optional write limiter; routes registered per (HTTP method, action)
+Returns: Router.dispatch(event, context) producing platform HTTP response dicts
+'''
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from db import connection
+import session
+import timing
+
+try:
+    import orjson
+
+    def dumps(payload: Any) -> str:
+        return orjson.dumps(payload, default=_default).decode()
+
+    loads = orjson.loads
+except ImportError:
+    def dumps(payload: Any) -> str:
+        return json.dumps(payload, default=_default, separators=(',', ':'))
+
+    loads = json.loads
+
+JSON_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+ALLOW_HEADERS = 'Content-Type, Authorization, X-User-Id, If-None-Match'
+
+
+class WarmState:
+    __slots__ = ('booted_at', 'invocations', '_values', '_lock')
+
+    def __init__(self):
+        self.booted_at = time.monotonic()
+        self.invocations = 0
+        self._values: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cold(self) -> bool:
+        return self.invocations <= 1
+
+    def get(self, name: Any, build: Callable[[], Any]) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = build()
+            return self._values[name]
+
+    def setting(self, name: str, default: str, cast: Callable[[str], Any] = str) -> Any:
+        return self.get(('env', name), lambda: cast(os.environ.get(name, default)))
+
+
+class HttpError(Exception):
+    def __init__(self, status_code: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.headers = headers
+
+
+class Request:
+    __slots__ = ('event', 'context', 'method', 'query', '_body', '_conn', '_conn_cm')
+
+    def __init__(self, event: Dict[str, Any], context: Any):
+        self.event = event
+        self.context = context
+        self.method = event.get('httpMethod', 'GET')
+        self.query = event.get('queryStringParameters') or {}
+        self._body = None
+        self._conn = None
+        self._conn_cm = None
+
+    @property
+    def body(self) -> Dict[str, Any]:
+        if self._body is None:
+            raw = self.event.get('body') or '{}'
+            try:
+                body = loads(raw)
+            except ValueError:
+                raise HttpError(400, 'Invalid JSON body')
+            if not isinstance(body, dict):
+                raise HttpError(400, 'JSON body must be an object')
+            self._body = body
+        return self._body
+
+    @property
+    def action(self) -> Optional[str]:
+        if self.method == 'GET':
+            return self.query.get('action')
+        return self.body.get('action') or self.query.get('action')
+
+    @property
+    def conn(self) -> Any:
+        if self._conn is None:
+            self._conn_cm = connection()
+            self._conn = self._conn_cm.__enter__()
+        return self._conn
+
+    def user_id(self, field: str = 'user_id') -> Any:
+        claimed = self.body.get(field)
+        if not session.enabled():
+            return claimed
+        authorization = self.header('Authorization') or ''
+        scheme, _, token = authorization.partition(' ')
+        user_id = session.verify(token.strip()) if scheme.lower() == 'bearer' else None
+        if user_id is None:
+            raise HttpError(401, 'Valid session token required')
+        if claimed is not None and str(claimed) != str(user_id):
+            raise HttpError(403, f'{field} does not match the session')
+        return user_id
+
+    def header(self, name: str) -> Optional[str]:
+        headers = self.event.get('headers') or {}
+        value = headers.get(name)
+        if value is not None:
+            return value
+        lowered = name.lower()
+        for key, value in headers.items():
+            if key.lower() == lowered:
+                return value
+        return None
+
+    def release(self, exc_info: Tuple = (None, None, None)) -> None:
+        if self._conn_cm is not None:
+            cm, self._conn_cm, self._conn = self._conn_cm, None, None
+            cm.__exit__(*exc_info)
+
+
+class Router:
+    def __init__(self, methods: str = 'GET, POST, OPTIONS', limiter: Any = None):
+        self._limiter = limiter
+        self._routes: Dict[Tuple[str, Optional[str]], Callable[[Request], Dict[str, Any]]] = {}
+        self._actions: Dict[str, bool] = {}
+        self._preflight = {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': methods,
+                'Access-Control-Allow-Headers': ALLOW_HEADERS,
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': ''
+        }
+
+    def route(self, method: str, action: Optional[str] = None) -> Callable:
+        def register(fn: Callable[[Request], Dict[str, Any]]) -> Callable[[Request], Dict[str, Any]]:
+            self._routes[(method, action)] = fn
+            self._actions[method] = self._actions.get(method, False) or action is not None
+            return fn
+        return register
+
+    def dispatch(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        warm.invocations += 1
+        if warm.cold:
+            timing.cold_start()
+        method = event.get('httpMethod', 'GET')
+        if method == 'OPTIONS':
+            return self._preflight
+        has_actions = self._actions.get(method)
+        if has_actions is None:
+            return METHOD_NOT_ALLOWED
+
+        request = Request(event, context)
+        try:
+            fn = (has_actions and self._routes.get((method, request.action))) or self._routes.get((method, None))
+            if fn is None:
+                return METHOD_NOT_ALLOWED
+            if self._limiter is not None and method != 'GET':
+                self._limiter.check(request)
+            response = fn(request)
+        except HttpError as exc:
+            request.release()
+            return json_response(exc.status_code, {'error': exc.message}, exc.headers)
+        except BaseException:
+            request.release(sys.exc_info())
+            raise
+        request.release()
+        return response
+
+
+class RowSerializer:
+    __slots__ = ('fields',)
+
+    def __init__(self, *fields: Tuple[str, Optional[int], Optional[Callable[[Any], Any]]]):
+        self.fields = fields
+
+    def __call__(self, row: Tuple) -> Dict[str, Any]:
+        return {
+            name: row[index] if convert is None else convert(row if index is None else row[index])
+            for name, index, convert in self.fields
+        }
+
+    def many(self, rows: Iterable[Tuple]) -> List[Dict[str, Any]]:
+        return [self(row) for row in rows]
+
+
+def iso(value: Any) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def json_response(status_code: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    with timing.phase('serialize'):
+        body = dumps(payload)
+    return {
+        'statusCode': status_code,
+        'headers': {**JSON_HEADERS, **headers} if headers else JSON_HEADERS,
+        'body': body
+    }
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+warm = WarmState()
+METHOD_NOT_ALLOWED = json_response(405, {'error': 'Method not allowed'})
@@ -5,103 +5,121 @@ Args: event - dict with httpMethod, body, queryStringParameters
 Returns: HTTP response dict with user data
 '''
 
-import json
-import os
-import psycopg2
 from typing import Dict, Any
 
+from core import HttpError, Request, Router, RowSerializer, json_response
+from db import execute, statement
+from timing import instrumented
+import session
+
+UNIQUE_VIOLATION = '23505'
+USER_COLUMNS = 'id, roblox_id, roblox_username, first_name, username, photo_url, wins, losses, rating, team_name, telegram_id'
+
+LOGIN_USER = statement('roblox_user_login', f'''
+    INSERT INTO users AS u
+    (roblox_id, roblox_username, roblox_avatar_url, first_name, last_name, username, photo_url, last_login)
+    VALUES (%s, %s, %s, %s, '', %s, %s, CURRENT_TIMESTAMP)
+    ON CONFLICT (roblox_id) WHERE roblox_id IS NOT NULL
+    DO UPDATE SET
+        roblox_username = EXCLUDED.roblox_username,
+        roblox_avatar_url = EXCLUDED.roblox_avatar_url,
+        first_name = CASE WHEN u.telegram_id IS NULL THEN EXCLUDED.first_name ELSE u.first_name END,
+        username = CASE WHEN u.telegram_id IS NULL THEN EXCLUDED.username ELSE u.username END,
+        photo_url = CASE WHEN u.telegram_id IS NULL THEN EXCLUDED.photo_url ELSE u.photo_url END,
+        last_login = CURRENT_TIMESTAMP
+    RETURNING {USER_COLUMNS}
+''')
+FIND_USER = statement('roblox_user_find', 'SELECT 1 FROM users WHERE id = %s')
+LINK_USER = statement('roblox_user_link', f'''
+    UPDATE users u
+    SET roblox_id = %s, roblox_username = %s, roblox_avatar_url = %s,
+        first_name = COALESCE(NULLIF(u.first_name, ''), %s),
+        username = COALESCE(NULLIF(u.username, ''), %s),
+        photo_url = COALESCE(NULLIF(u.photo_url, ''), %s),
+        last_login = CURRENT_TIMESTAMP
+    WHERE u.id = %s
+      AND (u.roblox_id IS NULL OR u.roblox_id = %s)
+      AND NOT EXISTS (SELECT 1 FROM users o WHERE o.roblox_id = %s AND o.id <> u.id)
+    RETURNING {USER_COLUMNS}
+''')
+
+USER_ROW = RowSerializer(
+    ('id', 0, None),
+    ('roblox_id', 1, None),
+    ('roblox_username', 2, None),
+    ('first_name', 3, None),
+    ('username', 4, None),
+    ('photo_url', 5, None),
+    ('wins', 6, None),
+    ('losses', 7, None),
+    ('rating', 8, None),
+    ('team_name', 9, None),
+    ('telegram_id', 10, None)
+)
+
+AVATAR_URL = 'https://www.roblox.com/headshot-thumbnail/image?userId={}&width=150&height=150&format=png'
+
+router = Router('GET, POST, OPTIONS')
+
+@instrumented
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    method: str = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
-    
-    if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
-    
-    body_data = json.loads(event.get('body', '{}'))
-    roblox_data = body_data.get('roblox_data', {})
+    return router.dispatch(event, context)
+
+@router.route('POST')
+def roblox_login(request: Request) -> Dict[str, Any]:
+    roblox_data = request.body.get('roblox_data', {})
     
     roblox_id = roblox_data.get('id')
     roblox_username = roblox_data.get('name', '')
     roblox_display_name = roblox_data.get('displayName', '')
     
     if not roblox_id:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Roblox ID required'})
-        }
-    
-    database_url = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(database_url)
-    cur = conn.cursor()
-    
-    avatar_url = f'https://www.roblox.com/headshot-thumbnail/image?userId={roblox_id}&width=150&height=150&format=png'
+        raise HttpError(400, 'Roblox ID required')
     
-    cur.execute('SELECT id FROM users WHERE roblox_id = %s', (roblox_id,))
-    existing = cur.fetchone()
+    link_user_id = None
+    if request.body.get('link_user_id'):
+        if not session.enabled():
+            raise HttpError(403, 'Linking accounts requires a session token')
+        link_user_id = request.user_id('link_user_id')
+    display_name = roblox_display_name or roblox_username
+    avatar_url = AVATAR_URL.format(roblox_id)
     
-    if existing:
-        cur.execute('''
-            UPDATE users 
-            SET roblox_username = %s, first_name = %s, username = %s, photo_url = %s, last_login = CURRENT_TIMESTAMP
-            WHERE roblox_id = %s
-            RETURNING id, roblox_id, roblox_username, first_name, username, photo_url, wins, losses, rating, team_name
-        ''', (roblox_username, roblox_display_name or roblox_username, roblox_username, avatar_url, roblox_id))
+    conn = request.conn
+    cur = conn.cursor()
+    if link_user_id:
+        user_row = _link(conn, cur, link_user_id, (roblox_id, roblox_username, avatar_url, display_name,
+                                                   roblox_username, avatar_url, link_user_id, roblox_id, roblox_id))
     else:
-        cur.execute('''
-            INSERT INTO users (roblox_id, roblox_username, first_name, last_name, username, photo_url, telegram_id)
-            VALUES (%s, %s, %s, '', %s, %s, NULL)
-            RETURNING id, roblox_id, roblox_username, first_name, username, photo_url, wins, losses, rating, team_name
-        ''', (roblox_id, roblox_username, roblox_display_name or roblox_username, roblox_username, avatar_url))
+        execute(cur, LOGIN_USER, (roblox_id, roblox_username, avatar_url, display_name, roblox_username, avatar_url))
+        user_row = cur.fetchone()
     
-    user_row = cur.fetchone()
     conn.commit()
+    cur.close()
     
-    user_data = {
-        'id': user_row[0],
-        'roblox_id': user_row[1],
-        'roblox_username': user_row[2],
-        'first_name': user_row[3],
-        'username': user_row[4],
-        'photo_url': user_row[5],
-        'wins': user_row[6],
-        'losses': user_row[7],
-        'rating': user_row[8],
-        'team_name': user_row[9]
+    response = {
+        'success': True,
+        'user': USER_ROW(user_row)
     }
+    if session.enabled():
+        response['token'], response['expires_at'] = session.issue(user_row[0])
+    return json_response(200, response)
+
+def _link(conn: Any, cur: Any, link_user_id: Any, args: tuple) -> tuple:
+    try:
+        execute(cur, LINK_USER, args)
+        user_row = cur.fetchone()
+    except Exception as exc:
+        if getattr(exc, 'pgcode', None) != UNIQUE_VIOLATION:
+            raise
+        user_row = None
+    if user_row is not None:
+        return user_row
     
+    conn.rollback()
+    execute(cur, FIND_USER, (link_user_id,))
+    exists = cur.fetchone() is not None
+    conn.rollback()
     cur.close()
-    conn.close()
-    
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({
-            'success': True,
-            'user': user_data
-        })
-    }
\ No newline at end of file
+    if not exists:
+        raise HttpError(404, 'User not found')
+    raise HttpError(409, 'Roblox account is already linked to another user')
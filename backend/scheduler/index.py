@@ -0,0 +1,184 @@
+'''
+Business: Tournament lifecycle scheduler moving tournaments to active at start_date and to finished after their duration
+          once the bracket is decided (or no result has been reported for the abandon timeout)
+Args: event - dict with httpMethod, headers (X-Cron-Secret), queryStringParameters (batch_size)
+      context - object with attributes: request_id, function_name
+Returns: HTTP response dict with transition summary and the next due time
+'''
+
+import json
+import os
+import select
+import time
+from typing import Dict, Any, Optional
+
+from cron import HEADER, rejected
+from db import connection, execute, statement
+from timing import instrumented
+
+BATCH_SIZE = int(os.environ.get('SCHEDULER_BATCH_SIZE', '500'))
+DURATION_SECONDS = float(os.environ.get('TOURNAMENT_DURATION_HOURS', '4')) * 3600
+ABANDON_SECONDS = float(os.environ.get('TOURNAMENT_ABANDON_HOURS', '24')) * 3600
+TIME_BUDGET = float(os.environ.get('SCHEDULER_TIME_BUDGET', '20'))
+MIN_SLEEP = float(os.environ.get('SCHEDULER_MIN_SLEEP', '0.1'))
+MAX_SLEEP = float(os.environ.get('SCHEDULER_MAX_SLEEP', '300'))
+WAKE_CHANNEL = 'change_events'
+
+START_DUE = statement('start_due_tournaments', '''
+    UPDATE tournaments SET status = 'active'
+    WHERE id IN (
+        SELECT id FROM tournaments
+        WHERE status = 'registration' AND start_date <= LOCALTIMESTAMP
+        ORDER BY start_date
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+''')
+
+FINISH_DUE = statement('finish_due_tournaments', '''
+    UPDATE tournaments SET status = 'finished'
+    WHERE id IN (
+        SELECT t.id FROM tournaments t
+        WHERE t.status = 'active' AND t.start_date <= LOCALTIMESTAMP - make_interval(secs => %s)
+          AND (
+              NOT EXISTS (SELECT 1 FROM tournament_matches m WHERE m.tournament_id = t.id AND m.winner IS NULL)
+              OR GREATEST(t.start_date, (SELECT MAX(completed_at) FROM tournament_matches m WHERE m.tournament_id = t.id))
+                 <= LOCALTIMESTAMP - make_interval(secs => %s)
+          )
+        ORDER BY t.start_date
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+''')
+
+NEXT_DUE = statement('next_due_tournament', '''
+    SELECT due_at, EXTRACT(EPOCH FROM due_at - LOCALTIMESTAMP)::float8
+    FROM (
+        SELECT LEAST(
+            (SELECT MIN(start_date) FROM tournaments WHERE status = 'registration'),
+            (SELECT MIN(CASE
+                WHEN EXISTS (SELECT 1 FROM tournament_matches m WHERE m.tournament_id = t.id AND m.winner IS NULL)
+                THEN GREATEST(
+                    t.start_date + make_interval(secs => %s),
+                    GREATEST(t.start_date, (SELECT MAX(completed_at) FROM tournament_matches m WHERE m.tournament_id = t.id))
+                        + make_interval(secs => %s)
+                )
+                ELSE t.start_date + make_interval(secs => %s)
+             END) FROM tournaments t WHERE t.status = 'active')
+        ) AS due_at
+    ) next_due
+''')
+
+@instrumented
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'GET')
+
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': f'Content-Type, X-User-Id, {HEADER}',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': ''
+        }
+
+    denied = rejected(event)
+    if denied is not None:
+        return denied
+
+    params = event.get('queryStringParameters', {}) or {}
+    try:
+        batch_size = max(1, int(params.get('batch_size', BATCH_SIZE)))
+    except ValueError:
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': 'batch_size must be a positive integer'})
+        }
+
+    summary = advance(batch_size)
+
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(summary)
+    }
+
+def advance(batch_size: int = BATCH_SIZE, time_budget: float = TIME_BUDGET) -> Dict[str, Any]:
+    started = 0
+    finished = 0
+    batches = 0
+    deadline = time.monotonic() + time_budget
+
+    with connection() as conn:
+        cur = conn.cursor()
+        while True:
+            execute(cur, START_DUE, (batch_size,))
+            activated = cur.rowcount
+            execute(cur, FINISH_DUE, (DURATION_SECONDS, ABANDON_SECONDS, batch_size))
+            completed = cur.rowcount
+            conn.commit()
+
+            started += activated
+            finished += completed
+            if activated or completed:
+                batches += 1
+            if (activated < batch_size and completed < batch_size) or time.monotonic() >= deadline:
+                break
+
+        due_at, due_in = _next_due(cur)
+        conn.commit()
+        cur.close()
+
+    return {
+        'started': started,
+        'finished': finished,
+        'batches': batches,
+        'next_due_at': due_at.isoformat() if due_at else None,
+        'next_due_in': due_in
+    }
+
+def run_forever(batch_size: int = BATCH_SIZE) -> None:
+    import psycopg2
+
+    listener = psycopg2.connect(os.environ.get('DATABASE_URL', ''))
+    listener.autocommit = True
+    listener.cursor().execute(f'LISTEN {WAKE_CHANNEL}')
+
+    wake_at = 0.0
+    while True:
+        now = time.monotonic()
+        if now >= wake_at:
+            wake_at = now + _sleep_for(advance(batch_size)['next_due_in'])
+        else:
+            with connection() as conn:
+                cur = conn.cursor()
+                due_in = _next_due(cur)[1]
+                conn.commit()
+                cur.close()
+            wake_at = min(wake_at, now + _sleep_for(due_in))
+
+        if select.select([listener], [], [], max(0.0, wake_at - time.monotonic()))[0]:
+            listener.poll()
+            listener.notifies.clear()
+
+def _next_due(cur: Any) -> tuple:
+    execute(cur, NEXT_DUE, (DURATION_SECONDS, ABANDON_SECONDS, DURATION_SECONDS))
+    return cur.fetchone()
+
+def _sleep_for(due_in: Optional[float]) -> float:
+    if due_in is None:
+        return MAX_SLEEP
+    return min(max(due_in, MIN_SLEEP), MAX_SLEEP)
+
+if __name__ == '__main__':
+    run_forever()
@@ -0,0 +1,152 @@
+'''
+Business: Ranked full-text and typo-tolerant search over tournaments, VIP server games and players
+Args: event - dict with httpMethod, queryStringParameters (q, type, limit)
+      context - object with attributes: request_id, function_name
+Returns: HTTP response dict with ranked tournaments, servers and players
+'''
+
+import re
+from typing import Any, Dict, Tuple
+
+from cache import ResponseCache, conditional_response
+from core import HttpError, Request, Router, RowSerializer, json_response, warm
+from db import execute, statement
+from timing import instrumented
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MIN_QUERY_LENGTH = 2
+MAX_QUERY_LENGTH = 100
+MAX_TERMS = 8
+WORD_PATTERN = re.compile(r'\w+')
+
+def _search_statement(name: str, table: str, columns: str, head_order: str, trigram_columns: Tuple[str, ...],
+                      tie_break: str) -> Any:
+    fuzzy = ' OR '.join(f'%s <%% {column}' for column in trigram_columns)
+    similarity = ', '.join(f"word_similarity(%s, coalesce(t.{column}, ''))" for column in trigram_columns)
+    return statement(f'search_{name}', f'''
+        WITH q AS MATERIALIZED (
+            SELECT to_tsquery('simple', %s) AS query
+        ), head AS MATERIALIZED (
+            SELECT h.id
+            FROM (SELECT id, search_vector FROM {table} ORDER BY {head_order} LIMIT %s) h, q
+            WHERE h.search_vector @@ q.query
+        ), matched AS MATERIALIZED (
+            SELECT m.id
+            FROM {table} m, q
+            WHERE m.search_vector @@ q.query
+              AND (SELECT count(*) FROM (SELECT 1 FROM head LIMIT %s) enough) < %s
+        ), fuzzy AS MATERIALIZED (
+            SELECT id
+            FROM {table}
+            WHERE ({fuzzy})
+              AND (SELECT count(*) FROM (SELECT id FROM head UNION SELECT id FROM matched LIMIT %s) enough) < %s
+        ), candidates AS (
+            (SELECT id FROM head LIMIT %s)
+            UNION (SELECT id FROM matched LIMIT %s)
+            UNION (SELECT id FROM fuzzy LIMIT %s)
+        )
+        SELECT {columns},
+               ts_rank(t.search_vector, q.query) * 2 + GREATEST({similarity}) AS score
+        FROM candidates c
+        JOIN {table} t ON t.id = c.id, q
+        ORDER BY score DESC, {tie_break}
+        LIMIT %s
+    ''')
+
+SEARCH_TOURNAMENTS = _search_statement(
+    'tournaments', 'tournaments',
+    't.id, t.name, t.game_name, t.status, t.current_players, t.max_players',
+    'created_at DESC, id DESC', ('name', 'game_name'), 't.created_at DESC'
+)
+SEARCH_SERVERS = _search_statement(
+    'servers', 'vip_servers',
+    't.id, t.game_name, t.server_url, t.online_players, t.max_players',
+    'id DESC', ('game_name',), 't.online_players DESC'
+)
+SEARCH_PLAYERS = _search_statement(
+    'players', 'users',
+    't.id, t.username, t.roblox_username, t.first_name, t.last_name, t.photo_url, t.rating',
+    'rating DESC', ('username', 'roblox_username'), 't.rating DESC'
+)
+
+TOURNAMENT_HIT = RowSerializer(
+    ('id', 0, None),
+    ('name', 1, None),
+    ('game', 2, None),
+    ('status', 3, None),
+    ('players', 4, None),
+    ('maxPlayers', 5, None),
+    ('score', 6, float)
+)
+SERVER_HIT = RowSerializer(
+    ('id', 0, None),
+    ('game_name', 1, None),
+    ('server_url', 2, None),
+    ('online_players', 3, None),
+    ('max_players', 4, None),
+    ('score', 5, float)
+)
+PLAYER_HIT = RowSerializer(
+    ('id', 0, None),
+    ('username', 1, None),
+    ('roblox_username', 2, None),
+    ('first_name', 3, None),
+    ('last_name', 4, None),
+    ('photo_url', 5, None),
+    ('rating', 6, None),
+    ('score', 7, float)
+)
+
+SEARCHES = {
+    'tournaments': (SEARCH_TOURNAMENTS, TOURNAMENT_HIT, 2),
+    'servers': (SEARCH_SERVERS, SERVER_HIT, 1),
+    'players': (SEARCH_PLAYERS, PLAYER_HIT, 2)
+}
+
+results_cache = ResponseCache()
+router = Router('GET, OPTIONS')
+
+@instrumented
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    return router.dispatch(event, context)
+
+@router.route('GET')
+def search(request: Request) -> Dict[str, Any]:
+    params = request.query
+    text = ' '.join(params.get('q', '').split())[:MAX_QUERY_LENGTH]
+    kind = params.get('type', 'all')
+    try:
+        limit = min(max(int(params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        raise HttpError(400, 'limit must be an integer')
+    
+    if len(text) < MIN_QUERY_LENGTH:
+        raise HttpError(400, f'q must be at least {MIN_QUERY_LENGTH} characters')
+    if kind != 'all' and kind not in SEARCHES:
+        raise HttpError(400, f"type must be one of: all, {', '.join(SEARCHES)}")
+    
+    terms = WORD_PATTERN.findall(text.lower())[:MAX_TERMS]
+    if not terms:
+        raise HttpError(400, 'q must contain letters or digits')
+    
+    cache_key = ResponseCache.key({'q': text.lower(), 'type': kind, 'limit': limit})
+    entry = results_cache.get(cache_key)
+    if entry is None:
+        tsquery = ' & '.join([*terms[:-1], f'{terms[-1]}:*'])
+        window = warm.setting('SEARCH_WINDOW', '2000', int)
+        candidates = warm.setting('SEARCH_CANDIDATES', '200', int)
+        cur = request.conn.cursor()
+        results = {}
+        for name, (stmt, serializer, trigram_columns) in SEARCHES.items():
+            if kind not in ('all', name):
+                continue
+            fuzzy_args = [text] * trigram_columns
+            execute(cur, stmt, (
+                tsquery, window, limit, limit, *fuzzy_args, limit, limit,
+                candidates, candidates, candidates, *fuzzy_args, limit
+            ))
+            results[name] = serializer.many(cur.fetchall())
+        cur.close()
+        entry = results_cache.put(cache_key, json_response(200, {'query': text, **results})['body'])
+    return conditional_response(entry, request.event.get('headers'))
@@ -5,65 +5,86 @@ Args: event - dict with httpMethod, body, queryStringParameters
 Returns: HTTP response dict with user data or error
 '''
 
-import json
-import os
-import psycopg2
 from typing import Dict, Any
 from hashlib import sha256
 import hmac
 
+from core import HttpError, Request, Router, RowSerializer, json_response, warm
+from db import execute, statement
+from timing import instrumented
+import session
+
+UNIQUE_VIOLATION = '23505'
+
+UPSERT_USER = statement('telegram_user_upsert', '''
+    INSERT INTO users (telegram_id, username, first_name, last_name, photo_url, last_login)
+    VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+    ON CONFLICT (telegram_id) 
+    DO UPDATE SET 
+        username = EXCLUDED.username,
+        first_name = EXCLUDED.first_name,
+        last_name = EXCLUDED.last_name,
+        photo_url = EXCLUDED.photo_url,
+        last_login = CURRENT_TIMESTAMP
+    RETURNING id, telegram_id, username, first_name, last_name, photo_url, wins, losses, rating, team_name,
+              roblox_id, roblox_username
+''')
+FIND_USER = statement('telegram_user_find', 'SELECT 1 FROM users WHERE id = %s')
+LINK_USER = statement('telegram_user_link', '''
+    UPDATE users u
+    SET telegram_id = %s,
+        username = COALESCE(NULLIF(%s, ''), u.username),
+        first_name = COALESCE(NULLIF(%s, ''), u.first_name),
+        last_name = COALESCE(NULLIF(%s, ''), u.last_name),
+        photo_url = COALESCE(NULLIF(%s, ''), u.photo_url),
+        last_login = CURRENT_TIMESTAMP
+    WHERE u.id = %s
+      AND (u.telegram_id IS NULL OR u.telegram_id = %s)
+      AND NOT EXISTS (SELECT 1 FROM users o WHERE o.telegram_id = %s AND o.id <> u.id)
+    RETURNING id, telegram_id, username, first_name, last_name, photo_url, wins, losses, rating, team_name,
+              roblox_id, roblox_username
+''')
+
+USER_ROW = RowSerializer(
+    ('id', 0, None),
+    ('telegram_id', 1, None),
+    ('username', 2, None),
+    ('first_name', 3, None),
+    ('last_name', 4, None),
+    ('photo_url', 5, None),
+    ('wins', 6, None),
+    ('losses', 7, None),
+    ('rating', 8, None),
+    ('team_name', 9, None),
+    ('roblox_id', 10, None),
+    ('roblox_username', 11, None)
+)
+
+router = Router('GET, POST, OPTIONS')
+
+@instrumented
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    method: str = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
-    
-    if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
-    
-    body_data = json.loads(event.get('body', '{}'))
-    telegram_data = body_data.get('telegram_data', {})
+    return router.dispatch(event, context)
+
+@router.route('POST')
+def telegram_login(request: Request) -> Dict[str, Any]:
+    telegram_data = request.body.get('telegram_data', {})
     
     telegram_id = telegram_data.get('id')
     if not telegram_id:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Telegram ID required'})
-        }
+        raise HttpError(400, 'Telegram ID required')
     
-    bot_token = os.environ.get('TELEGRAM_BOT_TOKEN', '')
+    bot_token = warm.setting('TELEGRAM_BOT_TOKEN', '')
     if bot_token and not verify_telegram_auth(telegram_data, bot_token):
-        return {
-            'statusCode': 401,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Invalid authentication'})
-        }
+        raise HttpError(401, 'Invalid authentication')
     
-    database_url = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(database_url)
+    link_user_id = None
+    if request.body.get('link_user_id'):
+        if not session.enabled():
+            raise HttpError(403, 'Linking accounts requires a session token')
+        link_user_id = request.user_id('link_user_id')
+    
+    conn = request.conn
     cur = conn.cursor()
     
     username = telegram_data.get('username', '')
@@ -71,49 +92,43 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     last_name = telegram_data.get('last_name', '')
     photo_url = telegram_data.get('photo_url', '')
     
-    cur.execute('''
-        INSERT INTO users (telegram_id, username, first_name, last_name, photo_url, last_login)
-        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
-        ON CONFLICT (telegram_id) 
-        DO UPDATE SET 
-            username = EXCLUDED.username,
-            first_name = EXCLUDED.first_name,
-            last_name = EXCLUDED.last_name,
-            photo_url = EXCLUDED.photo_url,
-            last_login = CURRENT_TIMESTAMP
-        RETURNING id, telegram_id, username, first_name, last_name, photo_url, wins, losses, rating, team_name
-    ''', (telegram_id, username, first_name, last_name, photo_url))
+    if link_user_id:
+        user_row = _link(conn, cur, link_user_id, (telegram_id, username, first_name, last_name, photo_url,
+                                                   link_user_id, telegram_id, telegram_id))
+    else:
+        execute(cur, UPSERT_USER, (telegram_id, username, first_name, last_name, photo_url))
+        user_row = cur.fetchone()
     
-    user_row = cur.fetchone()
     conn.commit()
+    cur.close()
     
-    user_data = {
-        'id': user_row[0],
-        'telegram_id': user_row[1],
-        'username': user_row[2],
-        'first_name': user_row[3],
-        'last_name': user_row[4],
-        'photo_url': user_row[5],
-        'wins': user_row[6],
-        'losses': user_row[7],
-        'rating': user_row[8],
-        'team_name': user_row[9]
+    response = {
+        'success': True,
+        'user': USER_ROW(user_row)
     }
+    if session.enabled():
+        response['token'], response['expires_at'] = session.issue(user_row[0])
+    return json_response(200, response)
+
+def _link(conn: Any, cur: Any, link_user_id: Any, args: tuple) -> tuple:
+    try:
+        execute(cur, LINK_USER, args)
+        user_row = cur.fetchone()
+    except Exception as exc:
+        if getattr(exc, 'pgcode', None) != UNIQUE_VIOLATION:
+            raise
+        user_row = None
+    if user_row is not None:
+        return user_row
     
+    conn.rollback()
+    execute(cur, FIND_USER, (link_user_id,))
+    exists = cur.fetchone() is not None
+    conn.rollback()
     cur.close()
-    conn.close()
-    
-    return {
-        'statusCode': 200,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({
-            'success': True,
-            'user': user_data
-        })
-    }
+    if not exists:
+        raise HttpError(404, 'User not found')
+    raise HttpError(409, 'Telegram account is already linked to another user')
 
 def verify_telegram_auth(auth_data: Dict[str, Any], bot_token: str) -> bool:
     check_hash = auth_data.get('hash')
@@ -126,7 +141,7 @@ def verify_telegram_auth(auth_data: Dict[str, Any], bot_token: str) -> bool:
             data_check_arr.append(f'{key}={value}')
     
     data_check_string = '\n'.join(data_check_arr)
-    secret_key = sha256(bot_token.encode()).digest()
+    secret_key = warm.get(('telegram_secret', bot_token), lambda: sha256(bot_token.encode()).digest())
     calculated_hash = hmac.new(secret_key, data_check_string.encode(), sha256).hexdigest()
     
-    return calculated_hash == check_hash
+    return hmac.compare_digest(calculated_hash.encode(), str(check_hash).encode('utf-8', 'replace'))
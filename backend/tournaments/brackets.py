@@ -0,0 +1,418 @@
+'''
+Business: Bracket generation for single elimination, double elimination and Swiss tournaments
+Args: players - participant user IDs ordered by seed (highest rating first)
+Returns: Bracket match tables backed by flat integer arrays, persisted to tournament_matches with COPY
+'''
+
+import io
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from db import execute_values
+
+BYE = 0
+TBD = -1
+NO_MATCH = -1
+
+WINNERS = ord('W')
+LOSERS = ord('L')
+GRAND_FINAL = ord('G')
+SWISS = ord('S')
+
+SWISS_LOOKAHEAD = 8
+
+MATCH_COLUMNS = (
+    'tournament_id', 'match_no', 'bracket', 'round', 'player_a', 'player_b',
+    'winner', 'next_match', 'next_slot', 'loser_match', 'loser_slot'
+)
+
+
+class BracketError(ValueError):
+    pass
+
+
+class Bracket:
+    __slots__ = ('side', 'round', 'player_a', 'player_b', 'winner',
+                 'next_match', 'next_slot', 'loser_match', 'loser_slot')
+
+    def __init__(self):
+        self.side = bytearray()
+        self.round = array('i')
+        self.player_a = array('i')
+        self.player_b = array('i')
+        self.winner = array('i')
+        self.next_match = array('i')
+        self.next_slot = array('b')
+        self.loser_match = array('i')
+        self.loser_slot = array('b')
+
+    def __len__(self) -> int:
+        return len(self.round)
+
+    def add_match(self, side: int, round_no: int, player_a: int = TBD, player_b: int = TBD) -> int:
+        self.side.append(side)
+        self.round.append(round_no)
+        self.player_a.append(player_a)
+        self.player_b.append(player_b)
+        self.winner.append(TBD)
+        self.next_match.append(NO_MATCH)
+        self.next_slot.append(0)
+        self.loser_match.append(NO_MATCH)
+        self.loser_slot.append(0)
+        return len(self.round) - 1
+
+    def link(self, match: int, target: int, slot: int) -> None:
+        self.next_match[match] = target
+        self.next_slot[match] = slot
+
+    def link_loser(self, match: int, target: int, slot: int) -> None:
+        self.loser_match[match] = target
+        self.loser_slot[match] = slot
+
+    def settle(self) -> None:
+        for match in range(len(self.round)):
+            self._settle(match, set())
+
+    def record_result(self, match: int, winner: int, changed: Optional[Set[int]] = None) -> Set[int]:
+        changed = changed if changed is not None else set()
+        if not 0 <= match < len(self.round):
+            raise BracketError(f'Unknown match {match}')
+        a, b = self.player_a[match], self.player_b[match]
+        if self.winner[match] != TBD:
+            raise BracketError(f'Match {match} is already decided')
+        if a in (TBD, BYE) or b in (TBD, BYE):
+            raise BracketError(f'Match {match} is not ready')
+        if winner not in (a, b):
+            raise BracketError(f'Player {winner} is not in match {match}')
+        self._decide(match, winner, b if winner == a else a, changed)
+        return changed
+
+    def apply_results(self, results: Iterable[Tuple[int, int]]) -> Set[int]:
+        changed: Set[int] = set()
+        for match, winner in results:
+            self.record_result(match, winner, changed)
+        return changed
+
+    def champion(self) -> Optional[int]:
+        if not len(self.round):
+            return None
+        last = len(self.round) - 1
+        if self.side[last] == SWISS or self.next_match[last] != NO_MATCH:
+            return None
+        return self.winner[last] if self.winner[last] > 0 else None
+
+    def _decide(self, match: int, winner: int, loser: int, changed: Set[int]) -> None:
+        self.winner[match] = winner
+        changed.add(match)
+        target = self.next_match[match]
+        if target != NO_MATCH:
+            self._place(target, self.next_slot[match], winner, changed)
+        target = self.loser_match[match]
+        if target != NO_MATCH:
+            if self.side[match] == GRAND_FINAL and winner == self.player_a[match]:
+                loser = BYE
+            self._place(target, self.loser_slot[match], loser, changed)
+
+    def _place(self, match: int, slot: int, player: int, changed: Set[int]) -> None:
+        if slot == 0:
+            self.player_a[match] = player
+        else:
+            self.player_b[match] = player
+        changed.add(match)
+        self._settle(match, changed)
+
+    def _settle(self, match: int, changed: Set[int]) -> None:
+        if self.winner[match] != TBD:
+            return
+        a, b = self.player_a[match], self.player_b[match]
+        if a == TBD or b == TBD or (a != BYE and b != BYE):
+            return
+        if a == BYE:
+            self._decide(match, b, BYE, changed)
+        else:
+            self._decide(match, a, BYE, changed)
+
+
+def seed_positions(size: int) -> List[int]:
+    positions = [1]
+    while len(positions) < size:
+        mirror = 2 * len(positions) + 1
+        positions = [seed for top in positions for seed in (top, mirror - top)]
+    return positions
+
+
+def single_elimination(players: List[int]) -> Bracket:
+    bracket = Bracket()
+    _build_winners(bracket, players)
+    bracket.settle()
+    return bracket
+
+
+def double_elimination(players: List[int]) -> Bracket:
+    bracket = Bracket()
+    rounds = _build_winners(bracket, players)
+    winners_final = rounds[-1][0]
+
+    if len(rounds) == 1:
+        grand_final = bracket.add_match(GRAND_FINAL, 1)
+        bracket.link(winners_final, grand_final, 0)
+        bracket.link_loser(winners_final, grand_final, 1)
+        _add_reset(bracket, grand_final)
+        bracket.settle()
+        return bracket
+
+    first = rounds[0]
+    previous = []
+    for i in range(len(first) // 2):
+        match = bracket.add_match(LOSERS, 1)
+        bracket.link_loser(first[2 * i], match, 0)
+        bracket.link_loser(first[2 * i + 1], match, 1)
+        previous.append(match)
+
+    losers_round = 1
+    for dropping in rounds[1:]:
+        losers_round += 1
+        current = []
+        for i, feeder in enumerate(previous):
+            match = bracket.add_match(LOSERS, losers_round)
+            bracket.link(feeder, match, 0)
+            bracket.link_loser(dropping[len(dropping) - 1 - i], match, 1)
+            current.append(match)
+        previous = current
+
+        if len(previous) > 1:
+            losers_round += 1
+            current = []
+            for i in range(len(previous) // 2):
+                match = bracket.add_match(LOSERS, losers_round)
+                bracket.link(previous[2 * i], match, 0)
+                bracket.link(previous[2 * i + 1], match, 1)
+                current.append(match)
+            previous = current
+
+    grand_final = bracket.add_match(GRAND_FINAL, 1)
+    bracket.link(winners_final, grand_final, 0)
+    bracket.link(previous[0], grand_final, 1)
+    _add_reset(bracket, grand_final)
+    bracket.settle()
+    return bracket
+
+
+def swiss_round(players: List[int], bracket: Optional[Bracket] = None) -> Bracket:
+    if len(players) < 2:
+        raise BracketError('At least 2 players are required')
+    bracket = bracket if bracket is not None else Bracket()
+    scores, played, had_bye, last_round = swiss_standings(bracket)
+    round_no = last_round + 1
+
+    if round_no == 1:
+        half = len(players) // 2
+        order = [p for pair in zip(players[:half], players[half:2 * half]) for p in pair]
+        leftover = players[2 * half:]
+    else:
+        buckets: Dict[int, List[int]] = {}
+        for player in players:
+            buckets.setdefault(scores.get(player, 0), []).append(player)
+        order = [p for score in range(round_no, -1, -1) for p in buckets.get(score, ())]
+        leftover = []
+        if len(order) % 2:
+            bye_index = next((i for i in range(len(order) - 1, -1, -1) if order[i] not in had_bye), len(order) - 1)
+            leftover = [order.pop(bye_index)]
+
+    if round_no == 1:
+        for i in range(0, len(order), 2):
+            bracket.add_match(SWISS, round_no, order[i], order[i + 1])
+    else:
+        for a, b in _swiss_pairs(order, played):
+            bracket.add_match(SWISS, round_no, a, b)
+
+    for player in leftover:
+        match = bracket.add_match(SWISS, round_no, player, BYE)
+        bracket.winner[match] = player
+
+    return bracket
+
+
+def swiss_standings(bracket: Bracket) -> Tuple[Dict[int, int], Set[Tuple[int, int]], Set[int], int]:
+    scores: Dict[int, int] = {}
+    played: Set[Tuple[int, int]] = set()
+    had_bye: Set[int] = set()
+    last_round = 0
+
+    for match in range(len(bracket)):
+        if bracket.side[match] != SWISS:
+            continue
+        a, b, winner = bracket.player_a[match], bracket.player_b[match], bracket.winner[match]
+        last_round = max(last_round, bracket.round[match])
+        if b == BYE:
+            had_bye.add(a)
+        else:
+            played.add((a, b) if a < b else (b, a))
+        if winner > 0:
+            scores[winner] = scores.get(winner, 0) + 1
+
+    return scores, played, had_bye, last_round
+
+
+def swiss_round_complete(bracket: Bracket) -> bool:
+    return all(bracket.winner[m] != TBD for m in range(len(bracket)) if bracket.side[m] == SWISS)
+
+
+def copy_matches(cur: Any, tournament_id: int, bracket: Bracket) -> None:
+    cur.execute('DELETE FROM tournament_matches WHERE tournament_id = %s', (tournament_id,))
+    append_matches(cur, tournament_id, bracket, 0)
+
+
+def append_matches(cur: Any, tournament_id: int, bracket: Bracket, first: int) -> None:
+    buffer = io.StringIO()
+    for match in range(first, len(bracket)):
+        buffer.write('\t'.join(_copy_value(value) for value in _match_row(tournament_id, bracket, match)))
+        buffer.write('\n')
+    buffer.seek(0)
+    cur.copy_expert(f"COPY tournament_matches ({', '.join(MATCH_COLUMNS)}) FROM STDIN", buffer)
+
+
+def load_bracket(cur: Any, tournament_id: int) -> Bracket:
+    cur.execute('''
+        SELECT bracket, round, player_a, player_b, winner, next_match, next_slot, loser_match, loser_slot
+        FROM tournament_matches
+        WHERE tournament_id = %s
+        ORDER BY match_no
+    ''', (tournament_id,))
+    bracket = Bracket()
+    for side, round_no, a, b, winner, next_match, next_slot, loser_match, loser_slot in cur.fetchall():
+        match = bracket.add_match(ord(side), round_no, TBD if a is None else a, TBD if b is None else b)
+        bracket.winner[match] = TBD if winner is None else winner
+        if next_match is not None:
+            bracket.link(match, next_match, next_slot)
+        if loser_match is not None:
+            bracket.link_loser(match, loser_match, loser_slot)
+    return bracket
+
+
+def save_changes(cur: Any, tournament_id: int, bracket: Bracket, changed: Iterable[int], reported: Iterable[int]) -> None:
+    reported = set(reported)
+    rows = [
+        (
+            tournament_id,
+            match,
+            _nullable(bracket.player_a[match]),
+            _nullable(bracket.player_b[match]),
+            _nullable(bracket.winner[match]),
+            match in reported
+        )
+        for match in sorted(changed)
+    ]
+    if not rows:
+        return
+    execute_values(cur, '''
+        UPDATE tournament_matches m
+        SET player_a = v.player_a, player_b = v.player_b, winner = v.winner,
+            completed_at = CASE WHEN v.reported THEN CURRENT_TIMESTAMP ELSE m.completed_at END,
+            result_seq = CASE WHEN v.reported THEN nextval('match_result_seq') ELSE m.result_seq END
+        FROM (VALUES %s) AS v(tournament_id, match_no, player_a, player_b, winner, reported)
+        WHERE m.tournament_id = v.tournament_id AND m.match_no = v.match_no
+    ''', rows, template='(%s, %s, %s::integer, %s::integer, %s::integer, %s)', page_size=len(rows))
+
+
+def bracket_to_json(bracket: Bracket) -> List[Dict[str, Any]]:
+    return [
+        {
+            'match': match,
+            'bracket': chr(bracket.side[match]),
+            'round': bracket.round[match],
+            'playerA': _nullable(bracket.player_a[match]),
+            'playerB': _nullable(bracket.player_b[match]),
+            'winner': _nullable(bracket.winner[match]),
+            'nextMatch': _nullable(bracket.next_match[match])
+        }
+        for match in range(len(bracket))
+    ]
+
+
+def _build_winners(bracket: Bracket, players: List[int]) -> List[List[int]]:
+    if len(players) < 2:
+        raise BracketError('At least 2 players are required')
+    size = 1 << (len(players) - 1).bit_length()
+    positions = seed_positions(size)
+
+    current = []
+    for i in range(0, size, 2):
+        a = players[positions[i] - 1] if positions[i] <= len(players) else BYE
+        b = players[positions[i + 1] - 1] if positions[i + 1] <= len(players) else BYE
+        current.append(bracket.add_match(WINNERS, 1, a, b))
+
+    rounds = [current]
+    round_no = 1
+    while len(current) > 1:
+        round_no += 1
+        following = []
+        for i in range(len(current) // 2):
+            match = bracket.add_match(WINNERS, round_no)
+            bracket.link(current[2 * i], match, 0)
+            bracket.link(current[2 * i + 1], match, 1)
+            following.append(match)
+        rounds.append(following)
+        current = following
+    return rounds
+
+
+def _add_reset(bracket: Bracket, grand_final: int) -> None:
+    reset = bracket.add_match(GRAND_FINAL, 2)
+    bracket.link(grand_final, reset, 0)
+    bracket.link_loser(grand_final, reset, 1)
+
+
+def _swiss_pairs(order: List[int], played: Set[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    paired = set()
+    pairs = []
+    for i, player in enumerate(order):
+        if player in paired:
+            continue
+        fallback = None
+        opponent = None
+        candidates = 0
+        for j in range(i + 1, len(order)):
+            other = order[j]
+            if other in paired:
+                continue
+            if fallback is None:
+                fallback = other
+            key = (player, other) if player < other else (other, player)
+            if key not in played:
+                opponent = other
+                break
+            candidates += 1
+            if candidates >= SWISS_LOOKAHEAD:
+                break
+        opponent = opponent if opponent is not None else fallback
+        if opponent is None:
+            break
+        paired.add(player)
+        paired.add(opponent)
+        pairs.append((player, opponent))
+    return pairs
+
+
+def _match_row(tournament_id: int, bracket: Bracket, match: int) -> Tuple:
+    return (
+        tournament_id,
+        match,
+        chr(bracket.side[match]),
+        bracket.round[match],
+        _nullable(bracket.player_a[match]),
+        _nullable(bracket.player_b[match]),
+        _nullable(bracket.winner[match]),
+        _nullable(bracket.next_match[match]),
+        bracket.next_slot[match] if bracket.next_match[match] != NO_MATCH else None,
+        _nullable(bracket.loser_match[match]),
+        bracket.loser_slot[match] if bracket.loser_match[match] != NO_MATCH else None
+    )
+
+
+def _nullable(value: int) -> Optional[int]:
+    return None if value == TBD else value
+
+
+def _copy_value(value: Any) -> str:
+    return '\\N' if value is None else str(value)
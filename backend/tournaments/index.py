@@ -5,157 +5,407 @@ Args: event - dict with httpMethod, body, queryStringParameters
 Returns: HTTP response dict with tournaments data
 '''
 
-import json
-import os
-import psycopg2
-from typing import Dict, Any
+from typing import Dict, Any, Callable
 from datetime import datetime
+import base64
+import functools
 
+from cache import ResponseCache, conditional_response
+from core import HttpError, Request, Router, RowSerializer, iso, json_response
+from db import execute, statement
+from ratelimit import Limiter
+from timing import instrumented
+import brackets
+import sync
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+BRACKET_BUILDERS = {
+    'single': brackets.single_elimination,
+    'double': brackets.double_elimination,
+    'swiss': brackets.swiss_round
+}
+
+BRACKET_STATUSES = {
+    'generate_bracket': ('registration', 'active'),
+    'report_results': ('active',),
+    'next_round': ('active',)
+}
+
+JOIN_SEAT = statement('tournaments_join', '''
+    WITH seat AS (
+        UPDATE tournaments
+        SET current_players = current_players + 1
+        WHERE id = %s
+          AND status = 'registration'
+          AND current_players < max_players
+          AND NOT EXISTS (
+              SELECT 1 FROM tournament_participants
+              WHERE tournament_id = %s AND user_id = %s
+          )
+        RETURNING id, current_players, max_players
+    ), joined AS (
+        INSERT INTO tournament_participants (tournament_id, user_id)
+        SELECT id, %s FROM seat
+        ON CONFLICT (tournament_id, user_id) DO NOTHING
+        RETURNING tournament_id
+    )
+    SELECT s.current_players, s.max_players
+    FROM seat s JOIN joined j ON j.tournament_id = s.id
+''')
+CHANGED_TOURNAMENTS = statement('tournaments_changed', '''
+    SELECT 
+        t.id, t.name, t.game_name, t.roblox_server_url, 
+        t.max_players, t.prize_robux, t.current_players, 
+        t.status, t.start_date, t.created_at,
+        u.first_name, u.last_name, u.username
+    FROM tournaments t
+    LEFT JOIN users u ON t.creator_user_id = u.id
+    WHERE t.updated_at > %s
+    ORDER BY t.updated_at, t.id
+    LIMIT %s
+''')
+LEAVE_SEAT = statement('tournaments_leave', '''
+    WITH gone AS (
+        DELETE FROM tournament_participants p
+        USING tournaments t
+        WHERE p.tournament_id = %s AND p.user_id = %s
+          AND t.id = p.tournament_id AND t.status = 'registration'
+        RETURNING p.tournament_id
+    )
+    UPDATE tournaments t
+    SET current_players = t.current_players - 1
+    FROM gone
+    WHERE t.id = gone.tournament_id
+    RETURNING t.current_players, t.max_players
+''')
+
+TOURNAMENT_ROW = RowSerializer(
+    ('id', 0, None),
+    ('name', 1, None),
+    ('game', 2, None),
+    ('robloxServerUrl', 3, None),
+    ('maxPlayers', 4, None),
+    ('prize', 5, None),
+    ('players', 6, None),
+    ('status', 7, None),
+    ('startDate', 8, iso),
+    ('createdAt', 9, iso),
+    ('creator', None, lambda row: {'first_name': row[10], 'last_name': row[11], 'username': row[12]})
+)
+CREATED_ROW = RowSerializer(
+    ('id', 0, None),
+    ('name', 1, None),
+    ('game', 2, None),
+    ('robloxServerUrl', 3, None),
+    ('maxPlayers', 4, None),
+    ('prize', 5, None),
+    ('players', 6, None),
+    ('status', 7, None),
+    ('createdAt', 8, iso)
+)
+
+listing_cache = ResponseCache()
+router = Router('GET, POST, PUT, DELETE, OPTIONS', limiter=Limiter('tournaments'))
+
+@instrumented
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    method: str = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
-    
-    database_url = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(database_url)
+    return router.dispatch(event, context)
+
+def _invalidates_listing(fn: Callable[[Request], Dict[str, Any]]) -> Callable[[Request], Dict[str, Any]]:
+    @functools.wraps(fn)
+    def wrapper(request: Request) -> Dict[str, Any]:
+        response = fn(request)
+        if response['statusCode'] in (200, 201):
+            listing_cache.invalidate()
+        return response
+    return wrapper
+
+@router.route('GET')
+def get_tournaments(request: Request) -> Dict[str, Any]:
+    cache_key = ResponseCache.key(request.query)
+    entry = listing_cache.get(cache_key)
+    if entry is None:
+        cur = request.conn.cursor()
+        try:
+            if request.query.get('tournament_id'):
+                response = _matches(request.query['tournament_id'], cur)
+            elif request.query.get('since'):
+                response = _changes(request.query, cur)
+            else:
+                response = _listing(request.query, cur)
+        finally:
+            cur.close()
+        if response['statusCode'] != 200:
+            return response
+        entry = listing_cache.put(cache_key, response['body'])
+    return conditional_response(entry, request.event.get('headers'))
+
+def _listing(params: Dict[str, str], cur: Any) -> Dict[str, Any]:
+    try:
+        limit = min(max(int(params.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        cursor = _decode_cursor(params['cursor']) if params.get('cursor') else None
+    except ValueError:
+        raise HttpError(400, 'Invalid limit or cursor')
+    
+    conditions = []
+    args = []
+    shape = ''
+    for name, condition, values in (
+        ('status', 't.status = %s', (params.get('status'),)),
+        ('game', 't.game_name = %s', (params.get('game_name'),)),
+        ('cursor', '(t.created_at, t.id) < (%s, %s)', cursor)
+    ):
+        if values and values[0]:
+            conditions.append(condition)
+            args.extend(values)
+            shape += f'_{name}'
+    
+    execute(cur, _listing_statement(shape, conditions), (*args, limit + 1))
+    
+    rows = cur.fetchall()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1][9], rows[-1][0])
+    
+    payload = {'tournaments': TOURNAMENT_ROW.many(rows), 'next_cursor': next_cursor}
+    if cursor is None:
+        payload['sync_token'] = sync.window(cur, 'tournaments', None).token
+    return json_response(200, payload)
+
+def _changes(params: Dict[str, str], cur: Any) -> Dict[str, Any]:
+    if params.get('cursor') or params.get('status') or params.get('game_name'):
+        raise HttpError(400, 'since cannot be combined with cursor or filters')
+    since = sync.parse_since(params)
+    
+    execute(cur, CHANGED_TOURNAMENTS, (since, sync.delta_limit() + 1))
+    rows = TOURNAMENT_ROW.many(cur.fetchall())
+    
+    return json_response(200, sync.delta_payload('tournaments', rows, sync.window(cur, 'tournaments', since)))
+
+def _listing_statement(shape: str, conditions: list) -> Any:
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return statement(f'tournaments_list{shape}', f'''
+        SELECT 
+            t.id, t.name, t.game_name, t.roblox_server_url, 
+            t.max_players, t.prize_robux, t.current_players, 
+            t.status, t.start_date, t.created_at,
+            u.first_name, u.last_name, u.username
+        FROM tournaments t
+        LEFT JOIN users u ON t.creator_user_id = u.id
+        {where}
+        ORDER BY t.created_at DESC, t.id DESC
+        LIMIT %s
+    ''')
+
+@router.route('POST')
+@_invalidates_listing
+def create_tournament(request: Request) -> Dict[str, Any]:
+    body_data = request.body
+    name = body_data.get('name', '').strip()
+    game_name = body_data.get('game_name', '').strip()
+    roblox_server_url = body_data.get('roblox_server_url', '').strip()
+    max_players = body_data.get('max_players')
+    prize_robux = body_data.get('prize_robux')
+    user_id = request.user_id()
+    start_date = body_data.get('start_date')
+    
+    if not all([name, game_name, roblox_server_url, max_players, prize_robux]):
+        raise HttpError(400, 'All fields are required')
+    
+    if max_players < 2 or max_players > 1000:
+        raise HttpError(400, 'Max players must be between 2 and 1000')
+    
+    conn = request.conn
     cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO tournaments 
+        (name, game_name, roblox_server_url, max_players, prize_robux, creator_user_id, start_date)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING id, name, game_name, roblox_server_url, max_players, prize_robux, current_players, status, created_at
+    ''', (name, game_name, roblox_server_url, max_players, prize_robux, user_id, start_date))
     
-    if method == 'GET':
-        cur.execute('''
-            SELECT 
-                t.id, t.name, t.game_name, t.roblox_server_url, 
-                t.max_players, t.prize_robux, t.current_players, 
-                t.status, t.start_date, t.created_at,
-                u.first_name, u.last_name, u.username
-            FROM tournaments t
-            LEFT JOIN users u ON t.creator_user_id = u.id
-            ORDER BY t.created_at DESC
-        ''')
-        
-        rows = cur.fetchall()
-        tournaments = []
-        
-        for row in rows:
-            tournaments.append({
-                'id': row[0],
-                'name': row[1],
-                'game': row[2],
-                'robloxServerUrl': row[3],
-                'maxPlayers': row[4],
-                'prize': row[5],
-                'players': row[6],
-                'status': row[7],
-                'startDate': row[8].isoformat() if row[8] else None,
-                'createdAt': row[9].isoformat(),
-                'creator': {
-                    'first_name': row[10],
-                    'last_name': row[11],
-                    'username': row[12]
-                }
-            })
-        
+    row = cur.fetchone()
+    conn.commit()
+    cur.close()
+    
+    return json_response(201, {
+        'success': True,
+        'tournament': CREATED_ROW(row)
+    })
+
+@router.route('POST', 'join')
+@router.route('POST', 'leave')
+@_invalidates_listing
+def change_seat(request: Request) -> Dict[str, Any]:
+    cur = request.conn.cursor()
+    try:
+        return _change_seat(request.action, request.body.get('tournament_id'), request.user_id(), request.conn, cur)
+    finally:
         cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'tournaments': tournaments})
-        }
-    
-    if method == 'POST':
-        body_data = json.loads(event.get('body', '{}'))
-        
-        name = body_data.get('name', '').strip()
-        game_name = body_data.get('game_name', '').strip()
-        roblox_server_url = body_data.get('roblox_server_url', '').strip()
-        max_players = body_data.get('max_players')
-        prize_robux = body_data.get('prize_robux')
-        user_id = body_data.get('user_id')
-        start_date = body_data.get('start_date')
-        
-        if not all([name, game_name, roblox_server_url, max_players, prize_robux]):
-            cur.close()
-            conn.close()
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'All fields are required'})
-            }
-        
-        if max_players < 2 or max_players > 1000:
-            cur.close()
-            conn.close()
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Max players must be between 2 and 1000'})
-            }
-        
-        cur.execute('''
-            INSERT INTO tournaments 
-            (name, game_name, roblox_server_url, max_players, prize_robux, creator_user_id, start_date)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            RETURNING id, name, game_name, roblox_server_url, max_players, prize_robux, current_players, status, created_at
-        ''', (name, game_name, roblox_server_url, max_players, prize_robux, user_id, start_date))
-        
-        row = cur.fetchone()
-        conn.commit()
-        
-        tournament = {
-            'id': row[0],
-            'name': row[1],
-            'game': row[2],
-            'robloxServerUrl': row[3],
-            'maxPlayers': row[4],
-            'prize': row[5],
-            'players': row[6],
-            'status': row[7],
-            'createdAt': row[8].isoformat()
-        }
-        
+
+@router.route('POST', 'generate_bracket')
+@router.route('POST', 'report_results')
+@router.route('POST', 'next_round')
+@_invalidates_listing
+def bracket_action(request: Request) -> Dict[str, Any]:
+    user_id = request.user_id()
+    if not user_id:
+        raise HttpError(401, 'user_id is required')
+    cur = request.conn.cursor()
+    try:
+        return _bracket_action(request.action, request.body, user_id, request.conn, cur)
+    finally:
         cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 201,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': True,
-                'tournament': tournament
-            })
-        }
+
+def _change_seat(action: str, tournament_id: Any, user_id: Any, conn: Any, cur: Any) -> Dict[str, Any]:
+    if not tournament_id or not user_id:
+        return json_response(400, {'error': 'tournament_id and user_id are required'})
     
-    cur.close()
-    conn.close()
-    
-    return {
-        'statusCode': 405,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({'error': 'Method not allowed'})
-    }
+    if action == 'join':
+        execute(cur, JOIN_SEAT, (tournament_id, tournament_id, user_id, user_id))
+    else:
+        execute(cur, LEAVE_SEAT, (tournament_id, user_id))
+    
+    row = cur.fetchone()
+    if row is not None:
+        conn.commit()
+        return json_response(200, {
+            'success': True,
+            'joined': action == 'join',
+            'players': row[0],
+            'maxPlayers': row[1]
+        })
+    
+    conn.rollback()
+    cur.execute('''
+        SELECT t.current_players, t.max_players, t.status,
+               EXISTS (
+                   SELECT 1 FROM tournament_participants p
+                   WHERE p.tournament_id = t.id AND p.user_id = %s
+               )
+        FROM tournaments t
+        WHERE t.id = %s
+    ''', (user_id, tournament_id))
+    state = cur.fetchone()
+    conn.rollback()
+    
+    if state is None:
+        return json_response(404, {'error': 'Tournament not found'})
+    
+    players, max_players, status, is_participant = state
+    if is_participant == (action == 'join'):
+        return json_response(200, {
+            'success': True,
+            'joined': is_participant,
+            'players': players,
+            'maxPlayers': max_players
+        })
+    if status != 'registration':
+        return json_response(409, {'error': 'Registration is closed'})
+    return json_response(409, {'error': 'Tournament is full'})
+
+def _matches(tournament_id: str, cur: Any) -> Dict[str, Any]:
+    try:
+        tournament_id = int(tournament_id)
+    except ValueError:
+        return json_response(400, {'error': 'Invalid tournament_id'})
+    
+    bracket = brackets.load_bracket(cur, tournament_id)
+    return json_response(200, {
+        'matches': brackets.bracket_to_json(bracket),
+        'champion': bracket.champion()
+    })
+
+def _bracket_action(action: str, body_data: Dict[str, Any], user_id: Any, conn: Any, cur: Any) -> Dict[str, Any]:
+    tournament_id = body_data.get('tournament_id')
+    if not tournament_id:
+        return json_response(400, {'error': 'tournament_id is required'})
+    try:
+        tournament_id = int(tournament_id)
+    except (TypeError, ValueError):
+        return json_response(400, {'error': 'Invalid tournament_id'})
+    
+    cur.execute('''
+        SELECT bracket_format, creator_user_id, status,
+               EXISTS (SELECT 1 FROM tournament_matches WHERE tournament_id = t.id AND result_seq IS NOT NULL)
+        FROM tournaments t
+        WHERE id = %s
+        FOR UPDATE
+    ''', (tournament_id,))
+    row = cur.fetchone()
+    if row is None:
+        conn.rollback()
+        return json_response(404, {'error': 'Tournament not found'})
+    bracket_format, creator_user_id, status, has_results = row
+    
+    if creator_user_id is None or str(creator_user_id) != str(user_id):
+        conn.rollback()
+        return json_response(403, {'error': 'Only the tournament creator can manage the bracket'})
+    if status not in BRACKET_STATUSES[action]:
+        conn.rollback()
+        return json_response(409, {'error': f"{action} is not allowed while the tournament is {status}"})
+    if action == 'generate_bracket' and has_results:
+        conn.rollback()
+        return json_response(409, {'error': 'Results are already reported for this bracket'})
+    
+    try:
+        if action == 'generate_bracket':
+            bracket_format = body_data.get('format', 'single')
+            builder = BRACKET_BUILDERS.get(bracket_format)
+            if builder is None:
+                raise brackets.BracketError(f"format must be one of {', '.join(BRACKET_BUILDERS)}")
+            bracket = builder(_seeded_participants(cur, tournament_id))
+            brackets.copy_matches(cur, tournament_id, bracket)
+            cur.execute('UPDATE tournaments SET bracket_format = %s WHERE id = %s',
+                        (bracket_format, tournament_id))
+        elif action == 'report_results':
+            bracket = brackets.load_bracket(cur, tournament_id)
+            results = [(int(r['match']), int(r['winner'])) for r in body_data.get('results') or []]
+            changed = bracket.apply_results(results)
+            brackets.save_changes(cur, tournament_id, bracket, changed, (match for match, _ in results))
+        else:
+            if bracket_format != 'swiss':
+                raise brackets.BracketError('next_round is only available for swiss tournaments')
+            bracket = brackets.load_bracket(cur, tournament_id)
+            if not brackets.swiss_round_complete(bracket):
+                raise brackets.BracketError('Current round is not finished')
+            first_new = len(bracket)
+            brackets.swiss_round(_seeded_participants(cur, tournament_id), bracket)
+            brackets.append_matches(cur, tournament_id, bracket, first_new)
+    except (brackets.BracketError, KeyError, TypeError, ValueError) as exc:
+        conn.rollback()
+        return json_response(400, {'error': str(exc)})
+    
+    conn.commit()
+    return json_response(200, {
+        'success': True,
+        'format': bracket_format,
+        'matches': brackets.bracket_to_json(bracket),
+        'champion': bracket.champion()
+    })
+
+def _seeded_participants(cur: Any, tournament_id: int) -> list:
+    cur.execute('''
+        SELECT p.user_id
+        FROM tournament_participants p
+        JOIN users u ON u.id = p.user_id
+        WHERE p.tournament_id = %s
+        ORDER BY u.rating DESC NULLS LAST, p.joined_at, p.user_id
+    ''', (tournament_id,))
+    return [row[0] for row in cur.fetchall()]
+
+def _encode_cursor(created_at: datetime, tournament_id: int) -> str:
+    raw = f'{created_at.isoformat()}|{tournament_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, tournament_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(tournament_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError('Invalid cursor') from exc
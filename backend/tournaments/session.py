@@ -0,0 +1,52 @@
+'''
+Business: Compact HMAC-signed, expiring session tokens verified in-process without a users lookup
+Args: SESSION_SECRET - signing secret (sessions are disabled when unset), SESSION_TTL - token lifetime in seconds
+Returns: issue(user_id) -> (token, expires_at), verify(token) -> user ID or None
+'''
+
+import base64
+import hashlib
+import hmac
+import os
+import time
+from functools import lru_cache
+from typing import Optional, Tuple
+
+SESSION_SECRET = os.environ.get('SESSION_SECRET', '')
+SESSION_TTL = int(os.environ.get('SESSION_TTL', str(7 * 24 * 3600)))
+KEY_CONTEXT = b'roblox-tournament-creator/session/v1'
+
+
+@lru_cache(maxsize=4)
+def _signer(secret: str) -> 'hmac.HMAC':
+    key = hmac.new(secret.encode(), KEY_CONTEXT, hashlib.sha256).digest()
+    return hmac.new(key, digestmod=hashlib.sha256)
+
+
+def enabled() -> bool:
+    return bool(SESSION_SECRET)
+
+
+def issue(user_id: int, ttl: Optional[int] = None, now: Optional[float] = None) -> Tuple[str, int]:
+    expires_at = int(time.time() if now is None else now) + (SESSION_TTL if ttl is None else ttl)
+    claims = f'{int(user_id)}.{expires_at}'
+    return f'{claims}.{_sign(claims).decode()}', expires_at
+
+
+def verify(token: str, now: Optional[float] = None) -> Optional[int]:
+    claims, _, signature = token.rpartition('.')
+    if not claims or not hmac.compare_digest(_sign(claims), signature.encode('utf-8', 'replace')):
+        return None
+    user_id, _, expires_at = claims.partition('.')
+    try:
+        if int(expires_at) <= (time.time() if now is None else now):
+            return None
+        return int(user_id)
+    except ValueError:
+        return None
+
+
+def _sign(claims: str) -> bytes:
+    mac = _signer(SESSION_SECRET).copy()
+    mac.update(claims.encode())
+    return base64.urlsafe_b64encode(mac.digest()).rstrip(b'=')
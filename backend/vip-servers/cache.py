@@ -0,0 +1,88 @@
+'''
+Business: In-process read-through cache of serialized GET responses with ETag support
+Args: RESPONSE_CACHE_TTL - seconds a cached body stays valid without an explicit invalidation,
+      RESPONSE_CACHE_SIZE - max number of distinct query parameter sets kept
+Returns: ResponseCache instances and conditional_response() builder
+'''
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class CachedBody:
+    __slots__ = ('body', 'etag', 'expires_at')
+
+    def __init__(self, body: str, ttl: float):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'
+        self.expires_at = time.monotonic() + ttl
+
+
+class ResponseCache:
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else float(os.environ.get('RESPONSE_CACHE_TTL', '10'))
+        self.max_entries = max_entries or int(os.environ.get('RESPONSE_CACHE_SIZE', '256'))
+        self._entries: 'OrderedDict[Tuple, CachedBody]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(params: Dict[str, Any]) -> Tuple:
+        return tuple(sorted((k, str(v)) for k, v in params.items() if v not in (None, '')))
+
+    def get(self, key: Tuple) -> Optional[CachedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: Tuple, body: str) -> CachedBody:
+        entry = CachedBody(body, self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def conditional_response(entry: CachedBody, request_headers: Optional[Dict[str, str]]) -> Dict[str, Any]:
+    headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Expose-Headers': 'ETag',
+        'Cache-Control': 'public, max-age=0, must-revalidate',
+        'ETag': entry.etag
+    }
+    if_none_match = _header(request_headers, 'If-None-Match')
+    if if_none_match and _etag_matches(if_none_match, entry.etag):
+        return {'statusCode': 304, 'headers': headers, 'body': ''}
+    return {'statusCode': 200, 'headers': headers, 'body': entry.body}
+
+
+def _header(headers: Optional[Dict[str, str]], name: str) -> Optional[str]:
+    if not headers:
+        return None
+    lowered = name.lower()
+    for key, value in headers.items():
+        if key.lower() == lowered:
+            return value
+    return None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(','))
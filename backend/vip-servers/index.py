@@ -5,156 +5,163 @@ Args: event - dict with httpMethod, body, queryStringParameters
 Returns: HTTP response dict with VIP servers data
 '''
 
-import json
-import os
-import psycopg2
 import re
-from typing import Dict, Any
-import urllib.request
+from typing import Dict, Any, NamedTuple, Optional
+from urllib.parse import parse_qs, urlsplit
 
+from cache import ResponseCache, conditional_response
+from core import HttpError, Request, Router, RowSerializer, iso, json_response
+from db import execute, statement
+from games import GameCache
+from ratelimit import Limiter
+from timing import instrumented
+import sync
+
+PLACE_ID_PATTERN = re.compile(r'^(?:/[a-z]{2}(?:-[a-z]{2})?)?/games/(\d+)(?:/|$)', re.IGNORECASE)
+LINK_CODE_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+ROBLOX_HOSTS = ('roblox.com', 'www.roblox.com', 'web.roblox.com', 'm.roblox.com')
+
+LIST_SERVERS = statement('vip_servers_list', '''
+    SELECT 
+        v.id, v.game_name, v.server_url, v.online_players, 
+        v.max_players, v.created_at,
+        u.first_name, u.last_name, u.username, u.roblox_username
+    FROM vip_servers v
+    LEFT JOIN users u ON v.creator_user_id = u.id
+    ORDER BY v.bumped_at DESC, v.id DESC
+''')
+CHANGED_SERVERS = statement('vip_servers_changed', '''
+    SELECT 
+        v.id, v.game_name, v.server_url, v.online_players, 
+        v.max_players, v.created_at,
+        u.first_name, u.last_name, u.username, u.roblox_username
+    FROM vip_servers v
+    LEFT JOIN users u ON v.creator_user_id = u.id
+    WHERE v.updated_at > %s
+    ORDER BY v.updated_at, v.id
+    LIMIT %s
+''')
+UPSERT_SERVER = statement('vip_servers_upsert', '''
+    INSERT INTO vip_servers AS v
+    (game_name, server_url, creator_user_id, online_players, max_players, place_id, link_code)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT ((COALESCE(place_id, 0)), link_code) WHERE link_code IS NOT NULL
+    DO UPDATE SET post_count = v.post_count + 1, bumped_at = CURRENT_TIMESTAMP
+    RETURNING id, online_players, max_players, (xmax <> 0) AS bumped
+''')
+
+
+class ServerKey(NamedTuple):
+    place_id: Optional[int]
+    link_code: str
+    url: str
+
+
+SERVER_ROW = RowSerializer(
+    ('id', 0, None),
+    ('game_name', 1, None),
+    ('server_url', 2, None),
+    ('online_players', 3, None),
+    ('max_players', 4, None),
+    ('created_at', 5, iso),
+    ('creator_name', None, lambda row: row[9] if row[9] else f"{row[6]} {row[7]}" if row[6] else "Unknown")
+)
+
+listing_cache = ResponseCache()
+game_cache = GameCache()
+router = Router('GET, POST, DELETE, OPTIONS', limiter=Limiter('vip-servers'))
+
+@instrumented
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    method: str = event.get('httpMethod', 'GET')
+    return router.dispatch(event, context)
+
+@router.route('GET')
+def list_servers(request: Request) -> Dict[str, Any]:
+    cache_key = ResponseCache.key(request.query)
+    entry = listing_cache.get(cache_key)
+    if entry is None:
+        since = sync.parse_since(request.query)
+        cur = request.conn.cursor()
+        try:
+            if since is not None:
+                execute(cur, CHANGED_SERVERS, (since, sync.delta_limit() + 1))
+                servers = SERVER_ROW.many(cur.fetchall())
+                payload = sync.delta_payload('servers', servers, sync.window(cur, 'vip_servers', since))
+            else:
+                execute(cur, LIST_SERVERS)
+                servers = SERVER_ROW.many(cur.fetchall())
+                payload = {'servers': servers, 'sync_token': sync.window(cur, 'vip_servers', None).token}
+        finally:
+            cur.close()
+        entry = listing_cache.put(cache_key, json_response(200, payload)['body'])
+    return conditional_response(entry, request.event.get('headers'))
+
+@router.route('POST')
+def add_server(request: Request) -> Dict[str, Any]:
+    body_data = request.body
+    game_name = body_data.get('game_name', '').strip()
+    server_url = body_data.get('server_url', '').strip()
+    user_id = request.user_id()
+    
+    if not all([game_name, server_url]):
+        raise HttpError(400, 'Game name and server URL are required')
+    
+    key = canonical_server(server_url)
+    if key is None:
+        raise HttpError(400, 'Invalid Roblox server URL')
     
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
+    online_players = 0
+    max_players = 50
     
-    database_url = os.environ.get('DATABASE_URL')
-    conn = psycopg2.connect(database_url)
+    conn = request.conn
     cur = conn.cursor()
+    game = game_cache.get(cur, key.place_id) if key.place_id is not None else None
+    if game is not None and game.found:
+        online_players = game.playing or 0
+        max_players = game.max_players or max_players
     
-    if method == 'GET':
-        cur.execute('''
-            SELECT 
-                v.id, v.game_name, v.server_url, v.online_players, 
-                v.max_players, v.created_at,
-                u.first_name, u.last_name, u.username, u.roblox_username
-            FROM vip_servers v
-            LEFT JOIN users u ON v.creator_user_id = u.id
-            ORDER BY v.created_at DESC
-        ''')
-        
-        rows = cur.fetchall()
-        servers = []
-        
-        for row in rows:
-            creator_name = row[9] if row[9] else f"{row[6]} {row[7]}" if row[6] else "Unknown"
-            servers.append({
-                'id': row[0],
-                'game_name': row[1],
-                'server_url': row[2],
-                'online_players': row[3],
-                'max_players': row[4],
-                'created_at': row[5].isoformat(),
-                'creator_name': creator_name
-            })
-        
-        cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'servers': servers})
-        }
+    execute(cur, UPSERT_SERVER, (game_name, key.url, user_id, online_players, max_players, key.place_id, key.link_code))
+    server_id, online_players, max_players, bumped = cur.fetchone()
     
-    if method == 'POST':
-        body_data = json.loads(event.get('body', '{}'))
-        
-        game_name = body_data.get('game_name', '').strip()
-        server_url = body_data.get('server_url', '').strip()
-        user_id = body_data.get('user_id')
-        
-        if not all([game_name, server_url]):
-            cur.close()
-            conn.close()
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Game name and server URL are required'})
-            }
-        
-        if 'roblox.com' not in server_url:
-            cur.close()
-            conn.close()
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Invalid Roblox server URL'})
-            }
-        
-        online_players = 0
-        max_players = 50
-        
-        place_id_match = re.search(r'/games/(\d+)', server_url)
-        if place_id_match:
-            place_id = place_id_match.group(1)
-            try:
-                req = urllib.request.Request(
-                    f'https://games.roblox.com/v1/games?universeIds={place_id}',
-                    headers={'User-Agent': 'Mozilla/5.0'}
-                )
-                with urllib.request.urlopen(req, timeout=5) as response:
-                    data = json.loads(response.read())
-                    if data.get('data') and len(data['data']) > 0:
-                        game_data = data['data'][0]
-                        online_players = game_data.get('playing', 0)
-                        max_players = game_data.get('maxPlayers', 50)
-            except:
-                pass
-        
+    if key.place_id is not None and game is None:
         cur.execute('''
-            INSERT INTO vip_servers 
-            (game_name, server_url, creator_user_id, online_players, max_players)
-            VALUES (%s, %s, %s, %s, %s)
-            RETURNING id, created_at
-        ''', (game_name, server_url, user_id, online_players, max_players))
-        
-        row = cur.fetchone()
-        conn.commit()
-        
-        cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 201,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': True,
-                'server_id': row[0],
-                'online_players': online_players,
-                'max_players': max_players
-            })
-        }
+            INSERT INTO vip_stats_queue (place_id)
+            VALUES (%s)
+            ON CONFLICT (place_id) DO NOTHING
+        ''', (key.place_id,))
     
+    conn.commit()
     cur.close()
-    conn.close()
+    listing_cache.invalidate()
+    
+    return json_response(200 if bumped else 201, {
+        'success': True,
+        'server_id': server_id,
+        'bumped': bumped,
+        'server_url': key.url,
+        'online_players': online_players,
+        'max_players': max_players
+    })
+
+def canonical_server(server_url: str) -> Optional[ServerKey]:
+    parts = urlsplit(server_url if '://' in server_url else f'https://{server_url}')
+    if parts.scheme not in ('http', 'https') or (parts.hostname or '') not in ROBLOX_HOSTS:
+        return None
+    query = parse_qs(parts.query, keep_blank_values=True)
+    
+    if parts.path.rstrip('/') == '/share':
+        code = (query.get('code') or [''])[0].strip()
+        if not LINK_CODE_PATTERN.match(code) or (query.get('type') or ['Server'])[0] != 'Server':
+            return None
+        return ServerKey(None, f'share:{code}', f'https://www.roblox.com/share?code={code}&type=Server')
     
-    return {
-        'statusCode': 405,
-        'headers': {
-            'Content-Type': 'application/json',
-            'Access-Control-Allow-Origin': '*'
-        },
-        'body': json.dumps({'error': 'Method not allowed'})
-    }
+    place_id_match = PLACE_ID_PATTERN.match(parts.path)
+    if place_id_match is None:
+        return None
+    place_id = int(place_id_match.group(1))
+    if 'privateServerLinkCode' not in query:
+        return ServerKey(place_id, '', f'https://www.roblox.com/games/{place_id}')
+    code = query['privateServerLinkCode'][0].strip()
+    if not LINK_CODE_PATTERN.match(code):
+        return None
+    return ServerKey(place_id, code, f'https://www.roblox.com/games/{place_id}?privateServerLinkCode={code}')
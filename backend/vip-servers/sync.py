@@ -0,0 +1,58 @@
+'''
+Business: "Changed since" delta sync shared by listing endpoints, backed by updated_at and the tombstones table
+Args: SYNC_OVERLAP_SECONDS - how far each sync token reaches back to cover writes still committing when it was issued,
+      SYNC_DELTA_LIMIT - max changed rows per delta before the client is told to reload in full
+Returns: parse_since(params), window(cur, entity, since) -> SyncWindow with next token, deleted IDs and reload flag
+'''
+
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from core import HttpError, iso, warm
+from db import execute, statement
+
+TOMBSTONE_RETENTION_DAYS = 30
+
+SYNC_WINDOW = statement('sync_window', '''
+    SELECT
+        LOCALTIMESTAMP - make_interval(secs => %s),
+        %s::timestamp < LOCALTIMESTAMP - make_interval(days => %s),
+        ARRAY(
+            SELECT entity_id FROM tombstones
+            WHERE entity = %s AND deleted_at > %s
+            ORDER BY entity_id
+        )
+''')
+
+
+class SyncWindow(NamedTuple):
+    token: str
+    deleted: List[int]
+    expired: bool
+
+
+def parse_since(params: Dict[str, str]) -> Optional[datetime]:
+    since = params.get('since')
+    if not since:
+        return None
+    try:
+        return datetime.fromisoformat(since)
+    except ValueError:
+        raise HttpError(400, 'Invalid since timestamp')
+
+
+def delta_limit() -> int:
+    return warm.setting('SYNC_DELTA_LIMIT', '500', int)
+
+
+def window(cur: Any, entity: str, since: Optional[datetime]) -> SyncWindow:
+    overlap = warm.setting('SYNC_OVERLAP_SECONDS', '30', float)
+    execute(cur, SYNC_WINDOW, (overlap, since, TOMBSTONE_RETENTION_DAYS, entity, since))
+    token, expired, deleted = cur.fetchone()
+    return SyncWindow(iso(token), deleted if since is not None else [], bool(expired))
+
+
+def delta_payload(key: str, rows: List[Dict[str, Any]], sync: SyncWindow) -> Dict[str, Any]:
+    if sync.expired or len(rows) > delta_limit():
+        return {key: [], 'deleted': [], 'full': True, 'sync_token': sync.token}
+    return {key: rows, 'deleted': sync.deleted, 'full': False, 'sync_token': sync.token}
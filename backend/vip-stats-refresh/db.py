@@ -0,0 +1,258 @@
+'''
+Business: Process-wide PostgreSQL connection pool reused across warm invocations
+Args: DATABASE_URL - connection string, DB_POOL_SIZE - max open connections,
+      DB_POOL_TIMEOUT - seconds to wait for a free connection,
+      DB_POOL_CHECK_INTERVAL - idle seconds after which a connection is pinged on checkout,
+      DB_PREPARED_STATEMENTS - set to 0 to send registered statements as plain SQL (e.g. behind PgBouncer)
+Returns: connection() context manager, pool_stats() counters (also logged in the perf_histogram snapshot)
+         and the prepared statement registry
+'''
+
+import os
+import re
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import timing
+
+psycopg2: Any = None
+_timed_cursor: Any = None
+
+PREPARED_STATEMENTS = os.environ.get('DB_PREPARED_STATEMENTS', '1') != '0'
+INVALID_STATEMENT_NAME = '26000'
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, dsn: str, max_size: int, timeout: float, check_interval: float):
+        self.dsn = dsn
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self._idle: List[Tuple[Any, float]] = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats: Dict[str, int] = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'reconnects': 0,
+            'discarded': 0
+        }
+
+    def acquire(self) -> Any:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while not self._idle and self._in_use >= self.max_size:
+                self._stats['waits'] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout('No free database connection')
+                self._cond.wait(remaining)
+            entry = self._idle.pop() if self._idle else None
+            self._in_use += 1
+
+        try:
+            if entry is not None:
+                conn, last_used = entry
+                if self._is_healthy(conn, last_used):
+                    self._count('hits')
+                    return conn
+                self._close_quietly(conn)
+                self._count('reconnects')
+            else:
+                self._count('misses')
+            return _connect(self.dsn)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: Any, broken: bool = False) -> None:
+        if not broken and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except psycopg2.Error:
+                broken = True
+
+        keep = not broken and not conn.closed
+        with self._cond:
+            self._in_use -= 1
+            if keep:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._stats['discarded'] += 1
+            self._cond.notify()
+
+        if not keep:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot['idle'] = len(self._idle)
+            snapshot['in_use'] = self._in_use
+            snapshot['max_size'] = self.max_size
+        return snapshot
+
+    def close(self) -> None:
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def _is_healthy(self, conn: Any, last_used: float) -> bool:
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - last_used < self.check_interval:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.fetchone()
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _count(self, key: str) -> None:
+        with self._cond:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _close_quietly(conn: Any) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _driver() -> Any:
+    global psycopg2
+    if psycopg2 is None:
+        import psycopg2.extensions
+    return psycopg2
+
+
+def _connect(dsn: str) -> Any:
+    if not timing.ENABLED:
+        return _driver().connect(dsn)
+    global _timed_cursor
+    if _timed_cursor is None:
+        class TimedCursor(_driver().extensions.cursor):
+            def execute(self, query: Any, vars: Any = None) -> Any:
+                with timing.sql_phase(query):
+                    return super().execute(query, vars)
+
+        _timed_cursor = TimedCursor
+    return psycopg2.connect(dsn, cursor_factory=_timed_cursor)
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    dsn=os.environ.get('DATABASE_URL', ''),
+                    max_size=int(os.environ.get('DB_POOL_SIZE', '2')),
+                    timeout=float(os.environ.get('DB_POOL_TIMEOUT', '5')),
+                    check_interval=float(os.environ.get('DB_POOL_CHECK_INTERVAL', '10'))
+                )
+                timing.snapshot_source('pool', _pool.stats)
+    return _pool
+
+
+@contextmanager
+def connection() -> Iterator[Any]:
+    pool = get_pool()
+    with timing.phase('db.connect'):
+        conn = pool.acquire()
+    broken = False
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        pool.release(conn, broken)
+
+
+def pool_stats() -> Dict[str, int]:
+    return get_pool().stats()
+
+
+def execute_values(cur: Any, sql: str, argslist: Any, **kwargs: Any) -> Any:
+    from psycopg2.extras import execute_values as run
+    return run(cur, sql, argslist, **kwargs)
+
+
+class Statement:
+    __slots__ = ('name', 'sql', 'prepare_sql', 'execute_sql')
+
+    def __init__(self, name: str, sql: str):
+        if not re.fullmatch(r'[a-z_][a-z0-9_]*', name):
+            raise ValueError(f'Invalid statement name: {name}')
+        parts = sql.split('%s')
+        text = parts[0] + ''.join(f'${i}{part}' for i, part in enumerate(parts[1:], 1))
+        self.name = name
+        self.sql = sql
+        self.prepare_sql = f"PREPARE {name} AS {text.replace('%%', '%')}"
+        self.execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * (len(parts) - 1))})" if len(parts) > 1 else f'EXECUTE {name}'
+
+
+_statements: Dict[str, Statement] = {}
+_prepared: 'weakref.WeakKeyDictionary[Any, Set[str]]' = weakref.WeakKeyDictionary()
+
+
+def statement(name: str, sql: str) -> Statement:
+    registered = _statements.get(name)
+    if registered is None:
+        registered = _statements.setdefault(name, Statement(name, sql))
+        timing.name_sql(registered.sql, registered.name)
+    return registered
+
+
+def execute(cur: Any, stmt: Statement, args: Sequence[Any] = ()) -> None:
+    if not PREPARED_STATEMENTS:
+        cur.execute(stmt.sql, args)
+        return
+
+    conn = cur.connection
+    names = _prepared.get(conn)
+    if names is None:
+        names = _prepared.setdefault(conn, set())
+    if stmt.name not in names:
+        cur.execute(stmt.prepare_sql)
+        names.add(stmt.name)
+        cur.execute(stmt.execute_sql, args)
+        return
+
+    idle = conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    try:
+        cur.execute(stmt.execute_sql, args)
+    except psycopg2.Error as exc:
+        if exc.pgcode != INVALID_STATEMENT_NAME:
+            raise
+        names.clear()
+        if not idle:
+            raise
+        conn.rollback()
+        cur.execute(stmt.prepare_sql)
+        names.add(stmt.name)
+        cur.execute(stmt.execute_sql, args)
@@ -0,0 +1,229 @@
+'''
+Business: Cached Roblox game metadata keyed by place ID (in-process LRU in front of roblox_game_cache)
+          and the batched Roblox fetch that fills it (place ID -> universe ID -> games API)
+Args: GAME_CACHE_TTL - seconds a found entry stays fresh, GAME_CACHE_NEGATIVE_TTL - seconds an
+      unknown/failed place ID stays cached, GAME_CACHE_SIZE - max entries kept in process,
+      ROBLOX_GAMES_API / ROBLOX_UNIVERSES_API - API base URLs (point them at a stub server in tests),
+      VIP_REFRESH_BATCH_SIZE / VIP_REFRESH_WORKERS / VIP_REFRESH_RETRIES / VIP_REFRESH_TIMEOUT - fetch tuning
+Returns: GameCache with get() / store(), fetch_game_info() and SingleFlight deduplication helper
+'''
+
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from db import execute_values
+from timing import bind, phase
+
+ROBLOX_GAMES_API = os.environ.get('ROBLOX_GAMES_API', 'https://games.roblox.com')
+ROBLOX_UNIVERSES_API = os.environ.get('ROBLOX_UNIVERSES_API', 'https://apis.roblox.com')
+BATCH_SIZE = int(os.environ.get('VIP_REFRESH_BATCH_SIZE', '50'))
+MAX_WORKERS = int(os.environ.get('VIP_REFRESH_WORKERS', '4'))
+MAX_RETRIES = int(os.environ.get('VIP_REFRESH_RETRIES', '3'))
+REQUEST_TIMEOUT = float(os.environ.get('VIP_REFRESH_TIMEOUT', '5'))
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+MISSING_STATUSES = (400, 404)
+
+
+class GameInfo(NamedTuple):
+    place_id: int
+    name: Optional[str]
+    max_players: Optional[int]
+    playing: Optional[int]
+    found: bool
+    fetched_at: datetime
+    universe_id: Optional[int] = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, Dict[str, Any]] = {}
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as exc:
+            call['error'] = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+
+
+class GameCache:
+    def __init__(self, ttl: Optional[float] = None, negative_ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        self.ttl = timedelta(seconds=ttl if ttl is not None else float(os.environ.get('GAME_CACHE_TTL', '300')))
+        self.negative_ttl = timedelta(
+            seconds=negative_ttl if negative_ttl is not None else float(os.environ.get('GAME_CACHE_NEGATIVE_TTL', '60'))
+        )
+        self.max_entries = max_entries or int(os.environ.get('GAME_CACHE_SIZE', '1024'))
+        self._entries: 'OrderedDict[int, GameInfo]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+
+    def is_fresh(self, info: GameInfo, now: Optional[datetime] = None) -> bool:
+        age = (now or datetime.utcnow()) - info.fetched_at
+        return age < (self.ttl if info.found else self.negative_ttl)
+
+    def get(self, cur: Any, place_id: int) -> Optional[GameInfo]:
+        with self._lock:
+            info = self._entries.get(place_id)
+            if info is not None:
+                self._entries.move_to_end(place_id)
+        if info is not None and self.is_fresh(info):
+            return info
+
+        info = self._flight.do(place_id, lambda: self._load(cur, place_id))
+        if info is not None and self.is_fresh(info):
+            return info
+        return None
+
+    def store(self, cur: Any, infos: Iterable[GameInfo]) -> None:
+        rows = list(infos)
+        if not rows:
+            return
+        execute_values(cur, '''
+            INSERT INTO roblox_game_cache (place_id, name, max_players, playing, found, fetched_at, universe_id)
+            VALUES %s
+            ON CONFLICT (place_id) DO UPDATE SET
+                name = COALESCE(EXCLUDED.name, roblox_game_cache.name),
+                max_players = COALESCE(EXCLUDED.max_players, roblox_game_cache.max_players),
+                playing = EXCLUDED.playing,
+                found = EXCLUDED.found,
+                fetched_at = EXCLUDED.fetched_at,
+                universe_id = COALESCE(EXCLUDED.universe_id, roblox_game_cache.universe_id)
+        ''', rows, page_size=len(rows))
+        for info in rows:
+            self._remember(info)
+
+    def _load(self, cur: Any, place_id: int) -> Optional[GameInfo]:
+        cur.execute('''
+            SELECT place_id, name, max_players, playing, found, fetched_at, universe_id
+            FROM roblox_game_cache
+            WHERE place_id = %s
+        ''', (place_id,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        info = GameInfo(*row)
+        self._remember(info)
+        return info
+
+    def _remember(self, info: GameInfo) -> None:
+        with self._lock:
+            self._entries[info.place_id] = info
+            self._entries.move_to_end(info.place_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def fetch_game_info(place_ids: Iterable[int], universes: Optional[Dict[int, int]] = None,
+                    retries: int = MAX_RETRIES) -> Tuple[Dict[int, GameInfo], set]:
+    unique_ids = sorted(set(place_ids))
+    universes = {place_id: universes[place_id] for place_id in unique_ids if universes and place_id in universes}
+    infos: Dict[int, GameInfo] = {}
+    failed: set = set()
+    if not unique_ids:
+        return infos, failed
+
+    unresolved = [place_id for place_id in unique_ids if place_id not in universes]
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(unique_ids)))) as pool:
+        resolve = bind(lambda place_id: _resolve_universe(place_id, retries))
+        for place_id, universe_id in zip(unresolved, pool.map(resolve, unresolved)):
+            if universe_id is None:
+                failed.add(place_id)
+            elif universe_id == 0:
+                infos[place_id] = GameInfo(place_id, None, None, None, False, datetime.utcnow())
+            else:
+                universes[place_id] = universe_id
+
+        places_by_universe: Dict[int, List[int]] = {}
+        for place_id, universe_id in universes.items():
+            places_by_universe.setdefault(universe_id, []).append(place_id)
+        universe_ids = sorted(places_by_universe)
+        batches = [universe_ids[i:i + BATCH_SIZE] for i in range(0, len(universe_ids), BATCH_SIZE)]
+        fetch = bind(lambda batch: _fetch_batch(batch, retries))
+        for batch, result in zip(batches, pool.map(fetch, batches)):
+            batch_places = [place_id for universe_id in batch for place_id in places_by_universe[universe_id]]
+            if result is None:
+                failed.update(batch_places)
+                continue
+            fetched_at = datetime.utcnow()
+            for universe_id in batch:
+                game = result.get(universe_id)
+                for place_id in places_by_universe[universe_id]:
+                    if game is None:
+                        infos[place_id] = GameInfo(place_id, None, None, None, False, fetched_at, universe_id)
+                    else:
+                        infos[place_id] = GameInfo(
+                            place_id,
+                            game.get('name'),
+                            int(game.get('maxPlayers') or 50),
+                            int(game.get('playing') or 0),
+                            True,
+                            fetched_at,
+                            universe_id
+                        )
+
+    return infos, failed
+
+
+def _resolve_universe(place_id: int, retries: int) -> Optional[int]:
+    url = f"{ROBLOX_UNIVERSES_API.rstrip('/')}/universes/v1/places/{place_id}/universe"
+    data = _get_json(url, 'http.roblox_universes', retries, MISSING_STATUSES)
+    if data is None:
+        return None
+    return int(data.get('universeId') or 0)
+
+
+def _fetch_batch(universe_ids: List[int], retries: int) -> Optional[Dict[int, Any]]:
+    url = f"{ROBLOX_GAMES_API.rstrip('/')}/v1/games?universeIds={','.join(str(i) for i in universe_ids)}"
+    data = _get_json(url, 'http.roblox_games', retries)
+    if data is None:
+        return None
+    return {int(game['id']): game for game in data.get('data') or [] if game.get('id') is not None}
+
+
+def _get_json(url: str, name: str, retries: int, missing: tuple = ()) -> Optional[Dict[str, Any]]:
+    import urllib.error
+    import urllib.request
+
+    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    for attempt in range(retries + 1):
+        try:
+            with phase(name), urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as response:
+                return json.loads(response.read()) or {}
+        except urllib.error.HTTPError as exc:
+            if exc.code in missing:
+                return {}
+            if exc.code not in RETRYABLE_STATUSES:
+                return None
+        except (urllib.error.URLError, TimeoutError, ValueError):
+            pass
+        if attempt < retries:
+            time.sleep(min(8.0, 0.25 * 2 ** attempt) * (1 + random.random()))
+
+    return None
@@ -0,0 +1,129 @@
+'''
+Business: Refresh VIP server player counts and cached game metadata from the Roblox games API in batches
+Args: event - dict with httpMethod, headers (X-Cron-Secret), queryStringParameters (scope: queued or all)
+      context - object with attributes: request_id, function_name
+Returns: HTTP response dict with refresh summary
+'''
+
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+
+from cron import HEADER, rejected
+from db import connection, execute_values
+from games import GameCache, GameInfo, fetch_game_info
+from timing import instrumented
+
+game_cache = GameCache()
+
+@instrumented
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    method: str = event.get('httpMethod', 'GET')
+
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': f'Content-Type, X-User-Id, {HEADER}',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': ''
+        }
+
+    denied = rejected(event)
+    if denied is not None:
+        return denied
+
+    params = event.get('queryStringParameters', {}) or {}
+    scope = params.get('scope', 'all')
+    if scope not in ('queued', 'all'):
+        return {
+            'statusCode': 400,
+            'headers': {
+                'Content-Type': 'application/json',
+                'Access-Control-Allow-Origin': '*'
+            },
+            'body': json.dumps({'error': 'scope must be queued or all'})
+        }
+
+    summary = refresh(scope)
+
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps(summary)
+    }
+
+def refresh(scope: str = 'all') -> Dict[str, Any]:
+    with connection() as conn:
+        cur = conn.cursor()
+        if scope == 'queued':
+            cur.execute('''
+                UPDATE vip_stats_queue SET claimed_at = CURRENT_TIMESTAMP
+                WHERE place_id IN (
+                    SELECT place_id FROM vip_stats_queue
+                    WHERE claimed_at IS NULL OR claimed_at < CURRENT_TIMESTAMP - INTERVAL '5 minutes'
+                    ORDER BY enqueued_at
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING place_id
+            ''')
+        else:
+            cur.execute('SELECT DISTINCT place_id FROM vip_servers WHERE place_id IS NOT NULL')
+        place_ids = [row[0] for row in cur.fetchall()]
+        cached, universes = _cache_entries(cur, place_ids)
+        conn.commit()
+        cur.close()
+
+    if not place_ids:
+        return {'requested': 0, 'cached': 0, 'fetched': 0, 'updated': 0, 'failed': 0}
+
+    fetched, failed = fetch_game_info([place_id for place_id in place_ids if place_id not in cached], universes)
+    found = [info for info in list(cached.values()) + list(fetched.values()) if info.found]
+    done = [place_id for place_id in place_ids if place_id not in failed]
+
+    updated = 0
+    with connection() as conn:
+        cur = conn.cursor()
+        game_cache.store(cur, fetched.values())
+        if found:
+            execute_values(cur, '''
+                UPDATE vip_servers v
+                SET online_players = s.playing, max_players = s.max_players
+                FROM (VALUES %s) AS s(place_id, playing, max_players)
+                WHERE v.place_id = s.place_id
+            ''', [(info.place_id, info.playing or 0, info.max_players or 50) for info in found],
+                template='(%s::bigint, %s::integer, %s::integer)', page_size=len(found))
+            updated = cur.rowcount
+        if done:
+            cur.execute('DELETE FROM vip_stats_queue WHERE place_id = ANY(%s)', (done,))
+        if failed:
+            cur.execute('UPDATE vip_stats_queue SET claimed_at = NULL WHERE place_id = ANY(%s)', (list(failed),))
+        conn.commit()
+        cur.close()
+
+    return {
+        'requested': len(place_ids),
+        'cached': len(cached),
+        'fetched': len(fetched),
+        'updated': updated,
+        'failed': len(failed)
+    }
+
+def _cache_entries(cur: Any, place_ids: List[int]) -> Tuple[Dict[int, GameInfo], Dict[int, int]]:
+    if not place_ids:
+        return {}, {}
+    cur.execute('''
+        SELECT place_id, name, max_players, playing, found, fetched_at, universe_id
+        FROM roblox_game_cache
+        WHERE place_id = ANY(%s)
+    ''', (place_ids,))
+    now = datetime.utcnow()
+    entries = [GameInfo(*row) for row in cur.fetchall()]
+    fresh = {info.place_id: info for info in entries if game_cache.is_fresh(info, now)}
+    return fresh, {info.place_id: info.universe_id for info in entries if info.universe_id}
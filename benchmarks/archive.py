@@ -0,0 +1,182 @@
+'''
+Business: Measure how archiving resolved reports and finished tournaments shrinks the hot tables and their listing queries
+Args: --dsn - disposable local Postgres with migrations applied, --reports - reports spread over --months of history,
+      --tournaments - finished tournaments over the same history, --open-share - fraction of reports still pending,
+      --repeat - timed runs per query
+Returns: prints hot table and index sizes plus listing latency before and after one archiver pass;
+         exits 1 when rows are lost or duplicated, the hot set does not shrink or the retention cut keeps expired months
+'''
+
+import argparse
+import os
+import sys
+import time
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = 'archivebench'
+TELEGRAM_ID_BASE = 8_000_000_000_000
+
+QUERIES = {
+    'reports latest': '''
+        SELECT id, reported_player_name, report_type, description, status, created_at, report_count
+        FROM player_reports ORDER BY created_at DESC LIMIT 50
+    ''',
+    'reports queue': '''
+        SELECT id FROM player_reports
+        WHERE status = 'pending' OR (status = 'in_review' AND claimed_at < CURRENT_TIMESTAMP - INTERVAL '15 minutes')
+        ORDER BY created_at LIMIT 20
+    ''',
+    'tournaments page': '''
+        SELECT id, name, status, created_at FROM tournaments ORDER BY created_at DESC, id DESC LIMIT 20
+    '''
+}
+
+
+def hot_sizes(cur) -> dict:
+    cur.execute('''
+        SELECT relname, pg_relation_size(oid), pg_indexes_size(oid)
+        FROM pg_class WHERE relname IN ('player_reports', 'tournaments')
+    ''')
+    return {name: (heap, indexes) for name, heap, indexes in cur.fetchall()}
+
+
+def time_queries(cur, repeat: int) -> dict:
+    timings = {}
+    for name, sql in QUERIES.items():
+        cur.execute(sql)
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cur.execute(sql)
+            cur.fetchall()
+            samples.append((time.perf_counter() - started) * 1000)
+        samples.sort()
+        timings[name] = samples[len(samples) // 2]
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--reports', type=int, default=500_000)
+    parser.add_argument('--tournaments', type=int, default=50_000)
+    parser.add_argument('--months', type=int, default=30)
+    parser.add_argument('--open-share', type=float, default=0.02)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.dsn
+    os.environ['REPORT_RETENTION_MONTHS'] = '24'
+    os.environ['TOURNAMENT_RETENTION_MONTHS'] = '0'
+    os.environ['ARCHIVE_TIME_BUDGET'] = '3600'
+    sys.path.insert(0, os.path.join(ROOT, 'backend', 'archiver'))
+    import index
+
+    conn = psycopg2.connect(args.dsn)
+    cur = conn.cursor()
+    cur.execute("INSERT INTO users (telegram_id, username) VALUES (%s, %s) RETURNING id", (TELEGRAM_ID_BASE, MARKER))
+    user_id = cur.fetchone()[0]
+    span_minutes = args.months * 30 * 24 * 60
+    cur.execute('''
+        INSERT INTO player_reports
+        (reporter_user_id, reported_player_name, normalized_player, report_type, description, status, created_at)
+        SELECT %s, %s || g, %s || g, 'cheat', 'archive benchmark report',
+               CASE WHEN g %% 1000 < %s THEN 'pending' ELSE 'resolved' END,
+               LOCALTIMESTAMP - make_interval(mins => (g::bigint * %s / %s / 60 * 60 + 30)::int)
+        FROM generate_series(1, %s) AS g
+    ''', (user_id, MARKER, MARKER, int(args.open_share * 1000), span_minutes, args.reports, args.reports))
+    cur.execute('''
+        INSERT INTO tournaments
+        (name, game_name, roblox_server_url, max_players, prize_robux, status, start_date, created_at)
+        SELECT 'Archived ' || g, 'Arsenal', %s, 16, 0, 'finished',
+               LOCALTIMESTAMP - make_interval(mins => (g::bigint * %s / %s / 60 * 60 + 30)::int),
+               LOCALTIMESTAMP - make_interval(mins => (g::bigint * %s / %s / 60 * 60 + 30)::int)
+        FROM generate_series(1, %s) AS g
+    ''', (MARKER, span_minutes, args.tournaments, span_minutes, args.tournaments, args.tournaments))
+    cur.execute("ALTER TABLE tournaments DISABLE TRIGGER tournaments_touch_updated_at")
+    cur.execute('UPDATE tournaments SET updated_at = start_date WHERE roblox_server_url = %s', (MARKER,))
+    cur.execute("ALTER TABLE tournaments ENABLE TRIGGER tournaments_touch_updated_at")
+    cur.execute('''
+        SELECT COUNT(*) FILTER (WHERE status = 'pending'),
+               COUNT(*) FILTER (WHERE status = 'resolved' AND created_at < LOCALTIMESTAMP - make_interval(days => %s)),
+               COUNT(*) FILTER (WHERE status = 'resolved'
+                                  AND created_at < date_trunc('month', LOCALTIMESTAMP) - INTERVAL '24 months')
+        FROM player_reports WHERE reporter_user_id = %s
+    ''', (index.REPORT_ARCHIVE_DAYS, user_id))
+    pending, due_reports, expired_reports = cur.fetchone()
+    cur.execute('''
+        SELECT COUNT(*) FROM tournaments
+        WHERE roblox_server_url = %s AND updated_at < LOCALTIMESTAMP - make_interval(days => %s)
+    ''', (MARKER, index.TOURNAMENT_ARCHIVE_DAYS))
+    due_tournaments = cur.fetchone()[0]
+    conn.commit()
+    conn.autocommit = True
+    cur.execute('VACUUM ANALYZE player_reports')
+    cur.execute('VACUUM ANALYZE tournaments')
+
+    failures = []
+    try:
+        before_sizes = hot_sizes(cur)
+        before = time_queries(cur, args.repeat)
+
+        started = time.perf_counter()
+        summary = index.archive(5000)
+        elapsed = time.perf_counter() - started
+        print(f"archiver:  {summary['reports_archived']} reports, {summary['tournaments_archived']} tournaments "
+              f"in {elapsed:.1f}s, dropped {len(summary['partitions_dropped'])} expired partitions")
+
+        cur.execute('VACUUM FULL player_reports')
+        cur.execute('VACUUM FULL tournaments')
+        cur.execute('ANALYZE player_reports')
+        cur.execute('ANALYZE tournaments')
+        after_sizes = hot_sizes(cur)
+        after = time_queries(cur, args.repeat)
+
+        print(f"{'table':<16} {'heap before':>12} {'heap after':>11} {'indexes before':>15} {'indexes after':>14}")
+        for table in ('player_reports', 'tournaments'):
+            (heap_before, idx_before), (heap_after, idx_after) = before_sizes[table], after_sizes[table]
+            print(f'{table:<16} {heap_before / 2**20:>10.1f}MB {heap_after / 2**20:>9.1f}MB '
+                  f'{idx_before / 2**20:>13.1f}MB {idx_after / 2**20:>12.1f}MB')
+            if heap_after >= heap_before:
+                failures.append(f'{table} did not shrink')
+        print(f"{'query':<18} {'before p50':>11} {'after p50':>10}")
+        for name in QUERIES:
+            print(f'{name:<18} {before[name]:>9.2f}ms {after[name]:>8.2f}ms')
+
+        cur.execute('''
+            SELECT (SELECT COUNT(*) FROM player_reports WHERE reporter_user_id = %s),
+                   (SELECT COUNT(*) FROM player_reports_archive WHERE reporter_user_id = %s),
+                   (SELECT COUNT(*) FROM player_reports_archive
+                    WHERE reporter_user_id = %s
+                      AND created_at < date_trunc('month', LOCALTIMESTAMP) - INTERVAL '24 months'),
+                   (SELECT COUNT(*) FROM tournaments_archive WHERE roblox_server_url = %s)
+        ''', (user_id, user_id, user_id, MARKER))
+        hot, archived, kept_expired, archived_tournaments = cur.fetchone()
+        if hot + archived != args.reports - expired_reports:
+            failures.append(f'{hot} hot + {archived} archived reports, expected {args.reports - expired_reports}')
+        if archived != due_reports - expired_reports or kept_expired:
+            failures.append(f'{archived} reports archived ({kept_expired} past retention), '
+                            f'expected {due_reports - expired_reports}')
+        if hot < pending:
+            failures.append(f'only {hot} reports left hot, {pending} are still pending')
+        if archived_tournaments != due_tournaments:
+            failures.append(f'{archived_tournaments} tournaments archived, expected {due_tournaments}')
+    finally:
+        cur.execute('DELETE FROM player_reports WHERE reporter_user_id = %s', (user_id,))
+        cur.execute('DELETE FROM player_reports_archive WHERE reporter_user_id = %s', (user_id,))
+        cur.execute("DELETE FROM player_report_stats WHERE normalized_player LIKE %s", (MARKER + '%',))
+        cur.execute('DELETE FROM tournaments WHERE roblox_server_url = %s', (MARKER,))
+        cur.execute('DELETE FROM tournaments_archive WHERE roblox_server_url = %s', (MARKER,))
+        cur.execute('DELETE FROM users WHERE id = %s', (user_id,))
+        conn.close()
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    print('OK' if not failures else 'FAILED')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
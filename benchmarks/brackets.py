@@ -0,0 +1,70 @@
+'''
+Business: Time bracket generation and round advancement for large tournaments
+Args: --players - participants per bracket, --repeat - timing repetitions (best run is reported)
+Returns: prints milliseconds per operation for single elimination, double elimination and Swiss
+'''
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend', 'tournaments'))
+
+import brackets
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def ready_results(bracket: brackets.Bracket) -> list:
+    return [
+        (match, random.choice((bracket.player_a[match], bracket.player_b[match])))
+        for match in range(len(bracket))
+        if bracket.winner[match] == brackets.TBD and bracket.player_a[match] > 0 and bracket.player_b[match] > 0
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    players = list(range(1, args.players + 1))
+
+    for name, builder in (('single', brackets.single_elimination), ('double', brackets.double_elimination)):
+        generate_ms = best_of(args.repeat, lambda: builder(players))
+        bracket = builder(players)
+        results = ready_results(bracket)
+
+        def advance():
+            copy = builder(players)
+            copy.apply_results(results)
+
+        advance_ms = best_of(args.repeat, advance) - generate_ms
+        print(f'{name:>6}: {len(bracket)} matches, generate {generate_ms:.2f} ms, '
+              f'advance round of {len(results)} {advance_ms:.2f} ms')
+
+    bracket = None
+    rounds = max(1, (args.players - 1).bit_length())
+    started = time.perf_counter()
+    for _ in range(rounds):
+        bracket = brackets.swiss_round(players, bracket)
+        for match, winner in ready_results(bracket):
+            bracket.record_result(match, winner)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f' swiss: {rounds} rounds, {len(bracket)} matches, {elapsed / rounds:.2f} ms per round')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
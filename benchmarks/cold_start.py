@@ -0,0 +1,86 @@
+'''
+Business: Profile import time and cold vs warm handler latency of every backend function against a local Postgres
+Args: DATABASE_URL - database the handlers talk to, --warm - warm invocations per function (median is reported),
+      --functions - subset of function names
+Returns: prints import profile and latency table (benchmarks/import_time.py is the pass/fail import check)
+'''
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from import_time import BACKEND, import_profile
+
+EVENTS = {
+    'tournaments': {'httpMethod': 'GET', 'queryStringParameters': {'limit': '20'}},
+    'reports': {'httpMethod': 'GET', 'queryStringParameters': {}},
+    'roblox-auth': {'httpMethod': 'POST', 'body': json.dumps({'roblox_data': {'id': 1, 'name': 'bench'}})},
+    'telegram-auth': {'httpMethod': 'POST', 'body': json.dumps({'telegram_data': {'id': 1, 'username': 'bench'}})},
+    'vip-servers': {'httpMethod': 'GET', 'queryStringParameters': {}},
+    'vip-stats-refresh': {'httpMethod': 'GET', 'queryStringParameters': {'scope': 'queued'}},
+    'ratings': {'httpMethod': 'POST', 'queryStringParameters': {'mode': 'incremental'}},
+    'leaderboard': {'httpMethod': 'GET', 'queryStringParameters': {'limit': '10'}},
+    'search': {'httpMethod': 'GET', 'queryStringParameters': {'q': 'arsenal'}}
+}
+
+RUNNER = '''
+import json, sys, time
+started = time.perf_counter()
+import index
+imported = time.perf_counter()
+event = json.loads(sys.argv[1])
+warm_runs = int(sys.argv[2])
+status = index.handler(event, None)['statusCode']
+first = time.perf_counter()
+samples = []
+for _ in range(warm_runs):
+    t = time.perf_counter()
+    index.handler(event, None)
+    samples.append(time.perf_counter() - t)
+samples.sort()
+print(json.dumps({
+    'status': status,
+    'import_ms': (imported - started) * 1000,
+    'cold_ms': (first - started) * 1000,
+    'warm_ms': samples[len(samples) // 2] * 1000 if samples else 0.0
+}))
+'''
+
+
+def handler_latency(name: str, warm_runs: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, '-c', RUNNER, json.dumps(EVENTS[name]), str(warm_runs)],
+        cwd=os.path.join(BACKEND, name), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1]}
+    return json.loads(result.stdout)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--warm', type=int, default=50)
+    parser.add_argument('--functions', nargs='*', default=sorted(EVENTS))
+    args = parser.parse_args()
+
+    print(f"{'function':<18} {'import':>9} {'cold':>9} {'warm':>9}  status  heaviest imports")
+    for name in args.functions:
+        modules = import_profile(name)
+        import_ms = modules['index'][1] / 1000
+        heaviest = sorted(
+            ((cumulative, module) for module, (_, cumulative) in modules.items() if '.' not in module and module != 'index'),
+            reverse=True
+        )[:3]
+        latency = handler_latency(name, args.warm)
+        if 'error' in latency:
+            print(f"{name:<18} {import_ms:>7.1f}ms  {latency['error']}")
+            continue
+        print(f"{name:<18} {import_ms:>7.1f}ms {latency['cold_ms']:>7.1f}ms {latency['warm_ms']:>7.2f}ms  "
+              f"{latency['status']:>6}  {', '.join(f'{module} {us / 1000:.1f}ms' for us, module in heaviest)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+'''
+Business: Check that concurrent VIP server posts never call Roblox and that the queued refresh fetches each place once
+Args: --dsn - disposable local Postgres with migrations applied, --posts - concurrent posts for the same place,
+      --delay - seconds the stub Roblox API sleeps per request, --rounds - places to post (three steps each)
+Returns: prints stub request counts and burst latency per step;
+         exits 1 when a post calls the stub, the refresh makes more than one universe lookup or games call per place,
+         or posts after the refresh miss the fetched counts
+'''
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = 'gamecachebench'
+PLACE_ID_BASE = 9_200_000_000
+PLAYING = 37
+
+
+class StubRoblox(BaseHTTPRequestHandler):
+    delay = 0.2
+    requests: Counter = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self) -> None:
+        time.sleep(self.delay)
+        parts = urlsplit(self.path)
+        if parts.path.startswith('/universes/v1/places/'):
+            self.count('universe')
+            return self.reply({'universeId': int(parts.path.split('/')[4]) - PLACE_ID_BASE + 1})
+        self.count('games')
+        ids = [int(i) for i in parse_qs(parts.query)['universeIds'][0].split(',')]
+        self.reply({'data': [{'id': i, 'name': f'Game {i}', 'playing': PLAYING, 'maxPlayers': 24} for i in ids]})
+
+    def count(self, endpoint: str) -> None:
+        with self.lock:
+            self.requests[endpoint] += 1
+
+    def reply(self, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+class Context:
+    request_id = 'bench'
+    function_name = 'bench'
+
+
+def load_function(name: str) -> object:
+    directory = os.path.join(ROOT, 'backend', name)
+    local = [filename[:-3] for filename in os.listdir(directory) if filename.endswith('.py')]
+    for module in local:
+        sys.modules.pop(module, None)
+    sys.path.insert(0, directory)
+    try:
+        return importlib.import_module('index')
+    finally:
+        sys.path.remove(directory)
+        for module in local:
+            sys.modules.pop(module, None)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--posts', type=int, default=16)
+    parser.add_argument('--delay', type=float, default=0.2)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    StubRoblox.delay = args.delay
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubRoblox)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub = f'http://127.0.0.1:{server.server_port}'
+    os.environ.update({
+        'DATABASE_URL': args.dsn,
+        'ROBLOX_GAMES_API': stub,
+        'ROBLOX_UNIVERSES_API': stub,
+        'VIP_REFRESH_RETRIES': '0',
+        'RATE_LIMIT_RATE': '0',
+        'DB_POOL_SIZE': str(args.posts + 2)
+    })
+    servers = load_function('vip-servers')
+    refresher = load_function('vip-stats-refresh')
+
+    def post(place_id: int, n: int) -> dict:
+        event = {
+            'httpMethod': 'POST',
+            'headers': {},
+            'body': json.dumps({
+                'game_name': MARKER,
+                'server_url': f'https://www.roblox.com/games/{place_id}?privateServerLinkCode={MARKER}{n}'
+            })
+        }
+        response = servers.handler(event, Context())
+        return {'status': response['statusCode'], **json.loads(response['body'])}
+
+    place_ids = [PLACE_ID_BASE + n for n in range(args.rounds)]
+    failures = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.posts) as pool:
+            for place_id in place_ids:
+                StubRoblox.requests.clear()
+                started = time.perf_counter()
+                results = list(pool.map(lambda n: post(place_id, n), range(args.posts)))
+                elapsed = time.perf_counter() - started
+                counts = dict(StubRoblox.requests)
+                print(f'place {place_id}: {args.posts} uncached posts in {elapsed * 1000:.0f}ms, stub requests {counts}')
+                if counts:
+                    failures.append(f'place {place_id}: uncached posts made {counts} stub requests, expected none')
+                wrong = [r for r in results if r['status'] != 201]
+                if wrong:
+                    failures.append(f'place {place_id}: {len(wrong)} uncached posts failed, e.g. {wrong[0]}')
+
+                StubRoblox.requests.clear()
+                summary = refresher.refresh('queued')
+                counts = dict(StubRoblox.requests)
+                print(f'place {place_id}: queued refresh {summary}, stub requests {counts}')
+                if counts != {'universe': 1, 'games': 1}:
+                    failures.append(f'place {place_id}: refresh made {counts} stub requests, expected one of each')
+
+                StubRoblox.requests.clear()
+                started = time.perf_counter()
+                results = list(pool.map(lambda n: post(place_id, args.posts + n), range(args.posts)))
+                elapsed = time.perf_counter() - started
+                counts = dict(StubRoblox.requests)
+                print(f'place {place_id}: {args.posts} cached posts in {elapsed * 1000:.0f}ms, stub requests {counts}')
+                if counts:
+                    failures.append(f'place {place_id}: cached posts made {counts} stub requests, expected none')
+                wrong = [r for r in results if r['status'] != 201 or r.get('online_players') != PLAYING]
+                if wrong:
+                    failures.append(f'place {place_id}: {len(wrong)} cached posts without fetched counts, e.g. {wrong[0]}')
+    finally:
+        conn = psycopg2.connect(args.dsn)
+        cur = conn.cursor()
+        cur.execute('DELETE FROM vip_servers WHERE game_name = %s', (MARKER,))
+        cur.execute('DELETE FROM vip_stats_queue WHERE place_id = ANY(%s)', (place_ids,))
+        cur.execute('DELETE FROM roblox_game_cache WHERE place_id = ANY(%s)', (place_ids,))
+        conn.commit()
+        conn.close()
+        server.shutdown()
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    print('OK' if not failures else 'FAILED')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
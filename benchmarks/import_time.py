@@ -0,0 +1,70 @@
+'''
+Business: Check the import time of every backend function with python -X importtime in fresh interpreters
+Args: --runs - fresh imports per function (the fastest is kept), --functions - subset of function names,
+      --max-import-ms - budget for importing one function's index module
+Returns: prints import time and heaviest imports per function;
+         exits 1 when a deferred module is imported at module load or a function exceeds the budget
+'''
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, 'backend')
+
+DEFERRED_MODULES = ('psycopg2', 'psycopg2.extras', 'urllib.request')
+
+
+def functions() -> list:
+    return sorted(name for name in os.listdir(BACKEND) if os.path.isfile(os.path.join(BACKEND, name, 'index.py')))
+
+
+def import_profile(name: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import index'],
+        cwd=os.path.join(BACKEND, name), capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        modules[module.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--functions', nargs='*', default=functions())
+    parser.add_argument('--max-import-ms', type=float, default=250.0)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'function':<18} {'import':>9}  heaviest imports")
+    for name in args.functions:
+        profiles = [import_profile(name) for _ in range(args.runs)]
+        modules = min(profiles, key=lambda profile: profile['index'][1])
+        import_ms = modules['index'][1] / 1000
+        heaviest = sorted(
+            ((cumulative, module) for module, (_, cumulative) in modules.items() if '.' not in module and module != 'index'),
+            reverse=True
+        )[:3]
+        print(f"{name:<18} {import_ms:>7.1f}ms  {', '.join(f'{module} {us / 1000:.1f}ms' for us, module in heaviest)}")
+
+        eager = [module for module in DEFERRED_MODULES if any(module in profile for profile in profiles)]
+        if eager:
+            failures.append(f"{name}: imports {', '.join(eager)} at module load")
+        if import_ms > args.max_import_ms:
+            failures.append(f'{name}: import {import_ms:.1f} ms exceeds {args.max_import_ms:.1f} ms')
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    print('OK' if not failures else 'FAILED')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+'''
+Business: Measure the cost of per-phase timing on real handlers with instrumentation off, on, and on with log lines
+Args: --dsn - disposable local Postgres with migrations applied, --requests - timed requests per mode and endpoint,
+      --max-disabled-ns - budget for one disabled phase() hook, --max-overhead - allowed p50 slowdown when enabled
+Returns: prints p50/p99 per endpoint and mode plus the disabled hook cost;
+         exits 1 when the disabled hook or the enabled per-request overhead exceeds its budget
+'''
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = {
+    'off': {'PERF_TIMING': '0'},
+    'on': {'PERF_TIMING': '1', 'PERF_LOG': '0'},
+    'on+log': {'PERF_TIMING': '1', 'PERF_LOG': '1'}
+}
+ENDPOINTS = {
+    'tournaments GET': ('tournaments', {'httpMethod': 'GET', 'queryStringParameters': {'limit': '20'}}),
+    'leaderboard GET': ('leaderboard', {'httpMethod': 'GET', 'queryStringParameters': {'limit': '50'}}),
+    'reports GET': ('reports', {'httpMethod': 'GET', 'queryStringParameters': {}})
+}
+
+
+class Context:
+    request_id = 'bench'
+    function_name = 'bench'
+
+
+def load_function(name: str) -> tuple:
+    directory = os.path.join(ROOT, 'backend', name)
+    local = [filename[:-3] for filename in os.listdir(directory) if filename.endswith('.py')]
+    for module in local:
+        sys.modules.pop(module, None)
+    sys.path.insert(0, directory)
+    try:
+        return importlib.import_module('index').handler, sys.modules['db'], sys.modules['timing']
+    finally:
+        sys.path.remove(directory)
+        for module in local:
+            sys.modules.pop(module, None)
+
+
+def percentile(samples: list, q: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--max-disabled-ns', type=float, default=1000.0)
+    parser.add_argument('--max-overhead', type=float, default=0.10)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.dsn
+    os.environ['RESPONSE_CACHE_TTL'] = '0'
+    os.environ['PERF_SNAPSHOT_EVERY'] = '0'
+
+    failures = []
+    results = {}
+    for endpoint, (name, event) in ENDPOINTS.items():
+        loaded = {}
+        for mode, env in MODES.items():
+            os.environ.update(env)
+            loaded[mode] = load_function(name)
+        samples = {mode: [] for mode in MODES}
+        sink = io.StringIO()
+        with contextlib.redirect_stdout(sink):
+            for round_no in range(args.requests + 50):
+                for mode, (handler, _, _) in loaded.items():
+                    started = time.perf_counter()
+                    handler(dict(event), Context())
+                    if round_no >= 50:
+                        samples[mode].append((time.perf_counter() - started) * 1000)
+        for mode, (_, db, _) in loaded.items():
+            db.get_pool().close()
+            samples[mode].sort()
+            results[(mode, endpoint)] = (percentile(samples[mode], 0.5), percentile(samples[mode], 0.99))
+
+    disabled = loaded['off'][2]
+    loops = 1_000_000
+    started = time.perf_counter()
+    for _ in range(loops):
+        with disabled.phase('serialize'):
+            pass
+    disabled_ns = (time.perf_counter() - started) / loops * 1e9
+
+    print(f"{'endpoint':<18} " + ' '.join(f'{mode + " p50":>12} {mode + " p99":>12}' for mode in MODES))
+    for endpoint in ENDPOINTS:
+        cells = ' '.join(f'{results[(mode, endpoint)][0]:>10.3f}ms {results[(mode, endpoint)][1]:>10.3f}ms'
+                         for mode in MODES)
+        print(f'{endpoint:<18} {cells}')
+        off, on = results[('off', endpoint)][0], results[('on', endpoint)][0]
+        if on > off * (1 + args.max_overhead) and on - off > 0.05:
+            failures.append(f'{endpoint}: enabled p50 {on:.3f} ms vs {off:.3f} ms disabled')
+    print(f'disabled phase() hook: {disabled_ns:.0f} ns')
+    if disabled_ns > args.max_disabled_ns:
+        failures.append(f'disabled hook costs {disabled_ns:.0f} ns, budget {args.max_disabled_ns:.0f} ns')
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    print('OK' if not failures else 'FAILED')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
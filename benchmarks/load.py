@@ -0,0 +1,466 @@
+'''
+Business: Load-test the backend handlers in-process or through a local HTTP shim with seeded volumes and mixed traffic profiles
+Args: --dsn - disposable local Postgres with migrations applied, --profiles - traffic profiles to replay,
+      --transport - inproc or http, --requests/--workers - calls per profile and concurrent clients,
+      --users/--tournaments/--reports - rows to seed, --save-baseline/--baseline - write or compare a baseline file,
+      --tolerance/--noise-ms - allowed p95 and throughput regression, --keep - leave the seeded rows in place
+Returns: prints throughput and p50/p95/p99 latency per endpoint; exits 1 on server errors or a regression against the baseline
+'''
+
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND = os.path.join(ROOT, 'backend')
+MARKER = 'loadbench'
+TELEGRAM_ID_BASE = 7_000_000_000_000
+ROBLOX_ID_BASE = 7_000_000_000_000
+REPORTED_PLAYERS = 20_000
+REPORT_TYPES = ('cheating', 'toxicity', 'scam', 'exploit', 'griefing')
+GAMES = ('Arsenal', 'Blox Fruits', 'Doors', 'BedWars', 'Jailbreak', 'Murder Mystery 2', 'Tower of Hell', 'Da Hood')
+
+
+class Call(NamedTuple):
+    label: str
+    function: str
+    method: str
+    query: Dict[str, str]
+    body: Optional[Dict[str, Any]]
+    user_id: Optional[int]
+
+
+class Fixture(NamedTuple):
+    user_ids: List[int]
+    roblox_ids: List[int]
+    tournament_ids: List[int]
+    burst_tournament_id: int
+    telegram_ids: List[int]
+    moderator_ids: List[int]
+
+
+def seed(cur, users: int, tournaments: int, reports: int) -> None:
+    cur.execute('''
+        INSERT INTO users (telegram_id, username, first_name, roblox_id, roblox_username, rating, is_moderator)
+        SELECT %s + g, 'loadbench_' || g, %s,
+               CASE WHEN g %% 2 = 0 THEN %s + g END, CASE WHEN g %% 2 = 0 THEN 'LoadBench' || g END,
+               1000 + (g::bigint * 7919) %% 1500, g %% 100 = 1
+        FROM generate_series(1, %s) AS g
+    ''', (TELEGRAM_ID_BASE, MARKER, ROBLOX_ID_BASE, users))
+    cur.execute('''
+        CREATE TEMP TABLE bench_users AS
+        SELECT row_number() OVER (ORDER BY id) - 1 AS n, id FROM users WHERE first_name = %s
+    ''', (MARKER,))
+    cur.execute('CREATE UNIQUE INDEX ON bench_users (n)')
+    cur.execute('''
+        INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux, current_players,
+                                 status, creator_user_id, created_at)
+        SELECT 'Load ' || (%s::text[])[1 + g %% %s] || ' Cup ' || g, (%s::text[])[1 + g %% %s], %s,
+               16 + (g %% 6) * 16, (g %% 20) * 50, 0,
+               CASE WHEN g %% 10 < 6 THEN 'registration' WHEN g %% 10 < 8 THEN 'active' ELSE 'finished' END,
+               u.id, LOCALTIMESTAMP - make_interval(secs => (%s - g) * 60)
+        FROM generate_series(1, %s) AS g
+        JOIN bench_users u ON u.n = (g * 31) %% %s
+    ''', (list(GAMES), len(GAMES), list(GAMES), len(GAMES), MARKER, tournaments, tournaments, users))
+    cur.execute('''
+        INSERT INTO player_reports (reporter_user_id, reported_player_name, normalized_player, report_type, description,
+                                    status, created_at, last_reported_at)
+        SELECT u.id, 'LoadBench_Target_' || p, 'loadbench_target_' || p, (%s::text[])[1 + g %% %s],
+               'synthetic load report', s.status, s.at, s.at
+        FROM generate_series(1, %s) AS g
+        CROSS JOIN LATERAL (SELECT (g::bigint * 7919) %% %s AS p) target
+        CROSS JOIN LATERAL (
+            SELECT CASE WHEN g %% 20 = 0 THEN 'pending' WHEN g %% 20 < 4 THEN 'rejected' ELSE 'resolved' END AS status,
+                   LOCALTIMESTAMP - make_interval(secs => (%s - g) * 15) AS at
+        ) s
+        JOIN bench_users u ON u.n = (g * 17) %% %s
+    ''', (list(REPORT_TYPES), len(REPORT_TYPES), reports, REPORTED_PLAYERS, reports, users))
+    cur.execute('''
+        INSERT INTO player_report_stats (normalized_player, display_name, total_reports, counts,
+                                         first_reported_at, last_reported_at)
+        SELECT normalized_player, MAX(display_name), SUM(total), jsonb_object_agg(report_type, total), MIN(first_at), MAX(last_at)
+        FROM (
+            SELECT normalized_player, report_type, MAX(reported_player_name) AS display_name, COUNT(*) AS total,
+                   MIN(created_at) AS first_at, MAX(created_at) AS last_at
+            FROM player_reports
+            WHERE normalized_player LIKE 'loadbench%%'
+            GROUP BY normalized_player, report_type
+        ) grouped
+        GROUP BY normalized_player
+        ON CONFLICT (normalized_player) DO NOTHING
+    ''')
+    cur.execute('DROP TABLE bench_users')
+    for table in ('users', 'tournaments', 'player_reports', 'player_report_stats'):
+        cur.execute(f'ANALYZE {table}')
+
+
+def cleanup(conn) -> None:
+    cur = conn.cursor()
+    cur.execute('''
+        DELETE FROM player_reports
+        WHERE normalized_player LIKE 'loadbench%%'
+           OR reporter_user_id IN (SELECT id FROM users WHERE first_name = %s)
+    ''', (MARKER,))
+    cur.execute("DELETE FROM player_report_stats WHERE normalized_player LIKE 'loadbench%%'")
+    conn.commit()
+    # player_reports.claimed_by has no index, so every deleted user scans the table: drop the dead rows first
+    conn.autocommit = True
+    cur.execute('VACUUM player_reports')
+    conn.autocommit = False
+    cur.execute('DELETE FROM tournaments WHERE roblox_server_url = %s', (MARKER,))
+    cur.execute('DELETE FROM users WHERE first_name = %s OR roblox_id >= %s OR telegram_id >= %s',
+                (MARKER, ROBLOX_ID_BASE, TELEGRAM_ID_BASE))
+    conn.commit()
+
+
+def fixture(cur, seats: int) -> Fixture:
+    cur.execute('''
+        SELECT id, roblox_id, telegram_id, is_moderator FROM users WHERE first_name = %s ORDER BY id
+    ''', (MARKER,))
+    users = cur.fetchall()
+    cur.execute('''
+        SELECT id FROM tournaments WHERE roblox_server_url = %s AND status = 'registration'
+        ORDER BY id DESC LIMIT 5000
+    ''', (MARKER,))
+    tournament_ids = [row[0] for row in cur.fetchall()]
+    cur.execute('''
+        INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux, creator_user_id)
+        VALUES ('Load Grand Opening', 'Arsenal', %s, %s, 10000, %s)
+        RETURNING id
+    ''', (MARKER, seats, users[0][0]))
+    burst_tournament_id = cur.fetchone()[0]
+    return Fixture(
+        user_ids=[row[0] for row in users],
+        roblox_ids=[row[1] for row in users if row[1] is not None],
+        tournament_ids=tournament_ids,
+        burst_tournament_id=burst_tournament_id,
+        telegram_ids=[row[2] for row in users],
+        moderator_ids=[row[0] for row in users if row[3]]
+    )
+
+
+def tournament_open(fx: Fixture, rng: random.Random) -> Call:
+    roll = rng.random()
+    if roll < 0.6:
+        user_id = rng.choice(fx.user_ids)
+        body = {'action': 'join', 'tournament_id': fx.burst_tournament_id, 'user_id': user_id}
+        return Call('tournaments POST join', 'tournaments', 'POST', {}, body, user_id)
+    if roll < 0.65:
+        user_id = rng.choice(fx.user_ids)
+        body = {'action': 'leave', 'tournament_id': fx.burst_tournament_id, 'user_id': user_id}
+        return Call('tournaments POST leave', 'tournaments', 'POST', {}, body, user_id)
+    if roll < 0.85:
+        return Call('tournaments GET list', 'tournaments', 'GET', {'limit': '20'}, None, None)
+    if roll < 0.95:
+        query = {'tournament_id': str(fx.burst_tournament_id)}
+        return Call('tournaments GET detail', 'tournaments', 'GET', query, None, None)
+    query = {'limit': '20', 'status': 'registration', 'game_name': rng.choice(GAMES)}
+    return Call('tournaments GET filtered', 'tournaments', 'GET', query, None, None)
+
+
+def report_flood(fx: Fixture, rng: random.Random) -> Call:
+    roll = rng.random()
+    user_id = rng.choice(fx.user_ids)
+    target = f'LoadBench_Target_{rng.randrange(REPORTED_PLAYERS)}'
+    if roll < 0.5:
+        body = {'user_id': user_id, 'reported_player': target, 'report_type': rng.choice(REPORT_TYPES),
+                'description': 'load flood'}
+        return Call('reports POST single', 'reports', 'POST', {}, body, user_id)
+    if roll < 0.65:
+        batch = [
+            {'reported_player': f'LoadBench_Target_{rng.randrange(REPORTED_PLAYERS)}',
+             'report_type': rng.choice(REPORT_TYPES), 'description': 'load flood batch'}
+            for _ in range(20)
+        ]
+        return Call('reports POST batch', 'reports', 'POST', {}, {'user_id': user_id, 'reports': batch}, user_id)
+    if roll < 0.8:
+        return Call('reports GET latest', 'reports', 'GET', {}, None, None)
+    if roll < 0.9:
+        return Call('reports GET player', 'reports', 'GET', {'player': target}, None, None)
+    if roll < 0.95:
+        return Call('reports GET mine', 'reports', 'GET', {'user_id': str(user_id)}, None, None)
+    moderator_id = rng.choice(fx.moderator_ids)
+    body = {'action': 'claim', 'moderator_id': moderator_id, 'limit': 5}
+    return Call('reports POST claim', 'reports', 'POST', {}, body, moderator_id)
+
+
+def login_storm(fx: Fixture, rng: random.Random) -> Call:
+    roll = rng.random()
+    if roll < 0.6:
+        roblox_id = rng.choice(fx.roblox_ids)
+        body = {'roblox_data': {'id': roblox_id, 'name': f'LoadBench{roblox_id - ROBLOX_ID_BASE}'}}
+        return Call('roblox-auth POST returning', 'roblox-auth', 'POST', {}, body, None)
+    if roll < 0.85:
+        roblox_id = ROBLOX_ID_BASE + len(fx.telegram_ids) + 1 + rng.randrange(10 ** 9)
+        body = {'roblox_data': {'id': roblox_id, 'name': f'LoadBenchNew{roblox_id}'}}
+        return Call('roblox-auth POST new', 'roblox-auth', 'POST', {}, body, None)
+    telegram_id = rng.choice(fx.telegram_ids)
+    body = {'telegram_data': {'id': telegram_id, 'username': f'loadbench_{telegram_id - TELEGRAM_ID_BASE}'}}
+    return Call('telegram-auth POST', 'telegram-auth', 'POST', {}, body, None)
+
+
+PROFILES: Dict[str, Tuple[Callable[[Fixture, random.Random], Call], Tuple[str, ...]]] = {
+    'tournament-open': (tournament_open, ('tournaments',)),
+    'report-flood': (report_flood, ('reports',)),
+    'login-storm': (login_storm, ('roblox-auth', 'telegram-auth'))
+}
+
+
+def load_function(name: str) -> Tuple[Callable, Any]:
+    directory = os.path.join(BACKEND, name)
+    local = [filename[:-3] for filename in os.listdir(directory) if filename.endswith('.py')]
+    for module in local:
+        sys.modules.pop(module, None)
+    sys.path.insert(0, directory)
+    try:
+        return importlib.import_module('index').handler, sys.modules['db']
+    finally:
+        sys.path.remove(directory)
+        for module in local:
+            sys.modules.pop(module, None)
+
+
+def load_session() -> Any:
+    spec = importlib.util.spec_from_file_location('loadbench_session', os.path.join(BACKEND, 'tournaments', 'session.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class InProcess:
+    def __init__(self, handlers: Dict[str, Callable]):
+        self.handlers = handlers
+
+    def send(self, function: str, method: str, query: Dict[str, str], body: Optional[str],
+             headers: Dict[str, str]) -> int:
+        event = {'httpMethod': method, 'headers': headers, 'queryStringParameters': query, 'body': body}
+        return self.handlers[function](event, None)['statusCode']
+
+    def close(self) -> None:
+        pass
+
+
+class ShimHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def dispatch(self) -> None:
+        url = urlsplit(self.path)
+        handler = self.server.handlers.get(url.path.strip('/').split('/')[0])
+        length = int(self.headers.get('Content-Length') or 0)
+        event = {
+            'httpMethod': self.command,
+            'headers': dict(self.headers.items()),
+            'queryStringParameters': dict(parse_qsl(url.query)),
+            'body': self.rfile.read(length).decode() if length else None
+        }
+        response = handler(event, None) if handler else {'statusCode': 404, 'headers': {}, 'body': ''}
+        payload = (response.get('body') or '').encode()
+        self.send_response(response['statusCode'])
+        for name, value in (response.get('headers') or {}).items():
+            self.send_header(name, str(value))
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_OPTIONS = dispatch
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class HttpShim:
+    def __init__(self, handlers: Dict[str, Callable]):
+        ThreadingHTTPServer.request_queue_size = 1024
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), ShimHandler)
+        self.server.daemon_threads = True
+        self.server.handlers = handlers
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.local = threading.local()
+
+    def send(self, function: str, method: str, query: Dict[str, str], body: Optional[str],
+             headers: Dict[str, str]) -> int:
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = HTTPConnection(*self.server.server_address)
+        path = f'/{function}' + (f'?{urlencode(query)}' if query else '')
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except OSError:
+            connection.close()
+            self.local.connection = None
+            raise
+        return response.status
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run_profile(transport: Any, calls: List[Call], workers: int, session: Any) -> Tuple[float, Dict[str, Dict]]:
+    def fire(call: Call) -> Tuple[str, int, float]:
+        headers = {'Content-Type': 'application/json'}
+        if call.user_id is not None and session.enabled():
+            headers['Authorization'] = f'Bearer {session.issue(call.user_id)[0]}'
+        body = json.dumps(call.body) if call.body is not None else None
+        started = time.perf_counter()
+        try:
+            status = transport.send(call.function, call.method, call.query, body, headers)
+        except Exception:
+            status = 0
+        return call.label, status, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(fire, calls))
+    elapsed = time.perf_counter() - started
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    for label, status, latency in outcomes:
+        samples[label].append(latency)
+        statuses[label][status] += 1
+    endpoints = {}
+    for label in sorted(samples):
+        latencies = sorted(samples[label])
+        endpoints[label] = {
+            'count': len(latencies),
+            'rps': len(latencies) / elapsed,
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'errors': sum(count for status, count in statuses[label].items() if status == 0 or status >= 500),
+            'statuses': {str(status): count for status, count in sorted(statuses[label].items())}
+        }
+    return elapsed, endpoints
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Any], tolerance: float, noise_ms: float) -> List[str]:
+    regressions = []
+    for profile, result in results.items():
+        previous = baseline['profiles'].get(profile)
+        if previous is None:
+            continue
+        if result['rps'] < previous['rps'] / (1 + tolerance):
+            regressions.append(f"{profile}: throughput {result['rps']:.0f} req/s vs baseline {previous['rps']:.0f}")
+        for label, endpoint in result['endpoints'].items():
+            before = previous['endpoints'].get(label)
+            if before is None:
+                continue
+            if endpoint['p95'] > before['p95'] * (1 + tolerance) and endpoint['p95'] - before['p95'] > noise_ms:
+                regressions.append(f"{profile} / {label}: p95 {endpoint['p95']:.2f} ms vs baseline {before['p95']:.2f} ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--profiles', nargs='*', default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument('--transport', choices=('inproc', 'http'), default='inproc')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--seats', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--tournaments', type=int, default=50_000)
+    parser.add_argument('--reports', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--save-baseline')
+    parser.add_argument('--baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--noise-ms', type=float, default=1.0)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.dsn
+    os.environ['DB_POOL_SIZE'] = str(args.workers)
+    os.environ['RESPONSE_CACHE_TTL'] = os.environ.get('RESPONSE_CACHE_TTL', '0')
+    os.environ.setdefault('SESSION_SECRET', 'loadbench')
+    os.environ['TELEGRAM_BOT_TOKEN'] = ''
+    session = load_session()
+
+    setup = psycopg2.connect(args.dsn)
+    cur = setup.cursor()
+    cur.execute('SELECT COUNT(*) FROM users WHERE first_name = %s', (MARKER,))
+    if not cur.fetchone()[0]:
+        started = time.perf_counter()
+        seed(cur, args.users, args.tournaments, args.reports)
+        setup.commit()
+        print(f'seeded {args.users} users, {args.tournaments} tournaments, {args.reports} reports '
+              f'in {time.perf_counter() - started:.0f}s')
+    fx = fixture(cur, args.seats)
+    setup.commit()
+
+    results: Dict[str, Dict] = {}
+    failures = []
+    try:
+        for name in args.profiles:
+            generate, functions = PROFILES[name]
+            loaded = {function: load_function(function) for function in functions}
+            handlers = {function: handler for function, (handler, _) in loaded.items()}
+            transport = HttpShim(handlers) if args.transport == 'http' else InProcess(handlers)
+            rng = random.Random(f'{args.seed}/{name}')
+            run_profile(transport, [generate(fx, rng) for _ in range(args.warmup)], args.workers, session)
+            calls = [generate(fx, rng) for _ in range(args.requests)]
+            elapsed, endpoints = run_profile(transport, calls, args.workers, session)
+            transport.close()
+            for _, db in loaded.values():
+                db.get_pool().close()
+            results[name] = {'rps': len(calls) / elapsed, 'endpoints': endpoints}
+
+            print(f'\n{name}: {len(calls)} requests in {elapsed:.2f}s ({len(calls) / elapsed:.0f} req/s), '
+                  f'{args.transport}, {args.workers} workers')
+            print(f"{'endpoint':<28} {'count':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8}  statuses")
+            for label, endpoint in endpoints.items():
+                print(f"{label:<28} {endpoint['count']:>6} {endpoint['rps']:>7.0f} {endpoint['p50']:>6.2f}ms "
+                      f"{endpoint['p95']:>6.2f}ms {endpoint['p99']:>6.2f}ms  {endpoint['statuses']}")
+                if endpoint['errors']:
+                    failures.append(f"{name} / {label}: {endpoint['errors']} server errors")
+    finally:
+        cur.execute('DELETE FROM tournaments WHERE id = %s', (fx.burst_tournament_id,))
+        setup.commit()
+        if not args.keep:
+            cleanup(setup)
+        setup.close()
+
+    meta = {'transport': args.transport, 'workers': args.workers, 'requests': args.requests, 'seed': args.seed}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('meta') != meta:
+            print(f"\nbaseline was recorded with {baseline.get('meta')}, this run used {meta}")
+        failures += compare(results, baseline, args.tolerance, args.noise_ms)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'meta': meta, 'profiles': results}, f, indent=2, sort_keys=True)
+        print(f'\nbaseline saved to {args.save_baseline}')
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
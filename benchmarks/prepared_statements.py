@@ -0,0 +1,84 @@
+'''
+Business: Compare plain SQL against registered prepared statements for the hot listing and login queries
+Args: DATABASE_URL - database to run against, --tournaments - rows seeded for the listing,
+      --repeat - executions per query and mode
+Returns: prints mean microseconds per execution and planner time per mode; seeded rows are rolled back
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend', 'tournaments'))
+
+import db
+import index
+
+
+def mean_us(repeat: int, fn) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def planning_ms(cur, sql: str, args: tuple) -> float:
+    cur.execute(f'EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {sql}', args)
+    plan = cur.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0].get('Planning Time', 0.0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tournaments', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute('''
+            INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux, status)
+            SELECT 'Bench ' || i, 'Game ' || (i %% 20), 'https://www.roblox.com/games/1', 16, 100,
+                   CASE WHEN i %% 3 = 0 THEN 'active' ELSE 'registration' END
+            FROM generate_series(1, %s) AS i
+        ''', (args.tournaments,))
+        cur.execute('ANALYZE tournaments')
+
+        cases = (
+            ('listing', index._listing_statement('', []), (51,)),
+            ('listing status+game', index._listing_statement('_status_game', ['t.status = %s', 't.game_name = %s']),
+             ('registration', 'Game 7', 51)),
+            ('join seat miss', index.JOIN_SEAT, (0, 0, 0, 0))
+        )
+
+        print(f"{'query':<22} {'plain':>10} {'prepared':>10}  planning plain / prepared")
+        for name, stmt, params in cases:
+            db.execute(cur, stmt, params)
+            cur.fetchall()
+
+            def plain():
+                cur.execute(stmt.sql, params)
+                cur.fetchall()
+
+            def prepared():
+                db.execute(cur, stmt, params)
+                cur.fetchall()
+
+            plain_us = mean_us(args.repeat, plain)
+            prepared_us = mean_us(args.repeat, prepared)
+            plan_plain = planning_ms(cur, stmt.sql, params)
+            plan_prepared = planning_ms(cur, stmt.execute_sql, params)
+            print(f'{name:<22} {plain_us:>8.1f}us {prepared_us:>8.1f}us  {plan_plain:.3f} / {plan_prepared:.3f} ms')
+
+        conn.rollback()
+        cur.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
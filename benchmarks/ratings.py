@@ -0,0 +1,121 @@
+'''
+Business: Time batched Elo recalculation over synthetic match history
+Args: --matches - synthetic results, --players - distinct users, --batch-size - results per batch,
+      --dsn - optional local Postgres to also time a full replay through the ratings function
+Returns: prints matches per second for the in-memory engine and, with --dsn, the end-to-end replay;
+         exits 1 when an incremental run in different batch sizes ends with other ratings than the replay
+'''
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend', 'ratings'))
+
+import elo
+
+
+def synthetic_results(matches: int, players: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    player_a = rng.integers(1, players + 1, size=matches)
+    player_b = rng.integers(1, players, size=matches)
+    player_b = np.where(player_b >= player_a, player_b + 1, player_b)
+    a_won = rng.random(matches) < 0.5
+    return player_a, player_b, a_won
+
+
+def bench_engine(matches: int, players: int, batch_size: int) -> None:
+    player_a, player_b, a_won = synthetic_results(matches, players)
+    ratings = {}
+    started = time.perf_counter()
+    for start in range(0, matches, batch_size):
+        end = start + batch_size
+        delta = elo.rate(player_a[start:end], player_b[start:end], a_won[start:end], ratings)
+        ratings.update(zip(delta.user_ids.tolist(), delta.ratings.tolist()))
+    elapsed = time.perf_counter() - started
+    values = np.fromiter(ratings.values(), dtype=np.float64)
+    print(f'engine: {matches} matches in {elapsed:.2f}s ({matches / elapsed:,.0f}/s), '
+          f'mean rating {values.mean():.1f}, spread {values.min():.0f}..{values.max():.0f}')
+
+
+def bench_ratings(cur, user_ids: np.ndarray) -> dict:
+    cur.execute('SELECT id, rating, rating_exact, wins, losses FROM users WHERE id = ANY(%s)', (user_ids.tolist(),))
+    return {row[0]: row[1:] for row in cur.fetchall()}
+
+
+def bench_replay(dsn: str, matches: int, players: int, batch_size: int) -> bool:
+    import psycopg2
+
+    os.environ['DATABASE_URL'] = dsn
+    os.environ['RATING_SETTLE_SECONDS'] = '0'
+    import index
+
+    player_a, player_b, a_won = synthetic_results(matches, players)
+    conn = psycopg2.connect(dsn)
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO users (telegram_id, username)
+        SELECT 8000000000000 + g, 'rating_bench_' || g FROM generate_series(1, %s) g
+        RETURNING id
+    ''', (players,))
+    user_ids = np.array([row[0] for row in cur.fetchall()])
+    cur.execute('''
+        INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux)
+        VALUES ('rating bench', 'bench', 'https://roblox.com/games/1', 2, 0)
+        RETURNING id
+    ''')
+    tournament_id = cur.fetchone()[0]
+    cur.execute('''
+        INSERT INTO tournament_matches (tournament_id, match_no, bracket, round, player_a, player_b, winner,
+                                        completed_at, result_seq)
+        SELECT %s, g, 'S', 1, a, b, CASE WHEN w THEN a ELSE b END,
+               CURRENT_TIMESTAMP - INTERVAL '1 minute', nextval('match_result_seq')
+        FROM unnest(%s::int[], %s::int[], %s::bool[]) WITH ORDINALITY AS r(a, b, w, g)
+    ''', (tournament_id, user_ids[player_a - 1].tolist(), user_ids[player_b - 1].tolist(), a_won.tolist()))
+    conn.commit()
+
+    try:
+        started = time.perf_counter()
+        summary = index.recalculate(replay=True, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        print(f'replay: {summary} in {elapsed:.2f}s ({summary["matches"] / elapsed:,.0f}/s)')
+        replayed = bench_ratings(cur, user_ids)
+
+        cur.execute('UPDATE users SET rating = %s, rating_exact = NULL, wins = 0, losses = 0 WHERE id = ANY(%s)',
+                    (int(elo.DEFAULT_RATING), user_ids.tolist()))
+        cur.execute('UPDATE rating_state SET watermark = 0 WHERE id = 1')
+        conn.commit()
+        incremental_batch = max(1, batch_size // 3 + 1)
+        summary = index.recalculate(replay=False, batch_size=incremental_batch)
+        incremental = bench_ratings(cur, user_ids)
+        differing = sum(1 for user_id in replayed if replayed[user_id] != incremental[user_id])
+        print(f'incremental in batches of {incremental_batch}: {summary}, {differing} users differ from the replay')
+        return differing == 0
+    finally:
+        cur.execute('DELETE FROM tournaments WHERE id = %s', (tournament_id,))
+        cur.execute('DELETE FROM users WHERE telegram_id > 8000000000000 AND telegram_id < 9000000000000')
+        conn.commit()
+        conn.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--matches', type=int, default=1_000_000)
+    parser.add_argument('--players', type=int, default=100_000)
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    parser.add_argument('--dsn')
+    args = parser.parse_args()
+
+    bench_engine(args.matches, args.players, args.batch_size)
+    if args.dsn and not bench_replay(args.dsn, args.matches, args.players, args.batch_size):
+        print('FAILED')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+'''
+Business: Measure change-feed fan-out latency and resume correctness of the realtime SSE service
+Args: --dsn - disposable local Postgres with migrations applied, --clients - concurrent SSE viewers,
+      --changes - seat changes committed while they watch, --poll-interval - client poll period being replaced
+Returns: prints delivery latency percentiles and the listing queries polling would have cost;
+         exits 1 when any viewer misses or duplicates an event, including viewers that reconnect mid-run
+'''
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def open_stream(port: int, last_event_id: int = None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    resume = f'Last-Event-ID: {last_event_id}\r\n' if last_event_id is not None else ''
+    writer.write(f'GET /events?topics=tournaments HTTP/1.1\r\nHost: bench\r\n{resume}\r\n'.encode())
+    await reader.readuntil(b'\r\n\r\n')
+    return reader, writer
+
+
+async def read_events(reader, on_event, until) -> None:
+    while not until():
+        frame = await reader.readuntil(b'\n\n')
+        fields = dict(line.split(': ', 1) for line in frame.decode().strip().split('\n') if ': ' in line)
+        if fields.get('event') == 'tournaments':
+            on_event(int(fields['id']), json.loads(fields['data']), time.perf_counter())
+
+
+async def viewer(port: int, expected: int, seen: list, received: list, reconnect_after: int, ready: list) -> None:
+    reader, writer = await open_stream(port)
+    await reader.readuntil(b'event: ready\n')
+    ready.append(True)
+    last_id = None
+
+    def on_event(seq, data, at):
+        nonlocal last_id
+        last_id = seq
+        seen.append(seq)
+        received.append((data['data']['players'], at))
+
+    if reconnect_after:
+        await read_events(reader, on_event, lambda: len(seen) >= reconnect_after)
+        writer.close()
+        reader, writer = await open_stream(port, last_id)
+    await read_events(reader, on_event, lambda: len(seen) >= expected)
+    writer.close()
+
+
+async def run(args) -> int:
+    env = dict(os.environ, DATABASE_URL=args.dsn, REALTIME_PORT=str(args.port), REALTIME_POLL_SECONDS='30')
+    service = subprocess.Popen([sys.executable, os.path.join(ROOT, 'realtime', 'server.py')], env=env)
+    conn = psycopg2.connect(args.dsn)
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux)
+        VALUES ('Realtime bench', 'Bench', 'https://www.roblox.com/games/1', %s, 0)
+        RETURNING id
+    ''', (args.changes + 1,))
+    tournament_id = cur.fetchone()[0]
+    conn.commit()
+
+    try:
+        await asyncio.sleep(1.0)
+        ready = []
+        seen = [[] for _ in range(args.clients)]
+        received = [[] for _ in range(args.clients)]
+        viewers = [
+            asyncio.create_task(viewer(
+                args.port, args.changes, seen[i], received[i], args.changes // 2 if i % 4 == 0 else 0, ready
+            ))
+            for i in range(args.clients)
+        ]
+        while len(ready) < args.clients:
+            await asyncio.sleep(0.05)
+
+        committed = {}
+        started = time.perf_counter()
+        for _ in range(args.changes):
+            cur.execute('UPDATE tournaments SET current_players = current_players + 1 WHERE id = %s RETURNING current_players',
+                        (tournament_id,))
+            players = cur.fetchone()[0]
+            conn.commit()
+            committed[players] = time.perf_counter()
+            await asyncio.sleep(args.interval)
+        await asyncio.wait_for(asyncio.gather(*viewers), timeout=30)
+        elapsed = time.perf_counter() - started
+    finally:
+        service.terminate()
+        service.wait()
+        cur.execute('DELETE FROM tournaments WHERE id = %s', (tournament_id,))
+        cur.execute('DELETE FROM change_events WHERE entity_id = %s AND topic = %s', (tournament_id, 'tournaments'))
+        conn.commit()
+        conn.close()
+
+    latencies = sorted(at - committed[players] for events in received for players, at in events)
+    broken = [i for i, ids in enumerate(seen) if ids != sorted(set(ids)) or len(ids) != args.changes]
+    polled = args.clients * elapsed / args.poll_interval
+
+    print(f'viewers:      {args.clients} ({(args.clients + 3) // 4} reconnected mid-run with Last-Event-ID)')
+    print(f'changes:      {args.changes} in {elapsed:.2f}s')
+    print(f'latency:      p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, '
+          f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms')
+    print(f'listing:      0 queries with the feed vs ~{polled:.0f} polling every {args.poll_interval:.0f}s')
+    print('OK' if not broken else f'BROKEN viewers {broken}')
+    return 1 if broken else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--changes', type=int, default=100)
+    parser.add_argument('--interval', type=float, default=0.01)
+    parser.add_argument('--poll-interval', type=float, default=10.0)
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
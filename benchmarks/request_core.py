@@ -0,0 +1,115 @@
+'''
+Business: Measure per-request CPU of the shared request core against the previous hand-written handler shape
+Args: --rows - rows serialized per listing response, --repeat - iterations per case (mean is reported)
+Returns: prints microseconds per call for preflight, 405 and listing serialization, old vs core
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend', 'tournaments'))
+
+import core
+import index
+
+
+def per_call(repeat: int, fn) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def old_preflight() -> dict:
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, If-None-Match',
+            'Access-Control-Max-Age': '86400'
+        },
+        'body': ''
+    }
+
+
+def old_error(status_code: int, message: str) -> dict:
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps({'error': message})
+    }
+
+
+def old_listing(rows: list) -> dict:
+    tournaments = []
+    for row in rows:
+        tournaments.append({
+            'id': row[0],
+            'name': row[1],
+            'game': row[2],
+            'robloxServerUrl': row[3],
+            'maxPlayers': row[4],
+            'prize': row[5],
+            'players': row[6],
+            'status': row[7],
+            'startDate': row[8].isoformat() if row[8] else None,
+            'createdAt': row[9].isoformat(),
+            'creator': {
+                'first_name': row[10],
+                'last_name': row[11],
+                'username': row[12]
+            }
+        })
+    return {
+        'statusCode': 200,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*'
+        },
+        'body': json.dumps({'tournaments': tournaments, 'next_cursor': None})
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20000)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    rows = [
+        (i, f'Tournament {i}', 'Arsenal', 'https://www.roblox.com/games/1', 16, 500, i % 16,
+         'registration', None if i % 2 else now, now, 'Ivan', 'Petrov', f'player{i}')
+        for i in range(args.rows)
+    ]
+    events = {
+        'preflight': {'httpMethod': 'OPTIONS'},
+        '405': {'httpMethod': 'DELETE'},
+    }
+
+    print(f"json encoder: {'orjson' if 'orjson' in sys.modules else 'stdlib'}")
+    cases = (
+        ('preflight', old_preflight, lambda: index.handler(events['preflight'], None)),
+        ('405', lambda: old_error(405, 'Method not allowed'), lambda: index.handler(events['405'], None)),
+        (f'listing x{args.rows}', lambda: old_listing(rows),
+         lambda: core.json_response(200, {'tournaments': index.TOURNAMENT_ROW.many(rows), 'next_cursor': None}))
+    )
+    for name, old, new in cases:
+        repeat = args.repeat if not name.startswith('listing') else max(1, args.repeat // 20)
+        old_us = per_call(repeat, old)
+        new_us = per_call(repeat, new)
+        print(f'{name:>12}: old {old_us:8.2f} us, core {new_us:8.2f} us ({old_us / new_us:.1f}x)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
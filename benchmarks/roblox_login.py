@@ -0,0 +1,91 @@
+'''
+Business: Stress concurrent Roblox logins and account linking against the roblox-auth handler
+Args: --dsn - disposable local Postgres with migrations applied, --players - distinct Roblox IDs,
+      --logins - concurrent logins per player, --workers - concurrent threads
+Returns: prints throughput, outcome counts and identity consistency; exits 1 on duplicate rows or server errors
+'''
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROBLOX_ID_BASE = 8_000_000_000_000
+TELEGRAM_ID_BASE = 9_000_000_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--players', type=int, default=500)
+    parser.add_argument('--logins', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=32)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.dsn
+    os.environ['DB_POOL_SIZE'] = str(args.workers)
+    sys.path.insert(0, os.path.join(ROOT, 'backend', 'roblox-auth'))
+    import index
+    from db import pool_stats
+
+    setup = psycopg2.connect(args.dsn)
+    cur = setup.cursor()
+    cur.execute('''
+        INSERT INTO users (telegram_id, username)
+        SELECT %s + g, 'bench_' || g FROM generate_series(1, %s) g
+        RETURNING id
+    ''', (TELEGRAM_ID_BASE, args.players))
+    telegram_users = [row[0] for row in cur.fetchall()]
+    setup.commit()
+
+    def login(job: tuple) -> int:
+        player, link_user_id = job
+        body = {'roblox_data': {'id': ROBLOX_ID_BASE + player, 'name': f'bench_{player}'}}
+        if link_user_id is not None:
+            body['link_user_id'] = link_user_id
+        try:
+            return index.handler({'httpMethod': 'POST', 'body': json.dumps(body)}, None)['statusCode']
+        except Exception:
+            return 500
+
+    jobs = [(player, None) for player in range(args.players) for _ in range(args.logins)]
+    jobs += [(player, telegram_users[player]) for player in range(0, args.players, 2)]
+    jobs += [(player, telegram_users[(player + 1) % args.players]) for player in range(0, args.players, 2)]
+    random.shuffle(jobs)
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            outcomes = Counter(pool.map(login, jobs))
+        elapsed = time.perf_counter() - started
+
+        cur.execute('''
+            SELECT COUNT(*), COUNT(DISTINCT roblox_id), COUNT(*) FILTER (WHERE telegram_id IS NOT NULL)
+            FROM users WHERE roblox_id >= %s
+        ''', (ROBLOX_ID_BASE,))
+        rows, distinct_ids, linked = cur.fetchone()
+        setup.commit()
+    finally:
+        cur.execute('DELETE FROM users WHERE roblox_id >= %s OR telegram_id >= %s', (ROBLOX_ID_BASE, TELEGRAM_ID_BASE))
+        setup.commit()
+        setup.close()
+
+    print(f'requests:     {len(jobs)} in {elapsed:.2f}s ({len(jobs) / elapsed:.0f} req/s)')
+    print(f'outcomes:     {dict(sorted(outcomes.items()))}')
+    print(f'users:        {rows} rows for {distinct_ids} Roblox IDs, {linked} linked to Telegram')
+    print(f'pool:         {pool_stats()}')
+
+    ok = rows == distinct_ids == args.players and 500 not in outcomes
+    print('OK' if ok else 'INCONSISTENT')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
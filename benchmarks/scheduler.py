@@ -0,0 +1,165 @@
+'''
+Business: Simulate 100k scheduled tournaments and check the lifecycle scheduler transitions each one exactly once and on time,
+          and that an overdue tournament with a running bracket stays active until it is decided or abandoned
+Args: --dsn - disposable local Postgres with migrations applied, --tournaments - scheduled rows to seed,
+      --upcoming - rows starting during the live phase, --window - seconds the upcoming starts are spread over,
+      --workers - concurrent scheduler workers, --batch-size - rows per SKIP LOCKED batch, --max-late - lateness budget in seconds
+Returns: prints backlog drain throughput, live-phase lateness and wake-ups;
+         exits 1 when a tournament is missed, transitioned early, transitioned twice, started later than the budget,
+         or a running bracket is finished
+'''
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = 'schedulerbench'
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--tournaments', type=int, default=100_000)
+    parser.add_argument('--upcoming', type=int, default=5000)
+    parser.add_argument('--window', type=float, default=5.0)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--max-late', type=float, default=2.0)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.dsn
+    os.environ['DB_POOL_SIZE'] = str(args.workers)
+    os.environ['SCHEDULER_BATCH_SIZE'] = str(args.batch_size)
+    os.environ['TOURNAMENT_DURATION_HOURS'] = '4'
+    os.environ['TOURNAMENT_ABANDON_HOURS'] = '24'
+    sys.path.insert(0, os.path.join(ROOT, 'backend', 'scheduler'))
+    import index
+
+    setup = psycopg2.connect(args.dsn)
+    cur = setup.cursor()
+    cur.execute('''
+        INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux, status, start_date)
+        SELECT 'Scheduled ' || g, 'Arsenal', %s, 16, 0,
+               CASE WHEN g %% 10 = 0 THEN 'active' ELSE 'registration' END,
+               CASE
+                   WHEN g %% 10 = 0 THEN LOCALTIMESTAMP - make_interval(hours => 4 + g %% 48)
+                   WHEN g %% 10 < 4 THEN LOCALTIMESTAMP - make_interval(secs => g %% 10800)
+                   WHEN g %% 10 < 7 THEN LOCALTIMESTAMP - make_interval(hours => 5 + g %% 48)
+                   ELSE LOCALTIMESTAMP + make_interval(hours => 1 + g %% 72)
+               END
+        FROM generate_series(1, %s) AS g
+    ''', (MARKER, args.tournaments))
+    cur.execute('''
+        INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux, status, start_date)
+        SELECT 'Bracket ' || g, 'Arsenal', %s, 16, 0, 'active',
+               LOCALTIMESTAMP - make_interval(hours => CASE WHEN g = 2 THEN 30 ELSE 5 END)
+        FROM generate_series(1, 3) AS g
+        RETURNING id
+    ''', (MARKER + '-bracket',))
+    running, abandoned, decided = sorted(row[0] for row in cur.fetchall())
+    cur.execute('''
+        INSERT INTO tournament_matches (tournament_id, match_no, bracket, round, player_a, player_b, winner, completed_at)
+        VALUES (%(running)s, 0, 'W', 1, 1, 2, 1, LOCALTIMESTAMP - INTERVAL '10 minutes'),
+               (%(running)s, 1, 'W', 2, 1, NULL, NULL, NULL),
+               (%(abandoned)s, 0, 'W', 1, 1, 2, 1, LOCALTIMESTAMP - INTERVAL '29 hours'),
+               (%(abandoned)s, 1, 'W', 2, 1, NULL, NULL, NULL),
+               (%(decided)s, 0, 'W', 1, 1, 2, 1, LOCALTIMESTAMP - INTERVAL '2 hours')
+    ''', {'running': running, 'abandoned': abandoned, 'decided': decided})
+    cur.execute('ANALYZE tournaments')
+    setup.commit()
+    cur.execute('''
+        SELECT COUNT(*) FILTER (WHERE status = 'registration' AND start_date <= LOCALTIMESTAMP),
+               COUNT(*) FILTER (WHERE start_date <= LOCALTIMESTAMP - INTERVAL '4 hours'),
+               COUNT(*) FILTER (WHERE start_date > LOCALTIMESTAMP)
+        FROM tournaments WHERE roblox_server_url = %s
+    ''', (MARKER,))
+    due_start, due_finish, future = cur.fetchone()
+    due_finish += 2
+    setup.commit()
+
+    wakeups = [0]
+    advance = index.advance
+
+    def counted_advance(*a, **kw):
+        wakeups[0] += 1
+        return advance(*a, **kw)
+
+    failures = []
+    try:
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            summaries = list(pool.map(lambda _: advance(args.batch_size, 3600), range(args.workers)))
+        drain = time.perf_counter() - started_at
+        started = sum(summary['started'] for summary in summaries)
+        finished = sum(summary['finished'] for summary in summaries)
+        print(f'backlog:   {started} started, {finished} finished by {args.workers} workers in {drain:.2f}s '
+              f'({(started + finished) / drain:.0f} transitions/s)')
+        if started != due_start or finished != due_finish:
+            failures.append(f'expected {due_start} started and {due_finish} finished, got {started} and {finished}')
+        cur.execute('SELECT id, status FROM tournaments WHERE roblox_server_url = %s', (MARKER + '-bracket',))
+        statuses = dict(cur.fetchall())
+        setup.commit()
+        print(f"brackets:  running {statuses[running]}, abandoned {statuses[abandoned]}, decided {statuses[decided]}")
+        if statuses != {running: 'active', abandoned: 'finished', decided: 'finished'}:
+            failures.append(f'bracket tournaments ended as {statuses}, expected only the running one to stay active')
+
+        index.advance = counted_advance
+        for _ in range(args.workers):
+            threading.Thread(target=index.run_forever, args=(args.batch_size,), daemon=True).start()
+        time.sleep(1.0)
+        idle_wakeups = wakeups[0]
+
+        cur.execute('''
+            INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux, start_date)
+            SELECT 'Upcoming ' || g, 'Arsenal', %s, 16, 0, LOCALTIMESTAMP + make_interval(secs => 1 + %s * g / %s)
+            FROM generate_series(1, %s) AS g
+        ''', (MARKER + '-live', args.window, args.upcoming, args.upcoming))
+        setup.commit()
+        time.sleep(1 + args.window + args.max_late)
+
+        cur.execute('''
+            SELECT COUNT(*) FILTER (WHERE status = 'active'),
+                   COUNT(*) FILTER (WHERE updated_at < start_date),
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM updated_at - start_date)),
+                   MAX(EXTRACT(EPOCH FROM updated_at - start_date))
+            FROM tournaments WHERE roblox_server_url = %s
+        ''', (MARKER + '-live',))
+        live_started, early, late_p50, late_max = cur.fetchone()
+        cur.execute('''
+            SELECT COUNT(*) FROM tournaments
+            WHERE roblox_server_url = %s AND start_date > LOCALTIMESTAMP AND status <> 'registration'
+        ''', (MARKER,))
+        touched_future = cur.fetchone()[0]
+        setup.commit()
+
+        print(f'live:      {live_started}/{args.upcoming} started over {args.window:.0f}s, '
+              f'lateness p50 {late_p50 or 0:.3f}s max {late_max or 0:.3f}s')
+        print(f'wake-ups:  {idle_wakeups} while idle, {wakeups[0] - idle_wakeups} during the live phase')
+        print(f'future:    {future} scheduled later, {touched_future} transitioned early')
+        if live_started != args.upcoming:
+            failures.append(f'{args.upcoming - live_started} upcoming tournaments were not started')
+        if early or touched_future:
+            failures.append(f'{early + touched_future} tournaments started before their start_date')
+        if late_max is not None and late_max > args.max_late:
+            failures.append(f'a tournament started {late_max:.2f}s late')
+    finally:
+        index.advance = advance
+        cur.execute('DELETE FROM tournaments WHERE roblox_server_url IN (%s, %s, %s)',
+                    (MARKER, MARKER + '-live', MARKER + '-bracket'))
+        setup.commit()
+        setup.close()
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    print('OK' if not failures else 'FAILED')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
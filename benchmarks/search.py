@@ -0,0 +1,139 @@
+'''
+Business: Seed a synthetic million-row dataset and time the search function's ranked queries against it
+Args: --dsn - disposable local Postgres with migrations applied (needs the pg_trgm extension),
+      --tournaments/--players/--servers - rows to seed,
+      --repeat - runs per query, --budget-ms - p99 budget per query, --keep - leave the seeded rows in place
+Returns: prints p50/p99 latency and hit counts per query; exits 1 when a query exceeds the budget
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = 'searchbench'
+
+GAMES = [
+    'Arsenal', 'Blox Fruits', 'Doors', 'Brookhaven', 'Adopt Me', 'Jailbreak', 'Murder Mystery 2', 'Pet Simulator 99',
+    'Tower of Hell', 'Natural Disaster Survival', 'BedWars', 'Piggy', 'Bee Swarm Simulator', 'Royale High',
+    'Phantom Forces', 'Evade', 'Da Hood', 'Shindo Life', 'King Legacy', 'Rainbow Friends'
+]
+SYLLABLES = [
+    'dark', 'wolf', 'shadow', 'pro', 'king', 'ninja', 'blox', 'star', 'fire', 'ice', 'cyber', 'noob', 'epic', 'turbo',
+    'ghost', 'storm', 'pixel', 'dragon', 'silent', 'lucky', 'cool', 'mega', 'ultra', 'hyper', 'nova', 'zen', 'rex',
+    'кот', 'волк', 'тень', 'звезда', 'огонь'
+]
+QUERIES = [
+    ('exact game', 'Arsenal'),
+    ('two words', 'blox fruits'),
+    ('prefix', 'jailbr'),
+    ('player prefix', 'shadowwolf'),
+    ('cyrillic', 'волктень'),
+    ('typo', 'arsenl'),
+    ('typo player', 'dragonnija'),
+    ('rare token', 'f3a9c'),
+    ('no match', 'zzqqxx')
+]
+
+
+def seed(cur, tournaments: int, players: int, servers: int) -> None:
+    cur.execute('CREATE TEMP TABLE bench_games (n INT PRIMARY KEY, name TEXT)')
+    cur.execute('INSERT INTO bench_games SELECT ordinality - 1, name FROM unnest(%s::text[]) WITH ORDINALITY AS g(name)',
+                (GAMES,))
+    cur.execute('CREATE TEMP TABLE bench_syllables (n INT PRIMARY KEY, word TEXT)')
+    cur.execute('INSERT INTO bench_syllables SELECT ordinality - 1, word FROM unnest(%s::text[]) WITH ORDINALITY AS s(word)',
+                (SYLLABLES,))
+    cur.execute('''
+        INSERT INTO users (username, roblox_username, first_name, rating)
+        SELECT a.word || b.word || (i %% 997), CASE WHEN i %% 3 = 0 THEN NULL ELSE initcap(b.word) || a.word || (i %% 89) END,
+               %s, 1000 + (i::bigint * 7919) %% 1500
+        FROM generate_series(1, %s) AS i
+        JOIN bench_syllables a ON a.n = (i * 31) %% %s
+        JOIN bench_syllables b ON b.n = (i * 17 / 7) %% %s
+    ''', (MARKER, players, len(SYLLABLES), len(SYLLABLES)))
+    cur.execute('''
+        INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux, status)
+        SELECT initcap(s.word) || ' ' || g.name || ' ' || substr(md5(i::text), 1, 5), g.name, %s, 16, 100,
+               CASE WHEN i %% 4 = 0 THEN 'active' ELSE 'registration' END
+        FROM generate_series(1, %s) AS i
+        JOIN bench_games g ON g.n = (i * 13) %% %s
+        JOIN bench_syllables s ON s.n = i %% %s
+    ''', (MARKER, tournaments, len(GAMES), len(SYLLABLES)))
+    cur.execute('''
+        INSERT INTO vip_servers (game_name, server_url, online_players, max_players)
+        SELECT g.name || CASE WHEN i %% 5 = 0 THEN ' ' || initcap(s.word) ELSE '' END, %s, i %% 50, 50
+        FROM generate_series(1, %s) AS i
+        JOIN bench_games g ON g.n = (i * 7) %% %s
+        JOIN bench_syllables s ON s.n = i %% %s
+    ''', (MARKER, servers, len(GAMES), len(SYLLABLES)))
+    cur.execute('ANALYZE users')
+    cur.execute('ANALYZE tournaments')
+    cur.execute('ANALYZE vip_servers')
+
+
+def cleanup(cur) -> None:
+    cur.execute('DELETE FROM vip_servers WHERE server_url = %s', (MARKER,))
+    cur.execute('DELETE FROM tournaments WHERE roblox_server_url = %s', (MARKER,))
+    cur.execute('DELETE FROM users WHERE first_name = %s', (MARKER,))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--tournaments', type=int, default=1_000_000)
+    parser.add_argument('--players', type=int, default=1_000_000)
+    parser.add_argument('--servers', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--budget-ms', type=float, default=10.0)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.dsn
+    os.environ['RESPONSE_CACHE_TTL'] = '0'
+    sys.path.insert(0, os.path.join(ROOT, 'backend', 'search'))
+    import index
+
+    setup = psycopg2.connect(args.dsn)
+    cur = setup.cursor()
+    cur.execute('SELECT COUNT(*) FROM users WHERE first_name = %s', (MARKER,))
+    if not cur.fetchone()[0]:
+        started = time.perf_counter()
+        seed(cur, args.tournaments, args.players, args.servers)
+        setup.commit()
+        print(f'seeded {args.tournaments} tournaments, {args.players} players, {args.servers} servers '
+              f'in {time.perf_counter() - started:.0f}s')
+
+    failures = []
+    try:
+        print(f"{'query':<14} {'q':<14} {'p50':>8} {'p99':>8}  hits (tournaments/servers/players)")
+        for name, text in QUERIES:
+            event = {'httpMethod': 'GET', 'queryStringParameters': {'q': text}}
+            payload = json.loads(index.handler(event, None)['body'])
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                index.handler(event, None)
+                samples.append((time.perf_counter() - started) * 1000)
+            samples.sort()
+            p50, p99 = samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+            hits = '/'.join(str(len(payload.get(kind, []))) for kind in ('tournaments', 'servers', 'players'))
+            print(f'{name:<14} {text:<14} {p50:>6.2f}ms {p99:>6.2f}ms  {hits}')
+            if p99 > args.budget_ms:
+                failures.append(f'{name}: p99 {p99:.2f} ms exceeds {args.budget_ms:.1f} ms')
+    finally:
+        if not args.keep:
+            cleanup(cur)
+            setup.commit()
+        setup.close()
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
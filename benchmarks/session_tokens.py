@@ -0,0 +1,76 @@
+'''
+Business: Microbenchmark session token issue/verify and Telegram hash checks against a users-table lookup
+Args: --repeat - iterations per case, DATABASE_URL - optional; when set the per-request users lookup is timed too
+Returns: prints microseconds per operation
+'''
+
+import argparse
+import os
+import sys
+import time
+from hashlib import sha256
+import hmac
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'backend', 'telegram-auth'))
+
+import session
+import index
+
+
+def per_op(repeat: int, fn) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def uncached_telegram_check(auth_data: dict, bot_token: str) -> bool:
+    data_check_string = '\n'.join(f'{key}={value}' for key, value in sorted(auth_data.items()) if key != 'hash')
+    secret_key = sha256(bot_token.encode()).digest()
+    return hmac.new(secret_key, data_check_string.encode(), sha256).hexdigest() == auth_data['hash']
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=100000)
+    args = parser.parse_args()
+
+    session.SESSION_SECRET = 'benchmark-secret'
+    token, _ = session.issue(123456)
+    forged = token[:-2] + ('AA' if not token.endswith('AA') else 'BB')
+    assert session.verify(token) == 123456 and session.verify(forged) is None
+
+    bot_token = '123456:benchmark-bot-token'
+    auth_data = {'id': 42, 'first_name': 'Bench', 'username': 'bench', 'auth_date': 1700000000}
+    check = '\n'.join(f'{key}={value}' for key, value in sorted(auth_data.items()))
+    auth_data['hash'] = hmac.new(sha256(bot_token.encode()).digest(), check.encode(), sha256).hexdigest()
+
+    cases = [
+        ('session issue', lambda: session.issue(123456)),
+        ('session verify', lambda: session.verify(token)),
+        ('session verify forged', lambda: session.verify(forged)),
+        ('telegram check, key per call', lambda: uncached_telegram_check(auth_data, bot_token)),
+        ('telegram check, cached key', lambda: index.verify_telegram_auth(auth_data, bot_token))
+    ]
+
+    if os.environ.get('DATABASE_URL'):
+        import psycopg2
+        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+        cur = conn.cursor()
+
+        def users_lookup():
+            cur.execute('SELECT id FROM users WHERE id = %s', (123456,))
+            cur.fetchone()
+            conn.rollback()
+
+        cases.append(('users lookup (replaced)', users_lookup))
+
+    for name, fn in cases:
+        repeat = args.repeat if not name.startswith('users') else max(1, args.repeat // 50)
+        print(f'{name:<30} {per_op(repeat, fn):8.2f} us')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
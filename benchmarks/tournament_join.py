@@ -0,0 +1,89 @@
+'''
+Business: Fire concurrent join requests at the tournaments handler and check for overbooking
+Args: --dsn - disposable local Postgres with migrations applied, --users - distinct joiners,
+      --seats - tournament max_players, --workers - concurrent threads, --retries - duplicate joins per user
+Returns: prints throughput, outcome counts and seat consistency; exits 1 on overbooking
+'''
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TELEGRAM_ID_BASE = 9_000_000_000_000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--seats', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--retries', type=int, default=2)
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.dsn
+    os.environ['DB_POOL_SIZE'] = str(args.workers)
+    sys.path.insert(0, os.path.join(ROOT, 'backend', 'tournaments'))
+    import index
+    from db import pool_stats
+
+    setup = psycopg2.connect(args.dsn)
+    cur = setup.cursor()
+    cur.execute('''
+        INSERT INTO users (telegram_id, username)
+        SELECT %s + g, 'bench_' || g FROM generate_series(1, %s) g
+        RETURNING id
+    ''', (TELEGRAM_ID_BASE, args.users))
+    user_ids = [row[0] for row in cur.fetchall()]
+    cur.execute('''
+        INSERT INTO tournaments (name, game_name, roblox_server_url, max_players, prize_robux)
+        VALUES ('bench', 'bench', 'https://roblox.com/games/1', %s, 0)
+        RETURNING id
+    ''', (args.seats,))
+    tournament_id = cur.fetchone()[0]
+    setup.commit()
+
+    def join(user_id: int) -> int:
+        event = {
+            'httpMethod': 'POST',
+            'body': json.dumps({'action': 'join', 'tournament_id': tournament_id, 'user_id': user_id})
+        }
+        return index.handler(event, None)['statusCode']
+
+    requests = [user_id for user_id in user_ids for _ in range(args.retries)]
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            outcomes = Counter(pool.map(join, requests))
+        elapsed = time.perf_counter() - started
+
+        cur.execute('SELECT current_players FROM tournaments WHERE id = %s', (tournament_id,))
+        seats_taken = cur.fetchone()[0]
+        cur.execute('SELECT COUNT(*) FROM tournament_participants WHERE tournament_id = %s', (tournament_id,))
+        participants = cur.fetchone()[0]
+        setup.commit()
+    finally:
+        cur.execute('DELETE FROM tournaments WHERE id = %s', (tournament_id,))
+        cur.execute('DELETE FROM users WHERE telegram_id > %s', (TELEGRAM_ID_BASE,))
+        setup.commit()
+        setup.close()
+
+    print(f'requests:     {len(requests)} in {elapsed:.2f}s ({len(requests) / elapsed:.0f} req/s)')
+    print(f'outcomes:     {dict(sorted(outcomes.items()))}')
+    print(f'seats taken:  {seats_taken}/{args.seats}, participants: {participants}')
+    print(f'pool:         {pool_stats()}')
+
+    ok = seats_taken == participants <= args.seats
+    print('OK' if ok else 'OVERBOOKED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
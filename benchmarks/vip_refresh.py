@@ -0,0 +1,160 @@
+'''
+Business: Check and time the VIP stats refresh against a stub Roblox API that gives every place its own universe ID
+Args: --dsn - disposable local Postgres with migrations applied, --places - distinct place IDs to seed,
+      --shared - places that share a universe with the previous place, --missing - places the stub does not know
+Returns: prints refresh summaries, stub request counts and elapsed time;
+         exits 1 when a server gets another universe's player count, a missing place is not negative-cached
+         or a second refresh resolves universe IDs again
+'''
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKER = 'viprefreshbench'
+PLACE_ID_BASE = 9_100_000_000
+
+
+class StubRoblox(BaseHTTPRequestHandler):
+    universes: dict = {}
+    requests: Counter = Counter()
+    lock = threading.Lock()
+
+    def do_GET(self) -> None:
+        parts = urlsplit(self.path)
+        if parts.path.startswith('/universes/v1/places/'):
+            self.count('universe')
+            place_id = int(parts.path.split('/')[4])
+            universe_id = self.universes.get(place_id)
+            if universe_id is None:
+                return self.reply(404, {'errors': [{'code': 404, 'message': 'Not found'}]})
+            return self.reply(200, {'universeId': universe_id})
+        if parts.path == '/v1/games':
+            self.count('games')
+            ids = [int(i) for i in parse_qs(parts.query)['universeIds'][0].split(',')]
+            return self.reply(200, {'data': [
+                {'id': universe_id, 'rootPlaceId': universe_id * 3, 'name': f'Universe {universe_id}',
+                 'playing': expected_playing(universe_id), 'maxPlayers': 40}
+                for universe_id in ids
+            ]})
+        self.reply(404, {})
+
+    def count(self, endpoint: str) -> None:
+        with self.lock:
+            self.requests[endpoint] += 1
+
+    def reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def expected_playing(universe_id: int) -> int:
+    return universe_id % 997
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--places', type=int, default=500)
+    parser.add_argument('--shared', type=int, default=50)
+    parser.add_argument('--missing', type=int, default=20)
+    args = parser.parse_args()
+
+    place_ids = [PLACE_ID_BASE + n for n in range(args.places)]
+    missing = set(place_ids[-args.missing:]) if args.missing else set()
+    universe_id = 0
+    for n, place_id in enumerate(place_ids):
+        if place_id in missing:
+            continue
+        if not (0 < n <= args.shared):
+            universe_id = 7_000 + n * 13
+        StubRoblox.universes[place_id] = universe_id
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubRoblox)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stub = f'http://127.0.0.1:{server.server_port}'
+    os.environ.update({
+        'DATABASE_URL': args.dsn,
+        'ROBLOX_GAMES_API': stub,
+        'ROBLOX_UNIVERSES_API': stub,
+        'VIP_REFRESH_RETRIES': '0',
+        'GAME_CACHE_TTL': '0',
+        'GAME_CACHE_NEGATIVE_TTL': '0'
+    })
+    sys.path.insert(0, os.path.join(ROOT, 'backend', 'vip-stats-refresh'))
+    import index
+
+    conn = psycopg2.connect(args.dsn)
+    cur = conn.cursor()
+    cur.execute('''
+        INSERT INTO vip_servers (game_name, server_url, place_id, link_code)
+        SELECT %s, 'https://www.roblox.com/games/' || p, p, ''
+        FROM unnest(%s::bigint[]) AS p
+    ''', (MARKER, place_ids))
+    conn.commit()
+
+    failures = []
+    try:
+        runs = []
+        for label in ('first refresh', 'second refresh'):
+            StubRoblox.requests.clear()
+            started = time.perf_counter()
+            summary = index.refresh('all')
+            elapsed = time.perf_counter() - started
+            runs.append(dict(StubRoblox.requests))
+            print(f'{label}: {summary} in {elapsed * 1000:.1f}ms, stub requests {dict(StubRoblox.requests)}')
+
+        cur.execute('''
+            SELECT v.place_id, v.online_players, v.max_players, c.universe_id, c.found
+            FROM vip_servers v LEFT JOIN roblox_game_cache c ON c.place_id = v.place_id
+            WHERE v.game_name = %s
+        ''', (MARKER,))
+        wrong = []
+        for place_id, online, max_players, cached_universe, found in cur.fetchall():
+            if place_id in missing:
+                if found is not False:
+                    wrong.append(f'place {place_id} missing upstream but cached as found={found}')
+                continue
+            universe_id = StubRoblox.universes[place_id]
+            if (online, max_players, cached_universe) != (expected_playing(universe_id), 40, universe_id):
+                wrong.append(f'place {place_id}: {online}/{max_players} universe {cached_universe}, '
+                             f'expected {expected_playing(universe_id)}/40 universe {universe_id}')
+        failures += wrong[:10]
+        if len(wrong) > 10:
+            failures.append(f'... {len(wrong) - 10} more wrong places')
+        if runs[0].get('universe') != args.places:
+            failures.append(f"first refresh resolved {runs[0].get('universe')} places, expected {args.places}")
+        if runs[1].get('universe', 0) != len(missing):
+            failures.append(f"second refresh resolved {runs[1].get('universe', 0)} places again, "
+                            f'expected only the {len(missing)} missing ones')
+    finally:
+        cur.execute('DELETE FROM vip_servers WHERE game_name = %s', (MARKER,))
+        cur.execute('DELETE FROM roblox_game_cache WHERE place_id = ANY(%s)', (place_ids,))
+        conn.commit()
+        conn.close()
+        server.shutdown()
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    print('OK' if not failures else 'FAILED')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+'''
+Business: Flood the reports POST endpoint from one client and check that rate limiting keeps Postgres and other clients healthy
+Args: --dsn - disposable local Postgres with migrations applied, --duration - seconds per phase,
+      --spam-workers - threads flooding from one IP, --spam-gap-ms - pause between one thread's requests (network round trip),
+      --users - well-behaved clients posting every --interval seconds,
+      --pool-size - DB_POOL_SIZE of the in-process function, --budget-ms - p99 budget for well-behaved clients,
+      --store - RATE_LIMIT_STORE for the limited run
+Returns: prints a limiter off/on comparison of admitted spam, client latency and DB load;
+         exits 1 when the limited run lets well-behaved clients fail, exceed the budget or admits more spam than its bucket allows
+'''
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import psycopg2
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FUNCTION = os.path.join(ROOT, 'backend', 'reports')
+TELEGRAM_ID_BASE = 6_000_000_000_000
+RATE = 2.0
+BURST = 30.0
+
+
+def load_reports(rate: float) -> tuple:
+    os.environ['RATE_LIMIT_RATE'] = str(rate)
+    os.environ['RATE_LIMIT_BURST'] = str(BURST)
+    local = [filename[:-3] for filename in os.listdir(FUNCTION) if filename.endswith('.py')]
+    for module in local:
+        sys.modules.pop(module, None)
+    sys.path.insert(0, FUNCTION)
+    try:
+        return importlib.import_module('index').handler, sys.modules['db']
+    finally:
+        sys.path.remove(FUNCTION)
+        for module in local:
+            sys.modules.pop(module, None)
+
+
+def run_phase(args, rate: float, user_ids: list) -> dict:
+    handler, db = load_reports(rate)
+    stop = threading.Event()
+    spam = Counter()
+    legit = Counter()
+    latencies = []
+    lock = threading.Lock()
+
+    def post(ip: str, user_id: int) -> int:
+        event = {
+            'httpMethod': 'POST',
+            'headers': {},
+            'requestContext': {'identity': {'sourceIp': ip}},
+            'body': json.dumps({'user_id': user_id, 'reported_player': f'flood_target_{user_id % 50}',
+                                'report_type': 'spam', 'description': 'write flood'})
+        }
+        try:
+            return handler(event, None)['statusCode']
+        except Exception:
+            return 0
+
+    def spammer() -> None:
+        while not stop.is_set():
+            status = post('203.0.113.66', user_ids[0])
+            with lock:
+                spam[status] += 1
+            time.sleep(args.spam_gap_ms / 1000)
+
+    def client(index: int) -> None:
+        next_at = time.monotonic() + index * args.interval / len(user_ids)
+        while not stop.is_set():
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            next_at += args.interval
+            started = time.perf_counter()
+            status = post(f'198.51.100.{index % 250}', user_ids[index])
+            with lock:
+                legit[status] += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    monitor = psycopg2.connect(args.dsn)
+    monitor.autocommit = True
+    mcur = monitor.cursor()
+    mcur.execute('SELECT xact_commit FROM pg_stat_database WHERE datname = current_database()')
+    commits_before = mcur.fetchone()[0]
+
+    threads = [threading.Thread(target=spammer) for _ in range(args.spam_workers)]
+    threads += [threading.Thread(target=client, args=(index,)) for index in range(1, len(user_ids))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    peak_active = 0
+    while time.perf_counter() - started < args.duration:
+        mcur.execute('''
+            SELECT COUNT(*) FROM pg_stat_activity
+            WHERE datname = current_database() AND state = 'active' AND pid <> pg_backend_pid()
+        ''')
+        peak_active = max(peak_active, mcur.fetchone()[0])
+        time.sleep(0.05)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    mcur.execute('SELECT xact_commit FROM pg_stat_database WHERE datname = current_database()')
+    commits = mcur.fetchone()[0] - commits_before
+    monitor.close()
+    db.get_pool().close()
+
+    latencies.sort()
+    return {
+        'elapsed': elapsed,
+        'spam': spam,
+        'legit': legit,
+        'p50': latencies[len(latencies) // 2] if latencies else 0.0,
+        'p99': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0,
+        'peak_active': peak_active,
+        'commits_per_s': commits / elapsed
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', 'postgresql://localhost/postgres'))
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--spam-workers', type=int, default=64)
+    parser.add_argument('--spam-gap-ms', type=float, default=1.0)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--pool-size', type=int, default=8)
+    parser.add_argument('--budget-ms', type=float, default=100.0)
+    parser.add_argument('--store', choices=('postgres', 'memory'), default='postgres')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.dsn
+    os.environ['DB_POOL_SIZE'] = str(args.pool_size)
+    os.environ['SESSION_SECRET'] = ''
+    os.environ['RATE_LIMIT_STORE'] = args.store
+
+    setup = psycopg2.connect(args.dsn)
+    cur = setup.cursor()
+    cur.execute('''
+        INSERT INTO users (telegram_id, username)
+        SELECT %s + g, 'flood_' || g FROM generate_series(0, %s) g
+        RETURNING id
+    ''', (TELEGRAM_ID_BASE, args.users))
+    user_ids = [row[0] for row in cur.fetchall()]
+    setup.commit()
+
+    failures = []
+    try:
+        results = {'off': run_phase(args, 0, user_ids), 'on': run_phase(args, RATE, user_ids)}
+    finally:
+        cur.execute('''
+            DELETE FROM player_reports
+            WHERE reporter_user_id IN (SELECT id FROM users WHERE telegram_id >= %s)
+        ''', (TELEGRAM_ID_BASE,))
+        cur.execute("DELETE FROM player_report_stats WHERE normalized_player LIKE 'flood_target_%%'")
+        cur.execute("DELETE FROM rate_limit_buckets WHERE bucket LIKE 'reports:%%'")
+        cur.execute('DELETE FROM users WHERE telegram_id >= %s', (TELEGRAM_ID_BASE,))
+        setup.commit()
+        setup.close()
+
+    print(f'{args.spam_workers} threads flooding from one IP, {args.users} clients posting every {args.interval:.1f}s, '
+          f'pool of {args.pool_size}, {args.store} store, {args.duration:.0f}s per run')
+    print(f"{'limiter':<8} {'spam req/s':>10} {'admitted':>9} {'clients ok':>11} {'p50':>8} {'p99':>9} "
+          f"{'peak active':>12} {'commits/s':>10}")
+    for mode, result in results.items():
+        spam_total = sum(result['spam'].values())
+        legit_total = sum(result['legit'].values())
+        print(f"{mode:<8} {spam_total / result['elapsed']:>10.0f} {result['spam'][201]:>9} "
+              f"{result['legit'][201]:>5}/{legit_total:<5} {result['p50']:>6.1f}ms {result['p99']:>7.1f}ms "
+              f"{result['peak_active']:>12} {result['commits_per_s']:>10.0f}")
+
+    limited = results['on']
+    allowed = BURST + RATE * limited['elapsed'] + 1
+    if limited['spam'][201] > allowed:
+        failures.append(f"limiter admitted {limited['spam'][201]} flood requests, bucket allows {allowed:.0f}")
+    if limited['legit'][201] != sum(limited['legit'].values()):
+        failures.append(f"well-behaved clients saw {dict(limited['legit'])}")
+    if limited['p99'] > args.budget_ms:
+        failures.append(f"well-behaved p99 {limited['p99']:.1f} ms exceeds {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f'FAIL {failure}')
+    print('OK' if not failures else 'FAILED')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
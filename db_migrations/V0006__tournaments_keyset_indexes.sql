@@ -0,0 +1,4 @@
+CREATE INDEX idx_tournaments_created_id ON tournaments(created_at DESC, id DESC);
+CREATE INDEX idx_tournaments_status_created_id ON tournaments(status, created_at DESC, id DESC);
+CREATE INDEX idx_tournaments_game_created_id ON tournaments(game_name, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_tournaments_status;
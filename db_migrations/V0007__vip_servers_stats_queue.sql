@@ -0,0 +1,11 @@
+ALTER TABLE vip_servers ADD COLUMN place_id BIGINT;
+UPDATE vip_servers SET place_id = substring(server_url from '/games/(\d+)')::BIGINT WHERE server_url ~ '/games/\d+';
+CREATE INDEX idx_vip_servers_place_id ON vip_servers(place_id) WHERE place_id IS NOT NULL;
+
+CREATE TABLE vip_stats_queue (
+  place_id BIGINT PRIMARY KEY,
+  enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO vip_stats_queue (place_id)
+SELECT DISTINCT place_id FROM vip_servers WHERE place_id IS NOT NULL;
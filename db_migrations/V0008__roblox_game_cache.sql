@@ -0,0 +1,10 @@
+CREATE TABLE roblox_game_cache (
+  place_id BIGINT PRIMARY KEY,
+  name VARCHAR(255),
+  max_players INTEGER,
+  playing INTEGER,
+  found BOOLEAN NOT NULL DEFAULT TRUE,
+  fetched_at TIMESTAMP NOT NULL
+);
+
+ALTER TABLE vip_stats_queue ADD COLUMN claimed_at TIMESTAMP;
@@ -0,0 +1,8 @@
+CREATE TABLE tournament_participants (
+  tournament_id INTEGER NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+  user_id INTEGER NOT NULL REFERENCES users(id),
+  joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (tournament_id, user_id)
+);
+
+CREATE INDEX idx_tournament_participants_user ON tournament_participants(user_id);
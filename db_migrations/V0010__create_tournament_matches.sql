@@ -0,0 +1,17 @@
+CREATE TABLE tournament_matches (
+  tournament_id INTEGER NOT NULL REFERENCES tournaments(id) ON DELETE CASCADE,
+  match_no INTEGER NOT NULL,
+  bracket CHAR(1) NOT NULL,
+  round INTEGER NOT NULL,
+  player_a INTEGER,
+  player_b INTEGER,
+  winner INTEGER,
+  next_match INTEGER,
+  next_slot SMALLINT,
+  loser_match INTEGER,
+  loser_slot SMALLINT,
+  completed_at TIMESTAMP,
+  PRIMARY KEY (tournament_id, match_no)
+);
+
+ALTER TABLE tournaments ADD COLUMN bracket_format VARCHAR(20);
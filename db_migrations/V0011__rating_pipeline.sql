@@ -0,0 +1,12 @@
+CREATE SEQUENCE match_result_seq;
+
+ALTER TABLE tournament_matches ADD COLUMN result_seq BIGINT;
+CREATE UNIQUE INDEX idx_tournament_matches_result_seq ON tournament_matches(result_seq) WHERE result_seq IS NOT NULL;
+
+CREATE TABLE rating_state (
+  id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  watermark BIGINT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO rating_state (id, watermark) VALUES (1, 0);
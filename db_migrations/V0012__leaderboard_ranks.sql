@@ -0,0 +1,16 @@
+CREATE MATERIALIZED VIEW leaderboard_ranks AS
+SELECT
+  u.id AS user_id,
+  COALESCE(NULLIF(u.roblox_username, ''), NULLIF(u.username, ''), u.first_name) AS display_name,
+  u.photo_url,
+  u.rating,
+  u.wins,
+  u.losses,
+  DENSE_RANK() OVER (ORDER BY u.rating DESC) AS rank,
+  ROW_NUMBER() OVER (ORDER BY u.rating DESC, u.id) AS position,
+  CURRENT_TIMESTAMP AS refreshed_at
+FROM users u
+WHERE u.rating IS NOT NULL;
+
+CREATE UNIQUE INDEX idx_leaderboard_ranks_user ON leaderboard_ranks(user_id);
+CREATE UNIQUE INDEX idx_leaderboard_ranks_position ON leaderboard_ranks(position);
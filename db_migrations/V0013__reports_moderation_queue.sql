@@ -0,0 +1,7 @@
+ALTER TABLE player_reports ADD COLUMN claimed_by INTEGER REFERENCES users(id);
+ALTER TABLE player_reports ADD COLUMN claimed_at TIMESTAMP;
+
+CREATE INDEX idx_reports_status_created ON player_reports(status, created_at);
+CREATE INDEX idx_reports_reporter_created ON player_reports(reporter_user_id, created_at DESC);
+CREATE INDEX idx_reports_created ON player_reports(created_at DESC);
+DROP INDEX IF EXISTS idx_reports_status;
@@ -0,0 +1,30 @@
+ALTER TABLE player_reports ADD COLUMN normalized_player VARCHAR(255);
+ALTER TABLE player_reports ADD COLUMN report_count INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE player_reports ADD COLUMN window_start TIMESTAMP;
+ALTER TABLE player_reports ADD COLUMN last_reported_at TIMESTAMP;
+
+UPDATE player_reports
+SET normalized_player = lower(regexp_replace(trim(reported_player_name), '\s+', ' ', 'g')),
+    last_reported_at = created_at;
+
+CREATE UNIQUE INDEX idx_reports_coalesce ON player_reports(normalized_player, report_type, window_start)
+  WHERE status = 'pending' AND window_start IS NOT NULL;
+
+CREATE TABLE player_report_stats (
+  normalized_player VARCHAR(255) PRIMARY KEY,
+  display_name VARCHAR(255) NOT NULL,
+  total_reports INTEGER NOT NULL DEFAULT 0,
+  counts JSONB NOT NULL DEFAULT '{}'::jsonb,
+  first_reported_at TIMESTAMP NOT NULL,
+  last_reported_at TIMESTAMP NOT NULL
+);
+
+INSERT INTO player_report_stats (normalized_player, display_name, total_reports, counts, first_reported_at, last_reported_at)
+SELECT normalized_player, MAX(display_name), SUM(total), jsonb_object_agg(report_type, total), MIN(first_at), MAX(last_at)
+FROM (
+  SELECT normalized_player, report_type, MAX(reported_player_name) AS display_name, COUNT(*) AS total,
+         MIN(created_at) AS first_at, MAX(created_at) AS last_at
+  FROM player_reports
+  GROUP BY normalized_player, report_type
+) grouped
+GROUP BY normalized_player;
@@ -0,0 +1,6 @@
+ALTER TABLE users ALTER COLUMN telegram_id DROP NOT NULL;
+ALTER TABLE users DROP CONSTRAINT users_telegram_id_key;
+ALTER TABLE users ADD CONSTRAINT users_telegram_id_key UNIQUE (telegram_id);
+
+DROP INDEX IF EXISTS idx_telegram_id;
+DROP INDEX IF EXISTS idx_users_roblox_id;
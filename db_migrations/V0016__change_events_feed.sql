@@ -0,0 +1,91 @@
+CREATE TABLE change_events (
+  id BIGSERIAL PRIMARY KEY,
+  seq BIGINT,
+  topic VARCHAR(50) NOT NULL,
+  entity_id INTEGER NOT NULL,
+  op VARCHAR(10) NOT NULL,
+  payload JSONB,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX idx_change_events_seq ON change_events(seq);
+CREATE INDEX idx_change_events_unsequenced ON change_events(id) WHERE seq IS NULL;
+
+CREATE FUNCTION record_tournament_change() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO change_events (topic, entity_id, op) VALUES ('tournaments', OLD.id, 'delete');
+  ELSIF TG_OP = 'UPDATE'
+    AND (NEW.name, NEW.game_name, NEW.roblox_server_url, NEW.max_players, NEW.prize_robux,
+         NEW.status, NEW.start_date, NEW.creator_user_id)
+    IS NOT DISTINCT FROM
+        (OLD.name, OLD.game_name, OLD.roblox_server_url, OLD.max_players, OLD.prize_robux,
+         OLD.status, OLD.start_date, OLD.creator_user_id) THEN
+    IF NEW.current_players IS NOT DISTINCT FROM OLD.current_players THEN
+      RETURN NULL;
+    END IF;
+    INSERT INTO change_events (topic, entity_id, op, payload)
+    VALUES ('tournaments', NEW.id, 'seats',
+            jsonb_build_object('id', NEW.id, 'players', NEW.current_players, 'maxPlayers', NEW.max_players));
+  ELSE
+    INSERT INTO change_events (topic, entity_id, op, payload)
+    SELECT 'tournaments', NEW.id, lower(TG_OP), jsonb_build_object(
+      'id', NEW.id,
+      'name', NEW.name,
+      'game', NEW.game_name,
+      'robloxServerUrl', NEW.roblox_server_url,
+      'maxPlayers', NEW.max_players,
+      'prize', NEW.prize_robux,
+      'players', NEW.current_players,
+      'status', NEW.status,
+      'startDate', NEW.start_date,
+      'createdAt', NEW.created_at,
+      'creator', jsonb_build_object('first_name', u.first_name, 'last_name', u.last_name, 'username', u.username)
+    )
+    FROM (SELECT NEW.creator_user_id AS creator_user_id) t
+    LEFT JOIN users u ON u.id = t.creator_user_id;
+  END IF;
+  PERFORM pg_notify('change_events', TG_TABLE_NAME);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION record_vip_server_change() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    INSERT INTO change_events (topic, entity_id, op) VALUES ('vip_servers', OLD.id, 'delete');
+  ELSIF TG_OP = 'UPDATE'
+    AND (NEW.game_name, NEW.server_url, NEW.creator_user_id)
+    IS NOT DISTINCT FROM (OLD.game_name, OLD.server_url, OLD.creator_user_id) THEN
+    IF (NEW.online_players, NEW.max_players) IS NOT DISTINCT FROM (OLD.online_players, OLD.max_players) THEN
+      RETURN NULL;
+    END IF;
+    INSERT INTO change_events (topic, entity_id, op, payload)
+    VALUES ('vip_servers', NEW.id, 'stats',
+            jsonb_build_object('id', NEW.id, 'online_players', NEW.online_players, 'max_players', NEW.max_players));
+  ELSE
+    INSERT INTO change_events (topic, entity_id, op, payload)
+    SELECT 'vip_servers', NEW.id, lower(TG_OP), jsonb_build_object(
+      'id', NEW.id,
+      'game_name', NEW.game_name,
+      'server_url', NEW.server_url,
+      'online_players', NEW.online_players,
+      'max_players', NEW.max_players,
+      'created_at', NEW.created_at,
+      'creator_name', COALESCE(NULLIF(u.roblox_username, ''), NULLIF(u.first_name, '') || ' ' || COALESCE(u.last_name, ''), 'Unknown')
+    )
+    FROM (SELECT NEW.creator_user_id AS creator_user_id) v
+    LEFT JOIN users u ON u.id = v.creator_user_id;
+  END IF;
+  PERFORM pg_notify('change_events', TG_TABLE_NAME);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tournaments_change_events
+AFTER INSERT OR UPDATE OR DELETE ON tournaments
+FOR EACH ROW EXECUTE FUNCTION record_tournament_change();
+
+CREATE TRIGGER vip_servers_change_events
+AFTER INSERT OR UPDATE OR DELETE ON vip_servers
+FOR EACH ROW EXECUTE FUNCTION record_vip_server_change();
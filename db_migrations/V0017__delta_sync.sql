@@ -0,0 +1,68 @@
+UPDATE tournaments SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL;
+UPDATE vip_servers SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL;
+
+ALTER TABLE tournaments ALTER COLUMN updated_at SET NOT NULL;
+ALTER TABLE vip_servers ALTER COLUMN updated_at SET NOT NULL;
+
+CREATE INDEX idx_tournaments_updated_at ON tournaments(updated_at);
+CREATE INDEX idx_vip_servers_updated_at ON vip_servers(updated_at);
+
+CREATE TABLE tombstones (
+  entity VARCHAR(50) NOT NULL,
+  entity_id INTEGER NOT NULL,
+  deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (entity, entity_id)
+);
+
+CREATE INDEX idx_tombstones_entity_deleted ON tombstones(entity, deleted_at);
+
+CREATE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND NEW IS NOT DISTINCT FROM OLD THEN
+    RETURN NEW;
+  END IF;
+  NEW.updated_at := clock_timestamp()::timestamp;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION record_tombstone() RETURNS trigger AS $$
+BEGIN
+  INSERT INTO tombstones (entity, entity_id, deleted_at)
+  VALUES (TG_TABLE_NAME, OLD.id, clock_timestamp()::timestamp)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION prune_tombstones() RETURNS trigger AS $$
+BEGIN
+  DELETE FROM tombstones
+  WHERE entity = TG_TABLE_NAME AND deleted_at < LOCALTIMESTAMP - INTERVAL '30 days';
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tournaments_touch_updated_at
+BEFORE INSERT OR UPDATE ON tournaments
+FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+CREATE TRIGGER vip_servers_touch_updated_at
+BEFORE INSERT OR UPDATE ON vip_servers
+FOR EACH ROW EXECUTE FUNCTION touch_updated_at();
+
+CREATE TRIGGER tournaments_tombstone
+AFTER DELETE ON tournaments
+FOR EACH ROW EXECUTE FUNCTION record_tombstone();
+
+CREATE TRIGGER vip_servers_tombstone
+AFTER DELETE ON vip_servers
+FOR EACH ROW EXECUTE FUNCTION record_tombstone();
+
+CREATE TRIGGER tournaments_prune_tombstones
+AFTER DELETE ON tournaments
+FOR EACH STATEMENT EXECUTE FUNCTION prune_tombstones();
+
+CREATE TRIGGER vip_servers_prune_tombstones
+AFTER DELETE ON vip_servers
+FOR EACH STATEMENT EXECUTE FUNCTION prune_tombstones();
@@ -0,0 +1,32 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE tournaments ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+  setweight(to_tsvector('simple', coalesce(name, '')), 'A') || setweight(to_tsvector('simple', coalesce(game_name, '')), 'B')
+) STORED;
+ALTER TABLE vip_servers ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+  to_tsvector('simple', coalesce(game_name, ''))
+) STORED;
+ALTER TABLE users ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+  to_tsvector('simple', coalesce(roblox_username, '') || ' ' || coalesce(username, ''))
+) STORED;
+
+CREATE INDEX idx_tournaments_search ON tournaments USING GIN (search_vector);
+CREATE INDEX idx_tournaments_name_trgm ON tournaments USING GIN (name gin_trgm_ops);
+CREATE INDEX idx_tournaments_game_trgm ON tournaments USING GIN (game_name gin_trgm_ops);
+
+CREATE INDEX idx_vip_servers_search ON vip_servers USING GIN (search_vector);
+CREATE INDEX idx_vip_servers_game_trgm ON vip_servers USING GIN (game_name gin_trgm_ops);
+
+CREATE INDEX idx_users_search ON users USING GIN (search_vector);
+CREATE INDEX idx_users_username_trgm ON users USING GIN (username gin_trgm_ops);
+CREATE INDEX idx_users_roblox_username_trgm ON users USING GIN (roblox_username gin_trgm_ops);
+
+CREATE OR REPLACE FUNCTION touch_updated_at() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'UPDATE' AND to_jsonb(NEW) - 'search_vector' - 'updated_at' = to_jsonb(OLD) - 'search_vector' - 'updated_at' THEN
+    RETURN NEW;
+  END IF;
+  NEW.updated_at := clock_timestamp()::timestamp;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,2 @@
+CREATE INDEX idx_tournaments_start_due ON tournaments(start_date) WHERE status = 'registration';
+CREATE INDEX idx_tournaments_finish_due ON tournaments(start_date) WHERE status = 'active';
@@ -0,0 +1,30 @@
+CREATE TABLE rate_limit_buckets (
+  bucket VARCHAR(255) PRIMARY KEY,
+  tokens DOUBLE PRECISION NOT NULL,
+  refilled_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX idx_rate_limit_buckets_refilled ON rate_limit_buckets(refilled_at);
+
+CREATE FUNCTION take_rate_tokens(p_bucket VARCHAR, p_want INTEGER, p_rate DOUBLE PRECISION, p_burst DOUBLE PRECISION,
+                                 OUT granted INTEGER, OUT retry_after DOUBLE PRECISION) AS $$
+DECLARE
+  now_ts TIMESTAMP := clock_timestamp()::timestamp;
+  available DOUBLE PRECISION;
+BEGIN
+  INSERT INTO rate_limit_buckets AS b (bucket, tokens, refilled_at)
+  VALUES (p_bucket, p_burst, now_ts)
+  ON CONFLICT (bucket) DO UPDATE SET
+    tokens = LEAST(p_burst, b.tokens + GREATEST(EXTRACT(EPOCH FROM now_ts - b.refilled_at)::float8, 0) * p_rate),
+    refilled_at = now_ts
+  RETURNING tokens INTO available;
+
+  granted := LEAST(p_want, floor(available)::integer);
+  IF granted > 0 THEN
+    UPDATE rate_limit_buckets SET tokens = available - granted WHERE bucket = p_bucket;
+    retry_after := 0;
+  ELSE
+    retry_after := (1 - available) / p_rate;
+  END IF;
+END;
+$$ LANGUAGE plpgsql;
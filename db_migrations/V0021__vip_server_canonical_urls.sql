@@ -0,0 +1,56 @@
+ALTER TABLE vip_servers ADD COLUMN link_code VARCHAR(255);
+ALTER TABLE vip_servers ADD COLUMN post_count INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE vip_servers ADD COLUMN bumped_at TIMESTAMP;
+
+CREATE TEMP TABLE vip_server_keys AS
+SELECT id,
+       substring(server_url from '(?i)^(?:https?://)?(?:(?:www|web|m)\.)?roblox\.com(?:/[a-z]{2}(?:-[a-z]{2})?)?/games/(\d+)(?:[/?#]|$)')::BIGINT AS place_id,
+       substring(server_url from '[?&]privateServerLinkCode=([A-Za-z0-9_-]{1,128})(?:[&#]|$)') AS private_code,
+       server_url ~ '[?&]privateServerLinkCode=[^&#]' AS has_private_code,
+       CASE WHEN server_url !~ '[?&]type=' OR server_url ~ '[?&]type=Server(?:[&#]|$)' THEN
+         substring(server_url from '(?i)^(?:https?://)?(?:(?:www|web|m)\.)?roblox\.com/share/?\?(?:[^#]*&)?code=([A-Za-z0-9_-]{1,128})(?:[&#]|$)')
+       END AS share_code
+FROM vip_servers;
+
+UPDATE vip_servers v SET
+  place_id = k.place_id,
+  link_code = COALESCE(k.private_code, ''),
+  server_url = 'https://www.roblox.com/games/' || k.place_id || COALESCE('?privateServerLinkCode=' || k.private_code, '')
+FROM vip_server_keys k
+WHERE v.id = k.id AND k.place_id IS NOT NULL AND (k.private_code IS NOT NULL OR NOT k.has_private_code);
+
+UPDATE vip_servers v SET
+  place_id = NULL,
+  link_code = 'share:' || k.share_code,
+  server_url = 'https://www.roblox.com/share?code=' || k.share_code || '&type=Server'
+FROM vip_server_keys k
+WHERE v.id = k.id AND k.place_id IS NULL AND k.share_code IS NOT NULL;
+
+DROP TABLE vip_server_keys;
+
+CREATE TEMP TABLE vip_server_duplicates AS
+SELECT id,
+       first_value(id) OVER w AS keep_id,
+       COUNT(*) OVER w AS copies,
+       MAX(created_at) OVER w AS last_posted_at
+FROM vip_servers
+WHERE link_code IS NOT NULL
+WINDOW w AS (PARTITION BY COALESCE(place_id, 0), link_code ORDER BY created_at, id
+             ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING);
+
+UPDATE vip_servers v SET post_count = d.copies, bumped_at = d.last_posted_at
+FROM vip_server_duplicates d
+WHERE v.id = d.id AND d.id = d.keep_id AND d.copies > 1;
+
+DELETE FROM vip_servers v
+USING vip_server_duplicates d
+WHERE v.id = d.id AND d.id <> d.keep_id;
+
+DROP TABLE vip_server_duplicates;
+
+UPDATE vip_servers SET bumped_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE bumped_at IS NULL;
+ALTER TABLE vip_servers ALTER COLUMN bumped_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE vip_servers ALTER COLUMN bumped_at SET NOT NULL;
+
+CREATE UNIQUE INDEX idx_vip_servers_canonical ON vip_servers ((COALESCE(place_id, 0)), link_code) WHERE link_code IS NOT NULL;
+CREATE INDEX idx_vip_servers_bumped ON vip_servers(bumped_at DESC, id DESC);
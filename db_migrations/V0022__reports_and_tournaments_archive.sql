@@ -0,0 +1,92 @@
+CREATE TABLE player_reports_archive (
+  id INTEGER NOT NULL,
+  reporter_user_id INTEGER,
+  reported_player_name VARCHAR(255) NOT NULL,
+  normalized_player VARCHAR(255),
+  report_type VARCHAR(50) NOT NULL,
+  description TEXT NOT NULL,
+  status VARCHAR(50) NOT NULL,
+  report_count INTEGER NOT NULL DEFAULT 1,
+  claimed_by INTEGER,
+  claimed_at TIMESTAMP,
+  last_reported_at TIMESTAMP,
+  created_at TIMESTAMP NOT NULL,
+  archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX idx_reports_archive_reporter_created ON player_reports_archive(reporter_user_id, created_at DESC);
+
+CREATE TABLE tournaments_archive (
+  id INTEGER NOT NULL,
+  name VARCHAR(255) NOT NULL,
+  game_name VARCHAR(255) NOT NULL,
+  roblox_server_url TEXT NOT NULL,
+  max_players INTEGER NOT NULL,
+  prize_robux INTEGER NOT NULL,
+  creator_user_id INTEGER,
+  current_players INTEGER,
+  status VARCHAR(50) NOT NULL,
+  bracket_format VARCHAR(20),
+  start_date TIMESTAMP,
+  created_at TIMESTAMP NOT NULL,
+  updated_at TIMESTAMP NOT NULL,
+  participants INTEGER[] NOT NULL DEFAULT '{}',
+  matches JSONB NOT NULL DEFAULT '[]'::jsonb,
+  archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX idx_tournaments_archive_creator ON tournaments_archive(creator_user_id);
+
+CREATE TABLE match_results_archive (
+  result_seq BIGINT PRIMARY KEY,
+  tournament_id INTEGER NOT NULL,
+  player_a INTEGER,
+  player_b INTEGER,
+  winner INTEGER,
+  completed_at TIMESTAMP
+);
+
+CREATE INDEX idx_tournaments_finished_updated ON tournaments(updated_at) WHERE status = 'finished';
+
+CREATE FUNCTION create_monthly_partitions(p_parent TEXT, p_from TIMESTAMP, p_to TIMESTAMP) RETURNS INTEGER AS $$
+DECLARE
+  month_start TIMESTAMP := date_trunc('month', p_from);
+  created INTEGER := 0;
+BEGIN
+  WHILE month_start IS NOT NULL AND month_start <= p_to LOOP
+    IF to_regclass(p_parent || to_char(month_start, '"_p"YYYYMM')) IS NULL THEN
+      EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                     p_parent || to_char(month_start, '"_p"YYYYMM'), p_parent,
+                     month_start, month_start + INTERVAL '1 month');
+      created := created + 1;
+    END IF;
+    month_start := month_start + INTERVAL '1 month';
+  END LOOP;
+  RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION drop_expired_partitions(p_parent TEXT, p_keep_months INTEGER) RETURNS SETOF TEXT AS $$
+DECLARE
+  partition_name TEXT;
+BEGIN
+  FOR partition_name IN
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = p_parent::regclass
+      AND c.relname ~ ('^' || p_parent || '_p[0-9]{6}$')
+      AND to_timestamp(right(c.relname, 6), 'YYYYMM')::timestamp + INTERVAL '1 month'
+          <= date_trunc('month', LOCALTIMESTAMP) - make_interval(months => p_keep_months)
+    ORDER BY c.relname
+  LOOP
+    EXECUTE format('DROP TABLE %I', partition_name);
+    RETURN NEXT partition_name;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT create_monthly_partitions('player_reports_archive', LOCALTIMESTAMP, LOCALTIMESTAMP + INTERVAL '1 month');
+SELECT create_monthly_partitions('tournaments_archive', LOCALTIMESTAMP, LOCALTIMESTAMP + INTERVAL '1 month');
@@ -0,0 +1,4 @@
+DROP INDEX idx_reports_coalesce;
+
+CREATE UNIQUE INDEX idx_reports_coalesce ON player_reports(normalized_player, report_type, reporter_user_id, window_start)
+  WHERE status = 'pending' AND window_start IS NOT NULL;
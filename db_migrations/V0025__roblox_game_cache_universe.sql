@@ -0,0 +1 @@
+ALTER TABLE roblox_game_cache ADD COLUMN universe_id BIGINT;
@@ -0,0 +1 @@
+ALTER TABLE users ADD COLUMN rating_exact DOUBLE PRECISION;
@@ -0,0 +1,75 @@
+CREATE FUNCTION merge_users(p_keep INTEGER, p_drop INTEGER) RETURNS BOOLEAN AS $$
+DECLARE
+  keep_row users%ROWTYPE;
+  drop_row users%ROWTYPE;
+BEGIN
+  IF p_keep = p_drop THEN
+    RETURN TRUE;
+  END IF;
+  PERFORM 1 FROM users WHERE id IN (p_keep, p_drop) ORDER BY id FOR UPDATE;
+  SELECT * INTO keep_row FROM users WHERE id = p_keep;
+  SELECT * INTO drop_row FROM users WHERE id = p_drop;
+  IF keep_row.id IS NULL OR drop_row.id IS NULL
+    OR keep_row.roblox_id <> drop_row.roblox_id
+    OR keep_row.telegram_id <> drop_row.telegram_id THEN
+    RETURN FALSE;
+  END IF;
+
+  UPDATE tournaments SET current_players = current_players - 1
+  WHERE id IN (
+    SELECT d.tournament_id FROM tournament_participants d
+    JOIN tournament_participants k ON k.tournament_id = d.tournament_id AND k.user_id = p_keep
+    WHERE d.user_id = p_drop
+  );
+  DELETE FROM tournament_participants d
+  USING tournament_participants k
+  WHERE d.user_id = p_drop AND k.tournament_id = d.tournament_id AND k.user_id = p_keep;
+  UPDATE tournament_participants SET user_id = p_keep WHERE user_id = p_drop;
+
+  WITH duplicates AS (
+    SELECT d.id AS drop_id, k.id AS keep_id, d.report_count
+    FROM player_reports d
+    JOIN player_reports k
+      ON k.normalized_player = d.normalized_player AND k.report_type = d.report_type
+     AND k.window_start = d.window_start AND k.reporter_user_id = p_keep AND k.status = 'pending'
+    WHERE d.reporter_user_id = p_drop AND d.status = 'pending' AND d.window_start IS NOT NULL
+  ), bumped AS (
+    UPDATE player_reports r SET report_count = r.report_count + duplicates.report_count
+    FROM duplicates WHERE r.id = duplicates.keep_id
+  )
+  DELETE FROM player_reports WHERE id IN (SELECT drop_id FROM duplicates);
+  UPDATE player_reports SET reporter_user_id = p_keep WHERE reporter_user_id = p_drop;
+  UPDATE player_reports SET claimed_by = p_keep WHERE claimed_by = p_drop;
+  UPDATE player_reports_archive SET reporter_user_id = p_keep WHERE reporter_user_id = p_drop;
+  UPDATE player_reports_archive SET claimed_by = p_keep WHERE claimed_by = p_drop;
+
+  UPDATE tournaments SET creator_user_id = p_keep WHERE creator_user_id = p_drop;
+  UPDATE tournaments_archive SET creator_user_id = p_keep WHERE creator_user_id = p_drop;
+  UPDATE tournaments_archive SET participants = array_replace(participants, p_drop, p_keep)
+  WHERE p_drop = ANY(participants);
+  UPDATE vip_servers SET creator_user_id = p_keep WHERE creator_user_id = p_drop;
+
+  UPDATE tournament_matches SET
+    player_a = CASE WHEN player_a = p_drop THEN p_keep ELSE player_a END,
+    player_b = CASE WHEN player_b = p_drop THEN p_keep ELSE player_b END,
+    winner = CASE WHEN winner = p_drop THEN p_keep ELSE winner END
+  WHERE p_drop IN (player_a, player_b, winner);
+  UPDATE match_results_archive SET
+    player_a = CASE WHEN player_a = p_drop THEN p_keep ELSE player_a END,
+    player_b = CASE WHEN player_b = p_drop THEN p_keep ELSE player_b END,
+    winner = CASE WHEN winner = p_drop THEN p_keep ELSE winner END
+  WHERE p_drop IN (player_a, player_b, winner);
+
+  DELETE FROM users WHERE id = p_drop;
+  UPDATE users SET
+    roblox_id = COALESCE(roblox_id, drop_row.roblox_id),
+    roblox_username = CASE WHEN roblox_id IS NULL THEN drop_row.roblox_username ELSE roblox_username END,
+    roblox_avatar_url = CASE WHEN roblox_id IS NULL THEN drop_row.roblox_avatar_url ELSE roblox_avatar_url END,
+    telegram_id = COALESCE(telegram_id, drop_row.telegram_id),
+    wins = COALESCE(wins, 0) + COALESCE(drop_row.wins, 0),
+    losses = COALESCE(losses, 0) + COALESCE(drop_row.losses, 0),
+    is_moderator = is_moderator OR drop_row.is_moderator
+  WHERE id = p_keep;
+  RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,118 @@
+CREATE OR REPLACE FUNCTION merge_users(p_keep INTEGER, p_drop INTEGER) RETURNS BOOLEAN AS $$
+DECLARE
+  keep_row users%ROWTYPE;
+  drop_row users%ROWTYPE;
+  rated_shared INTEGER;
+  games_keep INTEGER;
+  games_drop INTEGER;
+  merged_rating DOUBLE PRECISION;
+BEGIN
+  IF p_keep = p_drop THEN
+    RETURN TRUE;
+  END IF;
+  PERFORM 1 FROM users WHERE id IN (p_keep, p_drop) ORDER BY id FOR UPDATE;
+  SELECT * INTO keep_row FROM users WHERE id = p_keep;
+  SELECT * INTO drop_row FROM users WHERE id = p_drop;
+  IF keep_row.id IS NULL OR drop_row.id IS NULL
+    OR keep_row.roblox_id <> drop_row.roblox_id
+    OR keep_row.telegram_id <> drop_row.telegram_id THEN
+    RETURN FALSE;
+  END IF;
+  IF EXISTS (
+    SELECT 1 FROM tournament_participants k
+    JOIN tournament_participants d ON d.tournament_id = k.tournament_id AND d.user_id = p_drop
+    JOIN tournaments t ON t.id = k.tournament_id
+    WHERE k.user_id = p_keep AND t.status <> 'finished'
+  ) THEN
+    RETURN FALSE;
+  END IF;
+
+  SELECT COUNT(*) INTO rated_shared FROM (
+    SELECT result_seq, player_a, player_b, winner FROM tournament_matches
+    UNION ALL
+    SELECT result_seq, player_a, player_b, winner FROM match_results_archive
+  ) shared
+  WHERE ((player_a = p_keep AND player_b = p_drop) OR (player_a = p_drop AND player_b = p_keep))
+    AND winner > 0 AND result_seq <= (SELECT watermark FROM rating_state WHERE id = 1);
+
+  UPDATE tournament_matches SET
+    player_a = NULLIF(player_a, p_drop),
+    player_b = NULLIF(player_b, p_drop),
+    winner = CASE WHEN winner IS NULL THEN NULL ELSE p_keep END
+  WHERE (player_a = p_keep AND player_b = p_drop) OR (player_a = p_drop AND player_b = p_keep);
+  UPDATE match_results_archive SET
+    player_a = NULLIF(player_a, p_drop),
+    player_b = NULLIF(player_b, p_drop),
+    winner = CASE WHEN winner IS NULL THEN NULL ELSE p_keep END
+  WHERE (player_a = p_keep AND player_b = p_drop) OR (player_a = p_drop AND player_b = p_keep);
+
+  UPDATE tournaments SET current_players = current_players - 1
+  WHERE id IN (
+    SELECT d.tournament_id FROM tournament_participants d
+    JOIN tournament_participants k ON k.tournament_id = d.tournament_id AND k.user_id = p_keep
+    WHERE d.user_id = p_drop
+  );
+  DELETE FROM tournament_participants d
+  USING tournament_participants k
+  WHERE d.user_id = p_drop AND k.tournament_id = d.tournament_id AND k.user_id = p_keep;
+  UPDATE tournament_participants SET user_id = p_keep WHERE user_id = p_drop;
+
+  WITH duplicates AS (
+    SELECT d.id AS drop_id, k.id AS keep_id, d.report_count
+    FROM player_reports d
+    JOIN player_reports k
+      ON k.normalized_player = d.normalized_player AND k.report_type = d.report_type
+     AND k.window_start = d.window_start AND k.reporter_user_id = p_keep AND k.status = 'pending'
+    WHERE d.reporter_user_id = p_drop AND d.status = 'pending' AND d.window_start IS NOT NULL
+  ), bumped AS (
+    UPDATE player_reports r SET report_count = r.report_count + duplicates.report_count
+    FROM duplicates WHERE r.id = duplicates.keep_id
+  )
+  DELETE FROM player_reports WHERE id IN (SELECT drop_id FROM duplicates);
+  UPDATE player_reports SET reporter_user_id = p_keep WHERE reporter_user_id = p_drop;
+  UPDATE player_reports SET claimed_by = p_keep WHERE claimed_by = p_drop;
+  UPDATE player_reports_archive SET reporter_user_id = p_keep WHERE reporter_user_id = p_drop;
+  UPDATE player_reports_archive SET claimed_by = p_keep WHERE claimed_by = p_drop;
+
+  UPDATE tournaments SET creator_user_id = p_keep WHERE creator_user_id = p_drop;
+  UPDATE tournaments_archive SET creator_user_id = p_keep WHERE creator_user_id = p_drop;
+  UPDATE tournaments_archive SET participants = array_remove(participants, p_drop)
+  WHERE p_drop = ANY(participants) AND p_keep = ANY(participants);
+  UPDATE tournaments_archive SET participants = array_replace(participants, p_drop, p_keep)
+  WHERE p_drop = ANY(participants);
+  UPDATE vip_servers SET creator_user_id = p_keep WHERE creator_user_id = p_drop;
+
+  UPDATE tournament_matches SET
+    player_a = CASE WHEN player_a = p_drop THEN p_keep ELSE player_a END,
+    player_b = CASE WHEN player_b = p_drop THEN p_keep ELSE player_b END,
+    winner = CASE WHEN winner = p_drop THEN p_keep ELSE winner END
+  WHERE p_drop IN (player_a, player_b, winner);
+  UPDATE match_results_archive SET
+    player_a = CASE WHEN player_a = p_drop THEN p_keep ELSE player_a END,
+    player_b = CASE WHEN player_b = p_drop THEN p_keep ELSE player_b END,
+    winner = CASE WHEN winner = p_drop THEN p_keep ELSE winner END
+  WHERE p_drop IN (player_a, player_b, winner);
+
+  games_keep := COALESCE(keep_row.wins, 0) + COALESCE(keep_row.losses, 0);
+  games_drop := COALESCE(drop_row.wins, 0) + COALESCE(drop_row.losses, 0);
+  IF games_keep + games_drop > 0 THEN
+    merged_rating := (COALESCE(keep_row.rating_exact, keep_row.rating, 1500) * games_keep
+                    + COALESCE(drop_row.rating_exact, drop_row.rating, 1500) * games_drop)
+                   / (games_keep + games_drop);
+  END IF;
+
+  DELETE FROM users WHERE id = p_drop;
+  UPDATE users SET
+    roblox_id = COALESCE(roblox_id, drop_row.roblox_id),
+    roblox_username = CASE WHEN roblox_id IS NULL THEN drop_row.roblox_username ELSE roblox_username END,
+    roblox_avatar_url = CASE WHEN roblox_id IS NULL THEN drop_row.roblox_avatar_url ELSE roblox_avatar_url END,
+    telegram_id = COALESCE(telegram_id, drop_row.telegram_id),
+    wins = COALESCE(wins, 0) + COALESCE(drop_row.wins, 0) - rated_shared,
+    losses = COALESCE(losses, 0) + COALESCE(drop_row.losses, 0) - rated_shared,
+    rating = COALESCE(round(merged_rating)::INTEGER, rating),
+    rating_exact = COALESCE(merged_rating, rating_exact),
+    is_moderator = is_moderator OR drop_row.is_moderator
+  WHERE id = p_keep;
+  RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,355 @@
+'''
+Business: Fan out tournament and VIP server changes to browsers over Server-Sent Events
+Args: DATABASE_URL - Postgres with the change_events trigger, REALTIME_HOST/REALTIME_PORT - listen address,
+      REALTIME_POLL_SECONDS - fallback poll interval, REALTIME_RETENTION_HOURS - replay window for resuming clients
+Returns: long-running asyncio service; GET /events?topics=tournaments,vip_servers streams deltas and resumes
+         after Last-Event-ID (or ?last_event_id=), GET /health reports the feed position
+'''
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import psycopg2
+import psycopg2.extensions
+
+DATABASE_URL = os.environ.get('DATABASE_URL', '')
+HOST = os.environ.get('REALTIME_HOST', '0.0.0.0')
+PORT = int(os.environ.get('REALTIME_PORT', '8080'))
+POLL_SECONDS = float(os.environ.get('REALTIME_POLL_SECONDS', '5'))
+RETENTION_HOURS = int(os.environ.get('REALTIME_RETENTION_HOURS', '24'))
+HEARTBEAT_SECONDS = 15.0
+CLIENT_QUEUE_SIZE = 256
+BATCH_SIZE = 500
+REPLAY_LIMIT = 2000
+PRUNE_SECONDS = 3600
+CHANNEL = 'change_events'
+TOPICS = frozenset(('tournaments', 'vip_servers'))
+SEQUENCER_LOCK = 7301
+
+SEQUENCE_PENDING = '''
+    WITH base AS (
+        SELECT COALESCE(MAX(seq), 0) AS seq FROM change_events
+    ), pending AS (
+        SELECT id, row_number() OVER (ORDER BY id) AS n
+        FROM (SELECT id FROM change_events WHERE seq IS NULL ORDER BY id LIMIT %s) p
+    )
+    UPDATE change_events c
+    SET seq = base.seq + pending.n
+    FROM base, pending
+    WHERE c.id = pending.id
+'''
+FETCH_AFTER = '''
+    SELECT seq, topic, entity_id, op, payload
+    FROM change_events
+    WHERE seq > %s
+    ORDER BY seq
+    LIMIT %s
+'''
+REPLAY_AFTER = '''
+    SELECT seq, topic, entity_id, op, payload
+    FROM change_events
+    WHERE seq > %s AND topic = ANY(%s)
+    ORDER BY seq
+    LIMIT %s
+'''
+PRUNE = '''
+    DELETE FROM change_events
+    WHERE seq IS NOT NULL
+      AND created_at < CURRENT_TIMESTAMP - make_interval(hours => %s)
+      AND seq < (SELECT MAX(seq) FROM change_events)
+'''
+
+CORS_HEADERS = (
+    'Access-Control-Allow-Origin: *\r\n'
+    'Access-Control-Allow-Methods: GET, OPTIONS\r\n'
+    'Access-Control-Allow-Headers: Last-Event-ID, Cache-Control\r\n'
+)
+STREAM_HEAD = (
+    'HTTP/1.1 200 OK\r\n'
+    'Content-Type: text/event-stream\r\n'
+    'Cache-Control: no-cache\r\n'
+    'Connection: keep-alive\r\n'
+    'X-Accel-Buffering: no\r\n'
+    + CORS_HEADERS +
+    '\r\n'
+    'retry: 3000\n\n'
+).encode()
+HEARTBEAT = b': ping\n\n'
+RESET = b'event: reset\ndata: {}\n\n'
+
+log = logging.getLogger('realtime')
+
+Event = Tuple[int, str, bytes]
+
+
+def encode_event(row: tuple) -> Event:
+    seq, topic, entity_id, op, payload = row
+    data = json.dumps({'op': op, 'id': entity_id, 'data': payload}, separators=(',', ':'))
+    return seq, topic, f'id: {seq}\nevent: {topic}\ndata: {data}\n\n'.encode()
+
+
+class Subscriber:
+    def __init__(self, topics: Set[str]):
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(CLIENT_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event: Event) -> None:
+        if self.overflowed or event[1] not in self.topics:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ChangeFeed:
+    '''
+    Single LISTEN connection per process. Trigger rows are numbered by whichever
+    instance holds the sequencer lock, so seq order is commit order and a client
+    resuming after seq N never skips a row that committed late.
+    '''
+
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.cursor = 0
+        self.subscribers: Set[Subscriber] = set()
+        self.wakeup = asyncio.Event()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='change-feed')
+        self.listen_conn: Any = None
+        self.work_conn: Any = None
+        self.last_prune = 0.0
+
+    async def run(self) -> None:
+        backoff = 1.0
+        while True:
+            try:
+                await self._connect()
+                backoff = 1.0
+                while True:
+                    await self._advance()
+                    try:
+                        await asyncio.wait_for(self.wakeup.wait(), POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    self.wakeup.clear()
+            except psycopg2.Error as exc:
+                log.warning('change feed lost its database connection: %s', exc)
+                self._disconnect()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def replay(self, after: int, topics: Set[str]) -> Optional[List[Event]]:
+        if self.work_conn is None:
+            return None
+        return await self._db(self._replay, after, sorted(topics))
+
+    async def _connect(self) -> None:
+        loop = asyncio.get_running_loop()
+        self.listen_conn = await self._db(psycopg2.connect, self.dsn)
+        self.listen_conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        self.listen_conn.cursor().execute(f'LISTEN {CHANNEL}')
+        loop.add_reader(self.listen_conn.fileno(), self._on_notify)
+        self.work_conn = await self._db(psycopg2.connect, self.dsn)
+        if not self.cursor:
+            self.cursor = await self._db(self._head)
+
+    def _disconnect(self) -> None:
+        if self.listen_conn is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self.listen_conn.fileno())
+            except psycopg2.Error:
+                pass
+        for conn in (self.listen_conn, self.work_conn):
+            if conn is not None and not conn.closed:
+                conn.close()
+        self.listen_conn = self.work_conn = None
+
+    def _on_notify(self) -> None:
+        try:
+            self.listen_conn.poll()
+            self.listen_conn.notifies.clear()
+        except psycopg2.Error:
+            asyncio.get_running_loop().remove_reader(self.listen_conn.fileno())
+            self.listen_conn.close()
+        self.wakeup.set()
+
+    async def _db(self, fn: Any, *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def _advance(self) -> None:
+        if self.listen_conn.closed:
+            raise psycopg2.OperationalError('LISTEN connection closed')
+        while True:
+            events = await self._db(self._sequence_and_fetch, self.cursor)
+            for event in events:
+                self.cursor = event[0]
+                for subscriber in tuple(self.subscribers):
+                    subscriber.offer(event)
+            if len(events) < BATCH_SIZE:
+                break
+        if time.monotonic() - self.last_prune > PRUNE_SECONDS:
+            self.last_prune = time.monotonic()
+            await self._db(self._prune)
+
+    def _head(self) -> int:
+        with self.work_conn, self.work_conn.cursor() as cur:
+            cur.execute('SELECT COALESCE(MAX(seq), 0) FROM change_events')
+            return cur.fetchone()[0]
+
+    def _sequence_and_fetch(self, after: int) -> List[Event]:
+        with self.work_conn, self.work_conn.cursor() as cur:
+            cur.execute('SELECT pg_advisory_xact_lock(%s)', (SEQUENCER_LOCK,))
+            cur.execute(SEQUENCE_PENDING, (BATCH_SIZE,))
+        with self.work_conn, self.work_conn.cursor() as cur:
+            cur.execute(FETCH_AFTER, (after, BATCH_SIZE))
+            return [encode_event(row) for row in cur.fetchall()]
+
+    def _replay(self, after: int, topics: List[str]) -> Optional[List[Event]]:
+        with self.work_conn, self.work_conn.cursor() as cur:
+            cur.execute('SELECT MIN(seq), MAX(seq) FROM change_events')
+            oldest, newest = cur.fetchone()
+            if after > (newest or 0) or (oldest is not None and oldest > after + 1):
+                return None
+            cur.execute(REPLAY_AFTER, (after, topics, REPLAY_LIMIT + 1))
+            rows = cur.fetchall()
+        if len(rows) > REPLAY_LIMIT:
+            return None
+        return [encode_event(row) for row in rows]
+
+    def _prune(self) -> None:
+        with self.work_conn, self.work_conn.cursor() as cur:
+            cur.execute(PRUNE, (RETENTION_HOURS,))
+
+
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str]]]:
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 10)
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+        return None
+    lines = head.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ')
+    if len(parts) != 3:
+        return None
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], headers
+
+
+def simple_response(status: str, body: Any = None) -> bytes:
+    payload = json.dumps(body).encode() if body is not None else b''
+    return (
+        f'HTTP/1.1 {status}\r\n'
+        'Content-Type: application/json\r\n'
+        f'Content-Length: {len(payload)}\r\n'
+        'Connection: close\r\n'
+        + CORS_HEADERS +
+        '\r\n'
+    ).encode() + payload
+
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+async def stream(feed: ChangeFeed, writer: asyncio.StreamWriter, topics: Set[str], after: Optional[int]) -> None:
+    subscriber = Subscriber(topics)
+    feed.subscribers.add(subscriber)
+    try:
+        writer.write(STREAM_HEAD)
+        if after is None:
+            sent = feed.cursor
+            writer.write(f'id: {sent}\nevent: ready\ndata: {{}}\n\n'.encode())
+        else:
+            backlog = await feed.replay(after, topics)
+            if backlog is None:
+                sent = feed.cursor
+                writer.write(RESET + f'id: {sent}\nevent: ready\ndata: {{}}\n\n'.encode())
+            else:
+                sent = after
+                for seq, _, frame in backlog:
+                    writer.write(frame)
+                    sent = seq
+        await writer.drain()
+
+        while not subscriber.overflowed:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                writer.write(HEARTBEAT)
+                await writer.drain()
+                continue
+            if event[0] <= sent:
+                continue
+            writer.write(event[2])
+            sent = event[0]
+            if subscriber.queue.empty():
+                await writer.drain()
+    finally:
+        feed.subscribers.discard(subscriber)
+
+
+async def handle_client(feed: ChangeFeed, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request = await read_request(reader)
+        if request is None:
+            return
+        method, target, headers = request
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if method == 'OPTIONS':
+            writer.write(simple_response('204 No Content'))
+        elif method != 'GET':
+            writer.write(simple_response('405 Method Not Allowed', {'error': 'Method not allowed'}))
+        elif url.path == '/health':
+            writer.write(simple_response('200 OK', {'cursor': feed.cursor, 'clients': len(feed.subscribers)}))
+        elif url.path == '/events':
+            requested = set(filter(None, query.get('topics', ','.join(TOPICS)).split(',')))
+            if not requested or not requested <= TOPICS:
+                writer.write(simple_response('400 Bad Request', {'error': f'topics must be a subset of {sorted(TOPICS)}'}))
+            else:
+                after = parse_last_event_id(headers.get('last-event-id') or query.get('last_event_id'))
+                await stream(feed, writer, requested, after)
+        else:
+            writer.write(simple_response('404 Not Found', {'error': 'Not found'}))
+        await writer.drain()
+    except (ConnectionError, psycopg2.Error) as exc:
+        log.debug('client stream closed: %s', exc)
+    except asyncio.CancelledError:
+        log.debug('client stream cancelled on shutdown')
+    finally:
+        writer.close()
+
+
+async def main() -> None:
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
+    feed = ChangeFeed(DATABASE_URL)
+    feed_task = asyncio.create_task(feed.run())
+    server = await asyncio.start_server(lambda r, w: handle_client(feed, r, w), HOST, PORT, backlog=1024)
+    log.info('streaming changes on %s:%s', HOST, PORT)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    async with server:
+        await stop.wait()
+    feed_task.cancel()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -8,6 +8,7 @@ import { Label } from '@/components/ui/label';
 import { Textarea } from '@/components/ui/textarea';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import { useToast } from '@/hooks/use-toast';
+import { authHeaders } from '@/lib/session';
 
 interface ReportsTabProps {
   user: any | null;
@@ -44,7 +45,7 @@ export const ReportsTab = ({ user }: ReportsTabProps) => {
     try {
       const response = await fetch('https://functions.poehali.dev/fb17521b-3570-4496-928f-9cc3b7ff4b08', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', ...authHeaders() },
         body: JSON.stringify({
           ...newReport,
           user_id: user.id,
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Badge } from '@/components/ui/badge';
@@ -7,6 +7,11 @@ import { Dialog, DialogContent, DialogDescription, DialogHeader, DialogTitle, Di
 import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
 import { useToast } from '@/hooks/use-toast';
+import { authHeaders } from '@/lib/session';
+import { applyChange, realtimeEnabled, subscribeChanges } from '@/lib/realtime';
+import { applyDelta, withSince } from '@/lib/sync';
+
+const VIP_SERVERS_URL = 'https://functions.poehali.dev/ba1a4360-7539-430e-8cf4-a94e8dd83efa';
 
 interface VipServer {
   id: number;
@@ -25,6 +30,7 @@ interface VipServersTabProps {
 export const VipServersTab = ({ user }: VipServersTabProps) => {
   const [servers, setServers] = useState<VipServer[]>([]);
   const [isLoading, setIsLoading] = useState(false);
+  const syncToken = useRef<string | null>(null);
   const [isDialogOpen, setIsDialogOpen] = useState(false);
   const [newServer, setNewServer] = useState({
     game_name: '',
@@ -34,15 +40,28 @@ export const VipServersTab = ({ user }: VipServersTabProps) => {
 
   useEffect(() => {
     loadServers();
+    return subscribeChanges<VipServer>(
+      'vip_servers',
+      (event) => setServers((items) => applyChange(items, event)),
+      () => loadServers(true),
+    );
   }, []);
 
-  const loadServers = async () => {
-    setIsLoading(true);
+  const loadServers = async (full = false) => {
+    const since = full ? null : syncToken.current;
+    setIsLoading(!since);
     try {
-      const response = await fetch('https://functions.poehali.dev/ba1a4360-7539-430e-8cf4-a94e8dd83efa');
+      const response = await fetch(withSince(VIP_SERVERS_URL, since));
       const data = await response.json();
+      if (data.full) {
+        syncToken.current = null;
+        return loadServers(true);
+      }
       if (data.servers) {
-        setServers(data.servers);
+        setServers((items) => since ? applyDelta(items, data.servers, data.deleted) : data.servers);
+      }
+      if (data.sync_token) {
+        syncToken.current = data.sync_token;
       }
     } catch (error) {
       console.error('Failed to load VIP servers:', error);
@@ -71,9 +90,9 @@ export const VipServersTab = ({ user }: VipServersTabProps) => {
     }
 
     try {
-      const response = await fetch('https://functions.poehali.dev/ba1a4360-7539-430e-8cf4-a94e8dd83efa', {
+      const response = await fetch(VIP_SERVERS_URL, {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', ...authHeaders() },
         body: JSON.stringify({
           ...newServer,
           user_id: user.id,
@@ -84,12 +103,16 @@ export const VipServersTab = ({ user }: VipServersTabProps) => {
       
       if (data.success) {
         toast({
-          title: '✅ VIP сервер добавлен!',
-          description: `Сервер "${newServer.game_name}" успешно добавлен`,
+          title: data.bumped ? '⬆️ Сервер уже есть в списке' : '✅ VIP сервер добавлен!',
+          description: data.bumped
+            ? 'Мы подняли существующую запись наверх'
+            : `Сервер "${newServer.game_name}" успешно добавлен`,
         });
         setIsDialogOpen(false);
         setNewServer({ game_name: '', server_url: '' });
-        loadServers();
+        if (!realtimeEnabled()) {
+          loadServers();
+        }
       }
     } catch (error) {
       toast({
@@ -0,0 +1,39 @@
+const REALTIME_URL = import.meta.env.VITE_REALTIME_URL as string | undefined;
+
+export type ChangeTopic = 'tournaments' | 'vip_servers';
+
+export interface ChangeEvent<T> {
+  op: 'insert' | 'update' | 'seats' | 'stats' | 'delete';
+  id: number;
+  data: Partial<T> | null;
+}
+
+export function realtimeEnabled() {
+  return Boolean(REALTIME_URL) && typeof EventSource !== 'undefined';
+}
+
+export function subscribeChanges<T>(
+  topic: ChangeTopic,
+  onChange: (event: ChangeEvent<T>) => void,
+  onReset: () => void,
+): () => void {
+  if (!realtimeEnabled()) return () => {};
+  const source = new EventSource(`${REALTIME_URL}/events?topics=${topic}`);
+  const handleChange = (message: MessageEvent) => onChange(JSON.parse(message.data));
+  source.addEventListener(topic, handleChange as EventListener);
+  source.addEventListener('reset', onReset);
+  return () => source.close();
+}
+
+export function applyChange<T extends { id: number }>(items: T[], event: ChangeEvent<T>): T[] {
+  if (event.op === 'delete') {
+    return items.filter((item) => item.id !== event.id);
+  }
+  const index = items.findIndex((item) => item.id === event.id);
+  if (index === -1) {
+    return event.op === 'insert' ? [event.data as T, ...items] : items;
+  }
+  const next = items.slice();
+  next[index] = { ...items[index], ...event.data };
+  return next;
+}
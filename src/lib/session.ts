@@ -0,0 +1,31 @@
+const TOKEN_KEY = 'tournament_session';
+
+interface StoredSession {
+  token: string;
+  expires_at: number;
+}
+
+export function saveSession(token?: string, expiresAt?: number) {
+  if (token && expiresAt) {
+    localStorage.setItem(TOKEN_KEY, JSON.stringify({ token, expires_at: expiresAt }));
+  }
+}
+
+export function clearSession() {
+  localStorage.removeItem(TOKEN_KEY);
+}
+
+export function authHeaders(): Record<string, string> {
+  const raw = localStorage.getItem(TOKEN_KEY);
+  if (!raw) return {};
+  const session: StoredSession = JSON.parse(raw);
+  if (session.expires_at * 1000 <= Date.now()) {
+    clearSession();
+    return {};
+  }
+  return { Authorization: `Bearer ${session.token}` };
+}
+
+export function hasSession(): boolean {
+  return 'Authorization' in authHeaders();
+}
@@ -0,0 +1,22 @@
+export interface DeltaResponse {
+  deleted?: number[];
+  full?: boolean;
+  sync_token?: string;
+}
+
+export function withSince(url: string, since: string | null) {
+  return since ? `${url}?since=${encodeURIComponent(since)}` : url;
+}
+
+export function applyDelta<T extends { id: number }>(items: T[], changed: T[], deleted: number[] = []): T[] {
+  const removed = new Set(deleted);
+  const updates = new Map(changed.map((item) => [item.id, item]));
+  const next = items
+    .filter((item) => !removed.has(item.id))
+    .map((item) => {
+      const update = updates.get(item.id);
+      updates.delete(item.id);
+      return update ?? item;
+    });
+  return [...updates.values()].reverse().concat(next);
+}
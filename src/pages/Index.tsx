@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useToast } from '@/hooks/use-toast';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
@@ -12,10 +12,17 @@ import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
 import VipServersTab from '@/components/VipServersTab';
 import ReportsTab from '@/components/ReportsTab';
+import { authHeaders, clearSession, hasSession, saveSession } from '@/lib/session';
+import { applyChange, realtimeEnabled, subscribeChanges } from '@/lib/realtime';
+import { applyDelta, withSince } from '@/lib/sync';
+
+const TOURNAMENTS_URL = 'https://functions.poehali.dev/bcdfbe86-b6a2-4caa-9d27-53d91e51880f';
 
 interface User {
   id: number;
-  telegram_id: number;
+  telegram_id: number | null;
+  roblox_id?: number | null;
+  roblox_username?: string | null;
   username: string;
   first_name: string;
   last_name: string;
@@ -52,6 +59,9 @@ const Index = () => {
   const [tournaments, setTournaments] = useState<Tournament[]>([]);
   const [isCreateDialogOpen, setIsCreateDialogOpen] = useState(false);
   const [isLoadingTournaments, setIsLoadingTournaments] = useState(false);
+  const [tournamentsCursor, setTournamentsCursor] = useState<string | null>(null);
+  const [isLoadingMoreTournaments, setIsLoadingMoreTournaments] = useState(false);
+  const tournamentsSyncToken = useRef<string | null>(null);
   const [newTournament, setNewTournament] = useState({
     name: '',
     game_name: '',
@@ -84,13 +94,32 @@ const Index = () => {
     loadTournaments();
   }, []);
 
-  const loadTournaments = async () => {
-    setIsLoadingTournaments(true);
+  useEffect(() => {
+    return subscribeChanges<Tournament>(
+      'tournaments',
+      (event) => setTournaments((items) => applyChange(items, event)),
+      () => loadTournaments(true),
+    );
+  }, []);
+
+  const loadTournaments = async (full = false) => {
+    const since = full ? null : tournamentsSyncToken.current;
+    setIsLoadingTournaments(!since);
     try {
-      const response = await fetch('https://functions.poehali.dev/bcdfbe86-b6a2-4caa-9d27-53d91e51880f');
+      const response = await fetch(withSince(TOURNAMENTS_URL, since));
       const data = await response.json();
+      if (data.full) {
+        tournamentsSyncToken.current = null;
+        return loadTournaments(true);
+      }
       if (data.tournaments) {
-        setTournaments(data.tournaments);
+        setTournaments((items) => since ? applyDelta(items, data.tournaments, data.deleted) : data.tournaments);
+      }
+      if (!since) {
+        setTournamentsCursor(data.next_cursor ?? null);
+      }
+      if (data.sync_token) {
+        tournamentsSyncToken.current = data.sync_token;
       }
     } catch (error) {
       console.error('Failed to load tournaments:', error);
@@ -99,6 +128,26 @@ const Index = () => {
     }
   };
 
+  const loadMoreTournaments = async () => {
+    if (!tournamentsCursor) return;
+    setIsLoadingMoreTournaments(true);
+    try {
+      const response = await fetch(`${TOURNAMENTS_URL}?cursor=${encodeURIComponent(tournamentsCursor)}`);
+      const data = await response.json();
+      if (data.tournaments) {
+        setTournaments((items) => {
+          const loaded = new Set(items.map((item) => item.id));
+          return items.concat(data.tournaments.filter((item: Tournament) => !loaded.has(item.id)));
+        });
+      }
+      setTournamentsCursor(data.next_cursor ?? null);
+    } catch (error) {
+      console.error('Failed to load more tournaments:', error);
+    } finally {
+      setIsLoadingMoreTournaments(false);
+    }
+  };
+
   const toggleTheme = () => {
     const newMode = !isDarkMode;
     setIsDarkMode(newMode);
@@ -119,9 +168,11 @@ const Index = () => {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...authHeaders(),
         },
         body: JSON.stringify({
           telegram_data: telegramUser,
+          link_user_id: hasSession() ? user?.id : undefined,
         }),
       });
 
@@ -130,6 +181,7 @@ const Index = () => {
       if (data.success && data.user) {
         setUser(data.user);
         localStorage.setItem('tournament_user', JSON.stringify(data.user));
+        saveSession(data.token, data.expires_at);
         toast({
           title: '✅ Успешный вход!',
           description: `Добро пожаловать, ${data.user.first_name}!`,
@@ -149,6 +201,7 @@ const Index = () => {
   const handleLogout = () => {
     setUser(null);
     localStorage.removeItem('tournament_user');
+    clearSession();
     toast({
       title: 'Вы вышли из аккаунта',
     });
@@ -174,13 +227,14 @@ const Index = () => {
     try {
       const response = await fetch('https://functions.poehali.dev/8ca9ea0f-f7d2-4007-9e14-4e54d7bf5502', {
         method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
+        headers: { 'Content-Type': 'application/json', ...authHeaders() },
         body: JSON.stringify({
           roblox_data: {
             id: parseInt(robloxUserId),
             name: robloxUsername,
             displayName: robloxUsername,
           },
+          link_user_id: hasSession() ? user?.id : undefined,
         }),
       });
 
@@ -189,6 +243,7 @@ const Index = () => {
       if (data.success && data.user) {
         setUser(data.user);
         localStorage.setItem('tournament_user', JSON.stringify(data.user));
+        saveSession(data.token, data.expires_at);
         toast({
           title: '✅ Успешный вход!',
           description: `Добро пожаловать, ${data.user.first_name}!`,
@@ -223,10 +278,11 @@ const Index = () => {
     }
 
     try {
-      const response = await fetch('https://functions.poehali.dev/bcdfbe86-b6a2-4caa-9d27-53d91e51880f', {
+      const response = await fetch(TOURNAMENTS_URL, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          ...authHeaders(),
         },
         body: JSON.stringify({
           ...newTournament,
@@ -249,7 +305,9 @@ const Index = () => {
           max_players: 64,
           prize_robux: 5000,
         });
-        loadTournaments();
+        if (!realtimeEnabled()) {
+          loadTournaments();
+        }
       }
     } catch (error) {
       toast({
@@ -536,8 +594,8 @@ const Index = () => {
                     <CardHeader>
                       <div className="flex justify-between items-start mb-2">
                         <CardTitle className="text-xl">{tournament.name}</CardTitle>
-                        <Badge variant={tournament.status === 'registration' ? 'default' : 'destructive'}>
-                          {tournament.status === 'registration' ? 'Регистрация' : 'В игре'}
+                        <Badge variant={tournament.status === 'registration' ? 'default' : tournament.status === 'finished' ? 'secondary' : 'destructive'}>
+                          {tournament.status === 'registration' ? 'Регистрация' : tournament.status === 'finished' ? 'Завершён' : 'В игре'}
                         </Badge>
                       </div>
                       <CardDescription className="flex items-center gap-2">
@@ -581,6 +639,14 @@ const Index = () => {
                 ))}
               </div>
             )}
+            {!isLoadingTournaments && tournamentsCursor && (
+              <div className="text-center">
+                <Button variant="outline" onClick={loadMoreTournaments} disabled={isLoadingMoreTournaments}>
+                  <Icon name={isLoadingMoreTournaments ? 'Loader2' : 'ChevronDown'} className={`mr-2 h-4 w-4 ${isLoadingMoreTournaments ? 'animate-spin' : ''}`} />
+                  Показать ещё
+                </Button>
+              </div>
+            )}
           </TabsContent>
 
           <TabsContent value="vip-servers">